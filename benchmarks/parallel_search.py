@@ -0,0 +1,132 @@
+"""Escalado de la búsqueda multiproceso de MinimaxBot y MCTSBot.
+
+Para cada número de procesos de ``--workers`` y sobre las mismas posiciones
+(aleatorias, reproducibles con ``--seed``) mide:
+
+* ``MinimaxBot`` (Lazy SMP): tiempo hasta completar la profundidad ``--depth`` con la
+  tabla vacía, nodos por segundo y profundidad alcanzada en ``--time-ms``.
+* ``MCTSBot`` (paralelismo de raíz): simulaciones por segundo en ``--time-ms``.
+
+El speedup es respecto a un proceso. Solo tiene sentido con al menos tantos núcleos
+libres como procesos.
+
+```
+python benchmarks/parallel_search.py --workers 1 2 4 8 --positions 8
+```
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from quartopy.bot.mcts_bot import MCTSBot  # noqa: E402
+from quartopy.bot.minimax_bot import MinimaxBot  # noqa: E402
+from quartopy.game.bitboard import BitBoard  # noqa: E402
+from quartopy.game.search_state import SearchState  # noqa: E402
+
+
+def random_positions(n: int, empty: int, seed: int) -> list[SearchState]:
+    """``n`` posiciones en fase de colocación con ``empty`` celdas vacías, a las que se
+    llega con jugadas al azar que no ganan."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < n:
+        state = SearchState(BitBoard(), pick=True)
+        while 16 - state.board.occupied.bit_count() > empty or state.pick:
+            if state.make_move(rng.choice(state.legal_moves())):
+                break
+        else:
+            state.history = []
+            positions.append(state)
+    return positions
+
+
+def bench_minimax(positions, workers: int, depth: int, time_ms: float) -> dict[str, float]:
+    fixed = MinimaxBot(depth=depth, workers=workers, endgame_empty=0)
+    timed = MinimaxBot(time_budget_ms=time_ms, workers=workers, endgame_empty=0)
+    fixed.best_move(positions[0].copy())  # arranca los procesos
+    timed.best_move(positions[0].copy())
+
+    times, nodes_per_s, depths = [], [], []
+    for state in positions:
+        fixed.tt.clear()
+        start = time.perf_counter()
+        fixed.best_move(state.copy())
+        times.append(time.perf_counter() - start)
+
+        timed.tt.clear()
+        start = time.perf_counter()
+        timed.best_move(state.copy())
+        nodes_per_s.append(timed.nodes / (time.perf_counter() - start))
+        depths.append(timed.completed_depth)
+    fixed.close()
+    timed.close()
+    return {
+        "time_to_depth": statistics.median(times),
+        "nodes_per_s": statistics.median(nodes_per_s),
+        "depth": statistics.mean(depths),
+    }
+
+
+def bench_mcts(positions, workers: int, time_ms: float, seed: int) -> dict[str, float]:
+    bot = MCTSBot(
+        simulations=None, time_budget_ms=time_ms, workers=workers, reuse_tree=False, endgame_empty=0, seed=seed
+    )
+    bot.best_move(positions[0].copy())  # arranca los procesos
+
+    sims_per_s = []
+    for state in positions:
+        start = time.perf_counter()
+        bot.best_move(state.copy())
+        sims_per_s.append(bot.simulations_done / (time.perf_counter() - start))
+    bot.close()
+    return {"sims_per_s": statistics.median(sims_per_s)}
+
+
+def main() -> int:
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[n for n in (1, 2, 4, 8, 16, 32) if n <= cpus],
+        help="Números de procesos a medir",
+    )
+    parser.add_argument("--positions", type=int, default=6, help="Posiciones por medida")
+    parser.add_argument("--empty", type=int, default=11, help="Celdas vacías de las posiciones")
+    parser.add_argument("--depth", type=int, default=7, help="Profundidad del tiempo hasta profundidad")
+    parser.add_argument("--time-ms", type=float, default=500, help="Tiempo por jugada de las medidas a tiempo fijo")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    positions = random_positions(args.positions, args.empty, args.seed)
+    print(f"{cpus} CPUs, {args.positions} posiciones con {args.empty} celdas vacías")
+    print(
+        f"{'procesos':>8} | {'minimax prof. ' + str(args.depth):>18} {'speedup':>7} "
+        f"{'nodos/s':>9} {'speedup':>7} {'prof.':>5} | {'mcts sims/s':>11} {'speedup':>7}"
+    )
+    base = None
+    for workers in args.workers:
+        result = bench_minimax(positions, workers, args.depth, args.time_ms)
+        result.update(bench_mcts(positions, workers, args.time_ms, args.seed))
+        if base is None:
+            base = result
+        print(
+            f"{workers:>8} | {result['time_to_depth'] * 1e3:>15.0f} ms "
+            f"{base['time_to_depth'] / result['time_to_depth']:>7.2f} "
+            f"{result['nodes_per_s']:>9.0f} {result['nodes_per_s'] / base['nodes_per_s']:>7.2f} "
+            f"{result['depth']:>5.1f} | {result['sims_per_s']:>11.0f} "
+            f"{result['sims_per_s'] / base['sims_per_s']:>7.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Tiempo de arranque de quartopy en procesos nuevos.
+
+Cada caso se ejecuta ``--repeat`` veces en un intérprete nuevo y se informa la mediana
+y el mínimo. Además comprueba que ningún caso carga dependencias pesadas que no
+necesita (torch, tensordict, PyQt5, tqdm...) y termina con código 1 si alguno lo hace
+o si la mediana supera ``--budget-ms``, para usarlo como control en CI.
+
+```
+python benchmarks/startup.py --repeat 10 --budget-ms 400
+```
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from os import path
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+HEAVY = ("torch", "tensordict", "torchrl", "PyQt5", "tqdm", "onnxruntime")
+
+# nombre: (código a ejecutar, módulos pesados que sí puede cargar)
+CASES = {
+    "import quartopy": ("import quartopy", ()),
+    "import quartopy.game": ("import quartopy.game", ()),
+    "CLI --help": (
+        "import sys; sys.argv = ['quarto_CLI.py', '--help']\n"
+        "try:\n"
+        "    exec(open('quarto_CLI.py').read())\n"
+        "except SystemExit:\n"
+        "    pass",
+        (),
+    ),
+    "random_bot vs random_bot": (
+        "from quartopy import QuartoGame\n"
+        "from quartopy.bot.random_bot import Quarto_bot\n"
+        "game = QuartoGame(Quarto_bot(), Quarto_bot(), mode_2x2=False)\n"
+        "while not game.player_won and not game.game_board.is_full():\n"
+        "    game.play_turn()\n"
+        "    game.cambiar_turno()",
+        (),
+    ),
+    "play_games (1 partida)": (
+        "from quartopy import play_games\n"
+        "from quartopy.bot.random_bot import Quarto_bot\n"
+        "play_games(1, Quarto_bot(), Quarto_bot(), verbose=False, save_match=False)",
+        ("tqdm",),
+    ),
+}
+
+_REPORT = "\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+
+
+def run_case(code: str) -> tuple[float, list[str]]:
+    """Ejecuta ``code`` en un intérprete nuevo. Retorna (segundos, módulos cargados)."""
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", code + _REPORT],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - start
+    modules = json.loads(out.stdout.strip().splitlines()[-1])
+    return elapsed, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Ejecuciones por caso")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Mediana máxima por caso")
+    args = parser.parse_args()
+
+    # Referencia: el intérprete sin nada
+    baseline = statistics.median(run_case("pass")[0] for _ in range(args.repeat))
+    print(f"{'python -c pass':<28} {baseline * 1e3:8.1f} ms")
+
+    failed = False
+    for name, (code, allowed) in CASES.items():
+        times, modules = [], []
+        for _ in range(args.repeat):
+            elapsed, modules = run_case(code)
+            times.append(elapsed)
+        median = statistics.median(times)
+        loaded = sorted(
+            {m.split(".")[0] for m in modules if m.split(".")[0] in HEAVY} - set(allowed)
+        )
+        status = ""
+        if loaded:
+            status += f"  carga {', '.join(loaded)}"
+            failed = True
+        if args.budget_ms is not None and median * 1e3 > args.budget_ms:
+            status += f"  supera {args.budget_ms:.0f} ms"
+            failed = True
+        print(
+            f"{name:<28} {median * 1e3:8.1f} ms (min {min(times) * 1e3:.1f}, "
+            f"+{(median - baseline) * 1e3:.1f} sobre python){status}"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
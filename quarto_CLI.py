@@ -1,5 +1,4 @@
 from quartopy import logger
-from quartopy import go_quarto
 
 import click
 
@@ -26,9 +25,14 @@ logger.debug(f"{__name__} importado correctamente")
 @click.option("--verbose", is_flag=True, help="Mostrar salida detallada")
 @click.option("--folder_bots", help="Directorio de los bots", default="bot/")
 @click.option("--mode_2x2", is_flag=True, help="Habilita el modo de juego 2x2") # Nueva opción para el modo 2x2
-def play_quarto(matches, player1, player2, delay, verbose, folder_bots, mode_2x2): # Añadir mode_2x2 a los argumentos
+@click.option("--workers", default=1, help="Número de procesos para jugar las partidas", type=int)
+@click.option("--seed", default=None, help="Semilla para un torneo reproducible", type=int)
+@click.option("--latency", is_flag=True, help="Mostrar la latencia de las jugadas de cada bot")
+def play_quarto(matches, player1, player2, delay, verbose, folder_bots, mode_2x2, workers, seed, latency): # Añadir mode_2x2 a los argumentos
     logger.info(f"Go CLI")
-    go_quarto(
+    from quartopy import go_quarto  # carga el bucle de juego solo al jugar, no con --help
+
+    results = go_quarto(
         matches=matches,
         player1_file=player1,
         player2_file=player2,
@@ -37,7 +41,12 @@ def play_quarto(matches, player1, player2, delay, verbose, folder_bots, mode_2x2
         folder_bots=folder_bots,
         builtin_bots=True,
         mode_2x2=mode_2x2, # Pasar el valor de mode_2x2 a go_quarto
+        workers=workers,
+        seed=seed,
+        latency=latency,
     )
+    if latency:
+        click.echo(results[2].report())
 
 
 if __name__ == "__main__":
@@ -1,6 +1,23 @@
 from .game.quarto_game import QuartoGame
-from .game.play import go_quarto, play_games
 from .models.Bot import BotAI
 from .utils.logger import logger
 from .game.piece import Piece
 from .game.board import Board
+from .game.bitboard import BitBoard
+
+# Se cargan al usarse: ``play`` importa tqdm y ``vector_env`` no hace falta para jugar
+_LAZY = {
+    "go_quarto": ".game.play",
+    "play_games": ".game.play",
+    "VectorQuartoEnv": ".game.vector_env",
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -100,6 +100,7 @@ def _validate_and_import_quartopy():
 
 # Import quartopy with validation
 BotAI, Piece, QuartoGame = _validate_and_import_quartopy()
+from quartopy.game.endgame import EndgameSolver
 
 logger.debug("Loading CNN_bot...")
 
@@ -110,7 +111,11 @@ class Quarto_bot(BotAI):
         return "CNN_bot"
 
     def __init__(
-        self, *, model_path: str | None = None, model: QuartoCNN | None = None
+        self,
+        *,
+        model_path: str | None = None,
+        model: QuartoCNN | None = None,
+        endgame_empty: int = 0,
     ):
         """
         Initializes the CNN bot.
@@ -121,6 +126,10 @@ class Quarto_bot(BotAI):
         ``model``: QuartoCNN | None
             An instance of QuartoCNN. If provided, it will be used instead of loading from a file.
 
+        ``endgame_empty``: int
+            With this many empty cells or fewer, moves come from the exact ``EndgameSolver``
+            instead of the model. Default is 0 (always use the model).
+
         ## Attributes
         ``DETERMINISTIC``: bool
             If True, the model will select the most probable action.
@@ -207,6 +216,8 @@ class Quarto_bot(BotAI):
             # Only applicable if ``DETERMINISTIC`` is False.
             self.TEMPERATURE: float = 0.1
 
+            self.endgame = EndgameSolver(endgame_empty) if endgame_empty > 0 else None
+
             logger.debug("CNN_bot initialization completed successfully")
 
         except Exception as e:
@@ -232,7 +243,7 @@ class Quarto_bot(BotAI):
             board_matrix = game.game_board.encode()
             if isinstance(game.selected_piece, Piece):
                 piece_onehot = game.selected_piece.vectorize_onehot()
-                piece_onehot = piece_onehot.reshape(1, -1)  # Reshape to (1, 16)
+                piece_onehot = piece_onehot.reshape(1, -1).copy()  # (1, 16), writable for torch
             else:
                 piece_onehot = np.zeros((1, 16), dtype=float)
 
@@ -248,12 +259,24 @@ class Quarto_bot(BotAI):
                 board_tensor = board_tensor.to(self.model._device)
                 piece_tensor = piece_tensor.to(self.model._device)
 
+            # Legal actions: empty cells and pieces still in storage come first
+            board_mask = torch.tensor(
+                [[not game.game_board.occupancy >> i & 1 for i in range(16)]],
+                device=board_tensor.device,
+            )
+            piece_mask = torch.tensor(
+                [[bool(game.storage_board.occupancy >> i & 1) for i in range(16)]],
+                device=board_tensor.device,
+            )
+
             self.board_pos_onehot_cached, self.select_piece_onehot_cached = (
                 self.model.predict(
                     board_tensor,
                     piece_tensor,
                     TEMPERATURE=self.TEMPERATURE,
                     DETERMINISTIC=self.DETERMINISTIC,
+                    board_mask=board_mask,
+                    piece_mask=piece_mask,
                 )
             )
             batch_size = self.board_pos_onehot_cached.shape[0]
@@ -278,6 +301,9 @@ class Quarto_bot(BotAI):
         **kwargs,
     ) -> Piece:
         """Selects a piece for the other player."""
+        if self.endgame is not None and self.endgame.can_solve(game):
+            _, idx_piece = self.endgame.solve(game)
+            return Piece.from_index(idx_piece)
 
         _, selected_piece = self.calculate(game, ith_option)
 
@@ -294,5 +320,10 @@ class Quarto_bot(BotAI):
         """Places the selected piece on the game board at a random valid position."""
         if ith_option == 0:
             self.recalculate = True
+
+        if self.endgame is not None and self.endgame.can_solve(game):
+            _, idx_cell = self.endgame.solve(game)
+            return game.game_board.get_position_index(idx_cell)
+
         board_position, _ = self.calculate(game, ith_option)
         return board_position
@@ -16,12 +16,13 @@ Python 3
 from quartopy.models.CNN_uncoupled import QuartoCNN
 
 from quartopy import BotAI, Piece, QuartoGame
+from quartopy.game.endgame import EndgameSolver
 
 from utils.logger import logger
-import numpy as np
 import torch
 import torch.nn as nn # Added for type hinting nn.Module
 import os
+import weakref
 from tensordict import TensorDict
 
 logger.debug("Loading CNN_bot...")
@@ -48,6 +49,7 @@ class CNNBot(BotAI):
         model_class: type = QuartoCNN, # Changed type hint
         deterministic: bool = True,
         temperature: float = 0.1,
+        endgame_empty: int = 0,
     ):
         """
         Initializes the CNN bot.
@@ -73,6 +75,10 @@ class CNNBot(BotAI):
             Controls the randomness of the selection. Higher values lead to more exploration.
             Only applicable if ``DETERMINISTIC`` is False. Default is 0.1.
 
+        ``endgame_empty``: int
+            With this many empty cells or fewer, moves come from the exact ``EndgameSolver``
+            instead of the model. Default is 0 (always use the model).
+
         ## Attributes
         ``DETERMINISTIC``: bool
             If True, the model will select the most probable action.
@@ -121,7 +127,12 @@ class CNNBot(BotAI):
         self.model.to(self.device) # Use self.device
         logger.debug(f"Model loaded successfully on device: {self.device}")
 
-        self._recalculate = True  # Recalculate the model on each turn
+        # Per game: (len(move_history) when predicted, board indices, piece indices).
+        # Predictions are made before each placement and reused for the selection
+        # that follows it.
+        self._cache: weakref.WeakKeyDictionary[QuartoGame, tuple[int, torch.Tensor, torch.Tensor]] = (
+            weakref.WeakKeyDictionary()
+        )
         self.selected_piece: Piece
         self.board_position: tuple[int, int]
         # If True, the model will select the most probable action
@@ -131,7 +142,39 @@ class CNNBot(BotAI):
         # Only applicable if ``DETERMINISTIC`` is False.
         self.TEMPERATURE: float = temperature
 
+        self.endgame = EndgameSolver(endgame_empty) if endgame_empty > 0 else None
+        self.forward_passes = 0  # in the last call, see ``search_stats``
+
     # ####################################################################
+    def _is_cached(self, game: QuartoGame) -> bool:
+        """True if the cached prediction for ``game`` is valid for its current turn."""
+        cached = self._cache.get(game)
+        if cached is None:
+            return False
+        n_moves = len(game.move_history)
+        return cached[0] == n_moves or (game.pick and cached[0] == n_moves - 1)
+
+    def prepare_batch(self, games: list[QuartoGame]):
+        """Predicts, with a single forward pass, the moves of every game in ``games``
+        whose prediction is not cached yet.
+        ## Parameters
+        ``games``: list[QuartoGame]
+            Games where this bot plays the next turn.
+        """
+        stale = [game for game in games if not self._is_cached(game)]
+        self.forward_passes = int(bool(stale))
+        if not stale:
+            return
+
+        board_indices, piece_indices = self.model.predict_games(
+            stale,
+            TEMPERATURE=self.TEMPERATURE,
+            DETERMINISTIC=self.DETERMINISTIC,
+        )
+        board_indices, piece_indices = board_indices.cpu(), piece_indices.cpu()
+        for i, game in enumerate(stale):
+            self._cache[game] = (len(game.move_history), board_indices[i], piece_indices[i])
+
     def calculate(
         self,
         game: QuartoGame,
@@ -144,43 +187,34 @@ class CNNBot(BotAI):
         ``ith_try``: int
             The index of the current attempt to select or place a piece.
         ## Returns
-
+        ``board_position``: tuple[int, int]
+            The ``ith_try`` preferred board position. Empty cells always come first.
+        ``selected_piece``: Piece
+            The ``ith_try`` preferred piece. Pieces in storage always come first.
         """
-        if self._recalculate:
-            board_matrix = game.game_board.encode()
-            if isinstance(game.selected_piece, Piece):
-                piece_onehot = game.selected_piece.vectorize_onehot()
-                piece_onehot = piece_onehot.reshape(1, -1)  # Reshape to (1, 16)
-            else:
-                piece_onehot = np.zeros((1, 16), dtype=float)
-
-            # Create tensors and move to model's device
-            board_tensor = torch.from_numpy(board_matrix).float().to(self.device) # Use self.device
-            piece_tensor = torch.from_numpy(piece_onehot).float().to(self.device) # Use self.device
-
-            self.board_pos_onehot_cached, self.select_piece_onehot_cached = (
-                self.model.predict(
-                    board_tensor,
-                    piece_tensor,
-                    TEMPERATURE=self.TEMPERATURE,
-                    DETERMINISTIC=self.DETERMINISTIC,
-                )
-            )
-            batch_size = self.board_pos_onehot_cached.shape[0]
-            assert batch_size == 1, f"Expected batch size of 1, got {batch_size}."
-
-            self._recalculate = False  # Do not recalculate until the next turn
+        self.forward_passes = 0
+        if not self._is_cached(game):
+            self.prepare_batch([game])
 
         # load from cached values
-        # 0 for batch size is 1
-        _idx_piece: int = self.select_piece_onehot_cached[0, ith_try].item()  # type: ignore
+        _, board_indices, piece_indices = self._cache[game]
+        _idx_piece: int = piece_indices[ith_try].item()  # type: ignore
         selected_piece = Piece.from_index(_idx_piece)
 
-        _idx_board_pos: int = self.board_pos_onehot_cached[0, ith_try].item()  # type: ignore
+        _idx_board_pos: int = board_indices[ith_try].item()  # type: ignore
         board_position = game.game_board.get_position_index(_idx_board_pos)
 
         return board_position, selected_piece
 
+    def search_stats(self) -> dict[str, float]:
+        """Forward passes run by the last call: 0 when the move was predicted by an
+        earlier ``prepare_batch`` or comes from the endgame solver."""
+        return {"forward_passes": self.forward_passes}
+
+    def batch_stats(self) -> dict[str, float]:
+        """Forward passes run by the last ``prepare_batch``: 0 or 1."""
+        return {"forward_passes": self.forward_passes}
+
     def select(
         self,
         game: QuartoGame,
@@ -189,14 +223,14 @@ class CNNBot(BotAI):
         **kwargs,
     ) -> Piece:
         """Selects a piece for the other player."""
+        self.forward_passes = 0
+        if self.endgame is not None and self.endgame.can_solve(game):
+            _, idx_piece = self.endgame.solve(game)
+            return Piece.from_index(idx_piece)
 
-        for i in range(16): # Iterate through all possible options
-            _, selected_piece = self.calculate(game, i)
-            if game.storage_board.find_piece(selected_piece):
-                return selected_piece
-        
-        logger.error("CNNBot could not find an available piece to select.")
-        raise RuntimeError("CNNBot could not find an available piece to select.")
+        # Predictions are masked: the options come in order, available pieces first
+        _, selected_piece = self.calculate(game, ith_option)
+        return selected_piece
 
     def place_piece(
         self,
@@ -207,16 +241,14 @@ class CNNBot(BotAI):
         **kwargs,
     ) -> tuple[int, int]:
         """Places the selected piece on the game board at a random valid position."""
-        if ith_option == 0:
-            self._recalculate = True
-        
-        for i in range(16):  # Iterate through all possible options
-            board_position, _ = self.calculate(game, i)
-            row, col = board_position
-            if game.game_board.is_empty(row, col):
-                return board_position
-        
-        raise RuntimeError("CNNBot could not find a valid move.")
+        self.forward_passes = 0
+        if self.endgame is not None and self.endgame.can_solve(game):
+            _, idx_cell = self.endgame.solve(game)
+            return game.game_board.get_position_index(idx_cell)
+
+        # Predictions are masked: the options come in order, empty cells first
+        board_position, _ = self.calculate(game, ith_option)
+        return board_position
 
     def evaluate(self, exp_batch: TensorDict) -> tuple[torch.Tensor, torch.Tensor]:
         """Evaluates a batch of experiences and returns the Q-values for the taken actions.
@@ -0,0 +1,467 @@
+"""
+Monte Carlo Tree Search bot for Quarto.
+"""
+import math
+import random
+import time
+from typing import Callable
+
+import numpy as np
+
+from quartopy import BotAI, Piece, QuartoGame
+from quartopy.bot.search_workers import SearchWorkers
+from quartopy.game.bitboard import EMPTY, iter_bits
+from quartopy.game.board import encode_cell_pieces
+from quartopy.game.endgame import (
+    ENDGAME_BUDGET_SHARE,
+    ENDGAME_MAX_EMPTY,
+    EndgameSolver,
+    EndgameTimeout,
+)
+from quartopy.game.search_state import SearchState
+
+MAX_REUSE_PLIES = 4  # our placement and selection, then the opponent's
+
+
+# ####################################################################
+def heuristic_rollout(state: SearchState, rng: random.Random) -> float:
+    """
+    Plays ``state`` out at random, except that a placement that wins is always taken
+    and a piece that lets the opponent win is never given while a safe one remains.
+    The state is not modified.
+
+    :return: 1 if the player to move in ``state`` wins, -1 if it loses, 0 for a draw.
+    """
+    state = state.copy()
+    board = state.board
+    mode_2x2 = state.mode_2x2
+    sign = 1.0  # +1 while the player to move is the one of ``state``
+    while True:
+        if state.pick:
+            if not board.remaining:
+                return 0.0
+            safe = board.remaining & ~board.threat_pieces(mode_2x2)
+            state.make_move(rng.choice(list(iter_bits(safe or board.remaining))))
+            sign = -sign
+        else:
+            winning = board.winning_cells(board.selected, mode_2x2) & ~board.occupied
+            if winning:
+                return sign
+            state.make_move(rng.choice(board.valid_moves()))
+            if board.is_full():
+                return 0.0
+
+
+def random_rollout(state: SearchState, rng: random.Random) -> float:
+    """Plays ``state`` out uniformly at random. Same convention as ``heuristic_rollout``."""
+    state = state.copy()
+    sign = 1.0
+    while True:
+        moves = state.legal_moves()
+        if not moves:
+            return 0.0
+        was_pick = state.pick
+        if state.make_move(rng.choice(moves)):
+            return sign
+        if was_pick:
+            sign = -sign
+
+
+ROLLOUTS: dict[str, Callable[[SearchState, random.Random], float]] = {
+    "heuristic": heuristic_rollout,
+    "random": random_rollout,
+}
+
+
+class ModelPriors:
+    """
+    Prior function for ``MCTSBot`` from a Q-value model: an ``NN_abstract`` (torch) or a
+    ``quartopy.models.runtime.RuntimeModel``. The priors of a state are
+    ``softmax(qav / temperature)`` over the 16 actions of its phase (``qav_piece`` when
+    selecting, ``qav_board`` when placing), all states evaluated with one forward pass.
+    """
+
+    def __init__(self, model, temperature: float = 1.0):
+        self.model = model
+        self.temperature = temperature
+        self.is_torch = hasattr(model, "parameters")
+        if self.is_torch:
+            model.eval()
+
+    def __call__(self, states: list[SearchState]) -> np.ndarray:
+        model = self.model
+        n = len(states)
+        cells = np.array([state.board.cells for state in states], dtype=np.int8)
+        x_board = encode_cell_pieces(cells, out=np.empty((n, 16, 4, 4), dtype=np.float32))
+        x_piece = np.zeros((n, 16), dtype=np.float32)
+        pick = np.array([state.pick for state in states])
+        for i, state in enumerate(states):
+            if not state.pick and state.board.selected != EMPTY:
+                x_piece[i, state.board.selected] = 1
+
+        if self.is_torch:
+            import torch
+
+            with torch.no_grad():
+                qav_board, qav_piece = model(
+                    torch.from_numpy(x_board).to(model.device),
+                    torch.from_numpy(x_piece).to(model.device),
+                )
+            qav_board, qav_piece = qav_board.cpu().numpy(), qav_piece.cpu().numpy()
+        else:
+            qav_board, qav_piece = model.forward(x_board, x_piece)
+
+        logits = np.where(pick[:, None], qav_piece, qav_board) / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        p = np.exp(logits)
+        return p / p.sum(axis=1, keepdims=True)
+
+
+# ####################################################################
+class _Node:
+    """
+    Node of the search tree. ``value_sum`` is from the point of view of the player who
+    made the move into the node, so the parent maximises ``value_sum / visits``.
+    ``terminal`` is the result for the player to move, when it is known without search.
+    """
+
+    __slots__ = ("prior", "is_pick", "visits", "value_sum", "children", "terminal")
+
+    def __init__(self, prior: float, is_pick: bool):
+        self.prior = prior
+        self.is_pick = is_pick  # the move into this node was a selection
+        self.visits = 0.0
+        self.value_sum = 0.0
+        self.children: dict[int, "_Node"] | None = None
+        self.terminal: float | None = None
+
+
+class MCTSBot(BotAI):
+    """
+    A bot that plays with Monte Carlo Tree Search (PUCT).
+
+    Selecting a piece and placing it are separate tree levels, searched on a
+    ``SearchState``. Leaves are valued by rollouts (``rollout``) and the children of a
+    node get priors from ``prior_model`` when given (see ``ModelPriors``), uniform
+    otherwise. ``batch_size`` leaves are collected per step under virtual loss, so the
+    priors of all of them come from one forward pass. Positions where the player to
+    move can win at once, or must hand over a winning piece, are resolved at expansion,
+    and the tree is reused between moves when the new position is in it.
+
+    Once ``endgame_empty`` or fewer cells are empty, the move comes from the exact
+    ``EndgameSolver`` instead.
+
+    With ``workers`` > 1 the search is root-parallel: ``workers - 1`` processes keep
+    their own tree (with their own seed and tree reuse) and search every move with the
+    same budget as this process; the visit counts of the root moves are added up and
+    the most visited move is played. The processes are started on the first move and
+    live until ``close``.
+    """
+
+    def __init__(
+        self,
+        name: str = "MCTSBot",
+        simulations: int | None = 2000,
+        time_budget_ms: float | None = None,
+        c_puct: float = 1.5,
+        rollout: str | Callable[[SearchState, random.Random], float] = "heuristic",
+        prior_model=None,
+        prior_temperature: float = 1.0,
+        batch_size: int = 8,
+        virtual_loss: float = 1.0,
+        reuse_tree: bool = True,
+        endgame_empty: int = ENDGAME_MAX_EMPTY,
+        seed: int | None = None,
+        workers: int = 1,
+        **kwargs,
+    ):
+        """
+        Initializes the MCTSBot.
+        :param name: The name of the bot.
+        :param simulations: Simulations per move. None searches until ``time_budget_ms``.
+        :param time_budget_ms: If given, stop after about this many milliseconds per move (or ``simulations``, the first reached).
+        :param c_puct: Exploration constant of PUCT.
+        :param rollout: "heuristic", "random" or a function ``(state, rng) -> value`` for the player to move.
+        :param prior_model: Model for the priors: an ``NN_abstract``, a ``RuntimeModel`` or the path of a ``.pt``/``.npz``/``.onnx`` file loaded with the torch-free runtime. None for uniform priors.
+        :param prior_temperature: Softmax temperature of the priors.
+        :param batch_size: Leaves evaluated together per step, under virtual loss.
+        :param virtual_loss: Losses added to a path while its leaf waits for evaluation.
+        :param reuse_tree: If True, keep the subtree of the position reached between moves.
+        :param endgame_empty: Positions with this many empty cells or fewer are solved exactly. 0 disables the endgame solver.
+        :param seed: Seed of the rollouts.
+        :param workers: Processes that search each move, each with its own tree (root parallelism).
+        """
+        assert simulations is not None or time_budget_ms is not None, "Provide a simulation or time budget."
+        self.name = name
+        self.simulations = simulations
+        self.time_budget_ms = time_budget_ms
+        self.c_puct = c_puct
+        self.rollout = ROLLOUTS[rollout] if isinstance(rollout, str) else rollout
+        if isinstance(prior_model, str):
+            from quartopy.models.runtime import load_runtime_model
+
+            prior_model = load_runtime_model(prior_model)
+        self.priors = ModelPriors(prior_model, prior_temperature) if prior_model is not None else None
+        self.batch_size = max(1, batch_size)
+        self.virtual_loss = virtual_loss
+        self.reuse_tree = reuse_tree
+        self.endgame = EndgameSolver(endgame_empty) if endgame_empty > 0 else None
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.workers = max(1, workers)
+
+        # Statistics of the last move
+        self.simulations_done = 0
+        self.reused_visits = 0
+
+        self._root: _Node | None = None
+        self._root_state: SearchState | None = None
+        self._workers: SearchWorkers | None = None
+        super().__init__(**kwargs)
+
+    def select(self, game: QuartoGame, ith_option: int = 0, *args, **kwargs) -> Piece:
+        """Selects a piece for the opponent to place."""
+        state = SearchState.from_game(game)
+        state.pick = True
+        best_piece = self.best_move(state)
+        if best_piece is not None:
+            return Piece.from_index(best_piece)
+        return self.rng.choice(game.storage_board.get_valid_pieces())
+
+    def place_piece(
+        self, game: QuartoGame, piece: Piece, ith_option: int = 0, *args, **kwargs
+    ) -> tuple[int, int]:
+        """Places the given piece on the board."""
+        state = SearchState.from_game(game)
+        state.pick = False
+        state.board.selected = piece.index()
+        best_cell = self.best_move(state)
+        if best_cell is not None:
+            return divmod(best_cell, 4)
+        return self.rng.choice(game.game_board.get_valid_moves())
+
+    def best_move(self, state: SearchState) -> int | None:
+        """
+        Best move for ``state``: a piece index when selecting, a cell index when placing.
+        The state is left as it was.
+        """
+        time_budget_ms = self.time_budget_ms
+        n_empty = 16 - state.board.occupied.bit_count()
+        if self.endgame is not None and n_empty <= self.endgame.max_empty:
+            self.simulations_done = 0
+            self.reused_visits = 0
+            # With a budget the solver gets part of it and, if it does not finish, the
+            # tree search gets the rest
+            start = time.perf_counter()
+            solver_deadline = None
+            if time_budget_ms is not None:
+                solver_deadline = start + time_budget_ms * ENDGAME_BUDGET_SHARE / 1000
+            try:
+                _, move = self.endgame.solve_state(state, solver_deadline)
+                self._root = None
+                return move
+            except EndgameTimeout:
+                time_budget_ms -= (time.perf_counter() - start) * 1000
+
+        if self.workers == 1:
+            visits = self._root_visits(state, time_budget_ms)
+        else:
+            if self._workers is None:
+                self._workers = SearchWorkers(self, self.workers - 1)
+            self._workers.broadcast("_worker_search", state, time_budget_ms)
+            visits = self._root_visits(state, time_budget_ms)
+            for worker_visits, simulations, reused in self._workers.gather():
+                self.simulations_done += simulations
+                self.reused_visits += reused
+                for move, n in worker_visits.items():
+                    visits[move] = visits.get(move, 0.0) + n
+
+        if not visits:
+            moves = state.legal_moves()
+            return moves[0] if moves else None
+        return max(visits.items(), key=lambda item: item[1])[0]
+
+    def search_stats(self) -> dict[str, float]:
+        """Simulations of the last move (of all processes) and visits reused from the previous tree."""
+        return {"simulations": self.simulations_done, "reused_visits": self.reused_visits}
+
+    def close(self) -> None:
+        """Stops the worker processes. The bot can still play, and starts new workers
+        if it needs them."""
+        if self._workers is not None:
+            self._workers.close()
+            self._workers = None
+
+    def __getstate__(self):
+        # Processes cannot be pickled and the tree is only useful to this process
+        state = self.__dict__.copy()
+        state["_workers"] = None
+        state["_root"] = None
+        state["_root_state"] = None
+        return state
+
+    # ####################################################################
+    def _root_visits(self, state: SearchState, time_budget_ms: float | None = None) -> dict[int, float]:
+        """Searches ``state``, within ``time_budget_ms`` if given, and returns the visits
+        of the root moves. A winning placement is returned alone; no moves when the
+        position is lost or drawn."""
+        self.simulations_done = 0
+        self.reused_visits = 0
+        root = self._find_subtree(state) if self.reuse_tree else None
+        if root is None:
+            root = _Node(1.0, False)
+        self.reused_visits = int(root.visits)
+        self._search(root, state, time_budget_ms)
+
+        self._root, self._root_state = root, state.copy()
+        if root.terminal is not None and root.terminal > 0 and not state.pick:
+            board = state.board
+            winning = board.winning_cells(board.selected, state.mode_2x2) & ~board.occupied
+            return {(winning & -winning).bit_length() - 1: 1.0}
+        return {move: child.visits for move, child in (root.children or {}).items()}
+
+    def _setup_worker(self, index: int, stop) -> None:
+        """Turns the copy of the bot in a worker process into a worker (see ``SearchWorkers``)."""
+        self.workers = 1
+        self._workers = None
+        self.rng = random.Random(None if self.seed is None else self.seed + index)
+
+    def _worker_search(
+        self, state: SearchState, time_budget_ms: float | None = None
+    ) -> tuple[dict[int, float], int, int]:
+        """Search of a worker process. Returns the root visits, the simulations run and
+        the visits reused from the previous tree."""
+        visits = self._root_visits(state, time_budget_ms)
+        return visits, self.simulations_done, self.reused_visits
+
+    # ####################################################################
+    def _search(self, root: _Node, state: SearchState, time_budget_ms: float | None = None) -> None:
+        """Runs simulations from ``root`` until the budget (``time_budget_ms`` or the
+        bot's own) runs out."""
+        if time_budget_ms is None:
+            time_budget_ms = self.time_budget_ms
+        deadline = None
+        if time_budget_ms is not None:
+            deadline = time.perf_counter() + time_budget_ms / 1000
+
+        if root.children is None and root.terminal is None:
+            self._expand([(root, state)])
+        if root.terminal is not None:
+            return  # decided without search
+
+        while (self.simulations is None or self.simulations_done < self.simulations) and (
+            deadline is None or time.perf_counter() < deadline
+        ):
+            n = self.batch_size
+            if self.simulations is not None:
+                n = min(n, self.simulations - self.simulations_done)
+            self._simulate_batch(root, state, n)
+
+    def _simulate_batch(self, root: _Node, state: SearchState, n: int) -> None:
+        """Descends ``n`` times under virtual loss, evaluates the leaves together and
+        backs their values up."""
+        paths: list[list[_Node]] = []
+        leaves: list[tuple[_Node, SearchState]] = []
+        for _ in range(n):
+            path = [root]
+            node = root
+            while node.children and node.terminal is None:
+                move, node = self._select_child(node)
+                state.make_move(move)
+                path.append(node)
+            for visited in path:
+                visited.visits += self.virtual_loss
+                visited.value_sum -= self.virtual_loss
+            paths.append(path)
+            leaves.append((node, state.copy()))
+            for _ in range(len(path) - 1):
+                state.unmake_move()
+
+        self._expand([(node, leaf) for node, leaf in leaves if node.children is None and node.terminal is None])
+
+        for path, (leaf, leaf_state) in zip(paths, leaves):
+            value = leaf.terminal if leaf.terminal is not None else self.rollout(leaf_state, self.rng)
+            self._backup(path, value)
+        self.simulations_done += n
+
+    def _select_child(self, node: _Node) -> tuple[int, _Node]:
+        """Child with the best PUCT score. Unvisited children count as draws."""
+        sqrt_visits = math.sqrt(node.visits + 1)
+        best_score, best = -math.inf, None
+        for move, child in node.children.items():
+            q = child.value_sum / child.visits if child.visits else 0.0
+            score = q + self.c_puct * child.prior * sqrt_visits / (1 + child.visits)
+            if score > best_score:
+                best_score, best = score, (move, child)
+        return best
+
+    def _backup(self, path: list[_Node], value: float) -> None:
+        """Backs up ``value``, for the player to move at the leaf, removing the virtual loss."""
+        for node in reversed(path):
+            node.visits += 1 - self.virtual_loss
+            node.value_sum += self.virtual_loss
+            if node is path[0]:
+                break
+            # Value for the player who moved into ``node``: a selection hands the turn over
+            value = -value if node.is_pick else value
+            node.value_sum += value
+
+    def _expand(self, leaves: list[tuple[_Node, SearchState]]) -> None:
+        """Creates the children of ``leaves``, or marks them terminal when the result is
+        known: a winning placement is available, or every piece left lets the opponent win."""
+        pending = []
+        for node, state in leaves:
+            if node.children is not None:
+                continue  # same leaf twice in a batch
+            board = state.board
+            if state.pick:
+                if not board.remaining:
+                    node.terminal = 0.0
+                    continue
+                safe = board.remaining & ~board.threat_pieces(state.mode_2x2)
+                if not safe:
+                    node.terminal = -1.0
+                    continue
+                moves = list(iter_bits(safe))
+            else:
+                winning = board.winning_cells(board.selected, state.mode_2x2) & ~board.occupied
+                if winning:
+                    node.terminal = 1.0
+                    continue
+                moves = board.valid_moves()
+            pending.append((node, state, moves))
+
+        if not pending:
+            return
+        priors = self.priors([state for _, state, _ in pending]) if self.priors is not None else None
+        for i, (node, state, moves) in enumerate(pending):
+            if priors is None:
+                p = [1.0 / len(moves)] * len(moves)
+            else:
+                p = priors[i, moves]
+                p = (p / p.sum()).tolist() if p.sum() > 0 else [1.0 / len(moves)] * len(moves)
+            node.children = {move: _Node(prior, state.pick) for move, prior in zip(moves, p)}
+
+    def _find_subtree(self, state: SearchState) -> _Node | None:
+        """Node of the previous tree for ``state``, following only the moves that lead
+        to it, or None."""
+        if self._root is None or self._root_state.mode_2x2 != state.mode_2x2:
+            return None
+        target = state.board
+        frontier = [(self._root, self._root_state)]
+        for _ in range(MAX_REUSE_PLIES + 1):
+            next_frontier = []
+            for node, current in frontier:
+                if current.pick == state.pick and current.board == target:
+                    return node
+                for move, child in (node.children or {}).items():
+                    if current.pick:
+                        consistent = not target.remaining >> move & 1
+                    else:
+                        consistent = target.cells[move] == current.board.selected
+                    if consistent:
+                        after = current.copy()
+                        after.make_move(move)
+                        next_frontier.append((child, after))
+            frontier = next_frontier
+        return None
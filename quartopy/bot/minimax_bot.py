@@ -8,35 +8,152 @@ Python 3
 """
 import copy
 import random
+import threading
+import time
 from quartopy import BotAI, Piece, QuartoGame
+from quartopy.bot.search_workers import SearchWorkers
+from quartopy.game.endgame import (
+    ENDGAME_BUDGET_SHARE,
+    EndgameSolver,
+    EndgameTimeout,
+)
+from quartopy.game.search_state import SearchState
+from quartopy.game.transposition import (
+    SharedTranspositionTable,
+    TranspositionTable,
+    canonical_key,
+    EXACT,
+    LOWER,
+    UPPER,
+)
+
+WIN_SCORE = 100
+MAX_PLY = 32  # 16 placements + 16 selections
+# Nodes between clock (and stop) checks when searching with a time budget. About half
+# a millisecond of search, so budgets are kept to within a millisecond or so and
+# pondering stops as soon as asked
+CHECK_EVERY = 64
+HELPER_MAX_MS = 60_000  # helper processes search until stopped, or this long at most
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the time budget runs out or pondering is stopped."""
+
 
 class MinimaxBot(BotAI):
     """
     A bot that uses the Minimax algorithm with Alpha-Beta pruning to play Quarto.
+
+    The search runs in negamax form on a ``SearchState``: moves are applied and reverted
+    in place with ``make_move``/``unmake_move``, so no game state is ever copied.
+    Values are always from the point of view of the player to move. Placing a piece and
+    then selecting one for the opponent are two plies played by the same player, so the
+    sign only flips after a selection.
+
+    With ``time_budget_ms`` the search deepens iteratively (depth 1, 2, ...) until the
+    budget runs out and plays the best move of the last completed depth. Moves are
+    ordered by transposition-table move, killer moves and history scores; immediate
+    wins are played at once and pieces that hand the opponent a win are never given
+    while a safe piece remains.
+
+    With ``endgame_empty``, once that many or fewer cells are empty the move comes from
+    the exact ``EndgameSolver`` instead.
+
+    With ``ponder`` the bot keeps searching on the opponent's time: after selecting a
+    piece, a background thread predicts the opponent's placement and selection by
+    searching them as this bot would, and then deepens on the resulting position until
+    the bot is asked for its next move. The thread is stopped and joined first, so all
+    the transposition entries it stored are reused; when the prediction was right
+    (``ponder_hit``) the real search starts from the deep pondered tree. Pondering runs
+    on a thread, so it only adds search time when the opponent does not compete for
+    the interpreter (a human, the GUI, a bot in another process or native code).
+
+    With ``workers`` > 1 the search is Lazy SMP: the transposition table lives in
+    shared memory (``SharedTranspositionTable``) and ``workers - 1`` helper processes
+    deepen iteratively on the same position, each with a different move order, while
+    this process runs its usual search. They meet through the table, and the move of
+    the deepest completed search is played. The helpers are started on the first move
+    and live until ``close``.
     """
 
-    def __init__(self, name: str = "MinimaxBot", depth: int = 2, **kwargs):
+    def __init__(
+        self,
+        name: str = "MinimaxBot",
+        depth: int = 2,
+        use_tt: bool = True,
+        tt_size: int = 1 << 18,
+        tt_policy: str = "lru",
+        tt_min_depth: int = 3,
+        time_budget_ms: float | None = None,
+        endgame_empty: int = 0,
+        ponder: bool = False,
+        ponder_max_ms: float = 10_000,
+        workers: int = 1,
+        **kwargs,
+    ):
         """
         Initializes the MinimaxBot.
         :param name: The name of the bot.
         :param depth: The search depth for the Minimax algorithm. A depth of 2 is a good balance of performance and foresight.
+        :param use_tt: If True, searched positions are stored in a transposition table that persists between moves.
+        :param tt_size: Maximum number of entries of the transposition table.
+        :param tt_policy: Eviction policy of the transposition table ("lru", "fifo" or "depth").
+        :param tt_min_depth: Nodes with less remaining depth than this skip the table, since canonicalising them costs more than searching them.
+        :param time_budget_ms: If given, search with iterative deepening for about this many milliseconds per move instead of a fixed ``depth``. Depth 1 always completes.
+        :param endgame_empty: Positions with this many empty cells or fewer are solved exactly. 0, the default, disables the endgame solver. ``endgame.ENDGAME_MAX_EMPTY`` (8) can take up to about a second per move without a ``time_budget_ms``.
+        :param ponder: If True, search the opponent's position in a background thread while it thinks. Needs ``use_tt``, which carries the work over.
+        :param ponder_max_ms: Pondering stops after this many milliseconds even if the bot is not asked to move again (e.g. the game ended).
+        :param workers: Processes that search each move (Lazy SMP). Needs ``use_tt``; the shared table ignores ``tt_policy``, always replacing entries of other positions.
         """
         self.name = name
         self.depth = depth
+        self.workers = max(1, workers) if use_tt else 1
+        if not use_tt:
+            self.tt = None
+        elif self.workers > 1:
+            self.tt = SharedTranspositionTable(tt_size)
+        else:
+            self.tt = TranspositionTable(tt_size, tt_policy)
+        self.tt_min_depth = tt_min_depth
+        self.time_budget_ms = time_budget_ms
+        self.endgame = EndgameSolver(endgame_empty) if endgame_empty > 0 else None
+        self.ponder = ponder and self.tt is not None
+        self.ponder_max_ms = ponder_max_ms
+
+        # Search statistics of the last move and of the last pondering
+        self.nodes = 0
+        self.completed_depth = 0
+        self.ponder_nodes = 0
+        self.ponder_depth = 0
+        self.ponder_hit = False
+
+        self._deadline: float | None = None
+        self._stop = threading.Event()
+        self._ponder_thread: threading.Thread | None = None
+        self._ponder_searcher: "MinimaxBot | None" = None
+        self._ponder_key: int | None = None  # canonical key of the predicted position
+        self._helpers: SearchWorkers | None = None
+        self._order_rng: random.Random | None = None  # perturbs the move order of helpers
+        self._killers: list[list[int | None]] = []
+        self._history: tuple[list[int], list[int]] = ([0] * 16, [0] * 16)
         super().__init__(**kwargs)
 
     def select(self, game: QuartoGame, ith_option: int = 0, *args, **kwargs) -> Piece:
         """
         Selects a piece for the opponent to place. It simulates giving each available piece
         and chooses the one that leads to the best outcome for the bot after the opponent's move.
-        This is a 'minimizing' action from the opponent's perspective.
         """
-        # We want to find the piece that MINIMIZES the opponent's score.
-        eval, best_piece = self._minimax(game, self.depth, float('-inf'), float('inf'), False) # False = Minimizing phase (select piece)
-        
-        if best_piece:
-            return best_piece
-        
+        self.stop_pondering()
+        state = SearchState.from_game(game)
+        state.pick = True
+        best_piece = self._move_search(state)
+
+        if best_piece is not None:
+            if self.ponder:
+                state.make_move(best_piece)  # the opponent places this piece next
+                self._start_pondering(state)
+            return Piece.from_index(best_piece)
+
         # Fallback in case minimax fails, which shouldn't happen in a valid game state.
         valid_pieces = game.storage_board.get_valid_pieces()
         return random.choice(valid_pieces) if valid_pieces else game.storage_board.get_valid_moves()[0]
@@ -48,83 +165,355 @@ class MinimaxBot(BotAI):
         """
         Places the given piece on the board. It simulates placing the piece in all valid
         positions and chooses the one that leads to the best outcome for the bot.
-        This is a 'maximizing' action.
         """
-        # We want to find the position that MAXIMIZES our score.
-        eval, best_move = self._minimax(game, self.depth, float('-inf'), float('inf'), True) # True = Maximizing phase (place piece)
-        
-        if best_move:
-            return best_move
+        self.stop_pondering()
+        state = SearchState.from_game(game)
+        state.pick = False
+        state.board.selected = piece.index()
+        if self._ponder_key is not None:
+            board = state.board
+            key, _ = canonical_key(
+                board.occupied, board.planes, board.remaining, board.selected, False, state.mode_2x2
+            )
+            self.ponder_hit = key == self._ponder_key
+            self._ponder_key = None
+        best_move = self._move_search(state)
+
+        if best_move is not None:
+            return divmod(best_move, 4)
 
         # Fallback
         return random.choice(game.game_board.get_valid_moves())
 
-    def _minimax(self, game_state: QuartoGame, depth: int, alpha: float, beta: float, is_maximizing_player: bool) -> tuple[float, Piece | tuple[int, int] | None]:
+    def best_move(self, state: SearchState) -> int | None:
         """
-        The core Minimax algorithm with Alpha-Beta pruning.
-        - is_maximizing_player: True when placing a piece, False when selecting a piece.
+        Best move for ``state``: a piece index when selecting, a cell index when placing.
+        The state is left as it was. Usable as the search of ``book_from_search``.
         """
-        # --- Base Cases: Game is Over or Depth Limit Reached ---
-        if game_state.game_board.check_win(game_state.mode_2x2)[0]:
-            # If a win is detected, the player who made the LAST move won.
-            # 'is_maximizing_player' is for the CURRENT turn. The winner is the player from the PREVIOUS turn.
-            if is_maximizing_player:
-                # The minimizer (opponent) must have just moved to create this state, which is a win for them.
-                return -100 - depth, None
-            else:
-                # The maximizer (our bot) must have just moved and won.
-                return 100 + depth, None
+        self.stop_pondering()
+        return self._move_search(state)
+
+    def search_stats(self) -> dict[str, float]:
+        """Nodes and completed depth of the last move, and the nodes pondered before it."""
+        stats = {"nodes": self.nodes, "depth": self.completed_depth}
+        if self.ponder:
+            stats["ponder_nodes"] = self.ponder_nodes
+        return stats
+
+    def close(self) -> None:
+        """Stops pondering and the helper processes. The bot can still play, and
+        starts new helpers if it needs them."""
+        self.stop_pondering()
+        if self._helpers is not None:
+            self._helpers.close()
+            self._helpers = None
+
+    # ####################################################################
+    def _move_search(self, state: SearchState) -> int | None:
+        """Search for a move to play: ``_root_search``, with the helper processes when
+        ``workers`` > 1."""
+        n_empty = 16 - state.board.occupied.bit_count()
+        if self.workers == 1 or (self.endgame is not None and n_empty <= self.endgame.max_empty):
+            # Endgames are solved here, or searched here if the solver runs out of time
+            return self._root_search(state)
+
+        if self._helpers is None:
+            self._helpers = SearchWorkers(self, self.workers - 1)
+        self._helpers.broadcast("_helper_search", state, self.time_budget_ms or HELPER_MAX_MS)
+        try:
+            best_move = self._root_search(state)
+        finally:
+            self._helpers.stop.set()
+            results = self._helpers.gather()
+            self._helpers.stop.clear()
+
+        # The deepest completed search decides, this process on ties
+        for move, depth, nodes in results:
+            self.nodes += nodes
+            if move is not None and depth > self.completed_depth:
+                best_move, self.completed_depth = move, depth
+        return best_move
+
+    def _setup_worker(self, index: int, stop) -> None:
+        """Turns the copy of the bot in a helper process into a helper (see ``SearchWorkers``)."""
+        self.workers = 1
+        self.ponder = False
+        self._helpers = None
+        self._stop = stop
+        self._order_rng = random.Random(index)
+
+    def _helper_search(self, state: SearchState, time_budget_ms: float) -> tuple[int | None, int, int]:
+        """Search of a helper process until stopped. Returns the best move, the
+        completed depth and the nodes searched."""
+        move = self._root_search(state, time_budget_ms)
+        return move, self.completed_depth, self.nodes
+
+    # ####################################################################
+    def _start_pondering(self, state: SearchState) -> None:
+        """Ponders ``state``, where the opponent places next, in a background thread
+        until ``stop_pondering``."""
+        n_empty = 16 - state.board.occupied.bit_count()
+        if self.endgame is not None and n_empty - 1 <= self.endgame.max_empty:
+            return  # our next move uses the exact solver, which pondering cannot stop
+
+        # A shallow copy shares the transposition table but keeps its own statistics,
+        # killers and history, so the caller can read those of its last move
+        searcher = copy.copy(self)
+        searcher.ponder = False
+        self._ponder_searcher = searcher
+        self._ponder_thread = threading.Thread(
+            target=searcher._ponder,
+            args=(state,),
+            name=f"{self.name}-ponder",
+            daemon=True,
+        )
+        self._ponder_thread.start()
+
+    def stop_pondering(self) -> None:
+        """Stops the background search, if any, and waits for it to finish."""
+        if self._ponder_thread is None:
+            return
+        searcher = self._ponder_searcher
+        searcher._stop.set()
+        self._ponder_thread.join()
+        self.ponder_nodes = searcher.ponder_nodes
+        self.ponder_depth = searcher.completed_depth
+        self._ponder_key = searcher._ponder_key
+        self._ponder_thread = None
+        self._ponder_searcher = None
+
+    def _ponder(self, state: SearchState) -> None:
+        """Body of the pondering thread, run by a copy of the bot."""
+        deadline = time.perf_counter() + self.ponder_max_ms / 1000
+        self.ponder_nodes = 0
+        self.completed_depth = 0
+        # Predicted reply: the opponent places and then selects
+        for _ in range(2):
+            move = self._root_search(state)
+            self.ponder_nodes += self.nodes
+            if move is None or self._stop.is_set() or state.make_move(move):
+                return  # stopped, or the predicted placement wins
+
+        board = state.board
+        self._ponder_key, _ = canonical_key(
+            board.occupied, board.planes, board.remaining, board.selected, False, state.mode_2x2
+        )
+        remaining_ms = (deadline - time.perf_counter()) * 1000
+        if remaining_ms > 0:
+            self._root_search(state, remaining_ms)
+            self.ponder_nodes += self.nodes
 
-        if game_state.game_board.is_full():
+    def __getstate__(self):
+        # Threads and events cannot be pickled (e.g. to send the bot to a worker process)
+        self.stop_pondering()
+        state = self.__dict__.copy()
+        del state["_stop"], state["_ponder_thread"], state["_ponder_searcher"]
+        state["_ponder_key"] = None
+        state["_helpers"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._stop = threading.Event()
+        self._ponder_thread = None
+        self._ponder_searcher = None
+        self._helpers = None
+
+    # ####################################################################
+    def _root_search(self, state: SearchState, time_budget_ms: float | None = None) -> int | None:
+        """
+        Searches the root position and returns the best move, with a fixed depth or by
+        iterative deepening within ``time_budget_ms`` (by default the bot's own).
+        """
+        if time_budget_ms is None:
+            time_budget_ms = self.time_budget_ms
+        self.nodes = 0
+        self.completed_depth = 0
+        self._deadline = None
+        self._killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        if self._order_rng is None:
+            self._history = ([0] * 16, [0] * 16)
+        else:
+            self._history = tuple([self._order_rng.randrange(64) for _ in range(16)] for _ in range(2))
+
+        start = time.perf_counter()
+        n_empty = 16 - state.board.occupied.bit_count()
+        max_depth = 2 * n_empty if state.pick else 2 * n_empty - 1  # plies left
+
+        if self.endgame is not None and n_empty <= self.endgame.max_empty:
+            # With a budget the solver gets part of it and, if it does not finish, the
+            # iterative deepening below gets the rest
+            solver_deadline = None
+            if time_budget_ms is not None:
+                solver_deadline = start + time_budget_ms * ENDGAME_BUDGET_SHARE / 1000
+            try:
+                _, best_move = self.endgame.solve_state(state, solver_deadline)
+                self.nodes = self.endgame.nodes
+                self.completed_depth = max_depth
+                return best_move
+            except EndgameTimeout:
+                self.nodes = self.endgame.nodes
+
+        if time_budget_ms is None:
+            _, best_move = self._search(state, self.depth, float('-inf'), float('inf'), 0)
+            self.completed_depth = self.depth
+            return best_move
+
+        deadline = start + time_budget_ms / 1000
+
+        best_move = None
+        n_applied = len(state.history)
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self._search(state, depth, float('-inf'), float('inf'), 0)
+            except _SearchTimeout:
+                while len(state.history) > n_applied:
+                    state.unmake_move()
+                break
+
+            best_move = move
+            self.completed_depth = depth
+            if abs(value) >= WIN_SCORE or time.perf_counter() >= deadline:
+                break  # decided, or no time for a deeper iteration
+            self._deadline = deadline  # only depth 1 runs without a clock
+
+        return best_move
+
+    def _search(
+        self, state: SearchState, depth: int, alpha: float, beta: float, ply: int
+    ) -> tuple[float, int | None]:
+        """
+        The core Minimax algorithm with Alpha-Beta pruning, in negamax form.
+        Returns the value for the player to move and the best move (piece index when
+        selecting, cell index when placing).
+        """
+        board = state.board
+
+        self.nodes += 1
+        if (
+            self._deadline is not None
+            and not self.nodes % CHECK_EVERY
+            and (time.perf_counter() > self._deadline or self._stop.is_set())
+        ):
+            raise _SearchTimeout
+
+        # --- Base Cases: Game is Over or Depth Limit Reached ---
+        if state.pick and board.is_full():
             return 0, None  # Draw
 
         if depth == 0:
             return 0, None  # Depth limit reached, neutral score
 
+        # --- Immediate Win / Loss Detection ---
+        if state.pick:
+            # Pieces that can win right away would be played by the opponent
+            poisoned = board.threat_pieces(state.mode_2x2) & board.remaining
+            if poisoned == board.remaining:
+                return -(WIN_SCORE + depth - 1), board.valid_pieces()[0]
+        else:
+            winning = board.winning_cells(board.selected, state.mode_2x2) & ~board.occupied
+            if winning:
+                return WIN_SCORE + depth, (winning & -winning).bit_length() - 1
+
+        # --- Transposition Table Lookup ---
+        tt_key, tt_move, symmetry = None, None, None
+        alpha_orig, beta_orig = alpha, beta
+        if self.tt is not None and depth >= self.tt_min_depth:
+            tt_key, symmetry = canonical_key(
+                board.occupied,
+                board.planes,
+                board.remaining,
+                board.selected,
+                state.pick,
+                state.mode_2x2,
+            )
+            entry = self.tt.probe(tt_key)
+            if entry is not None:
+                if entry.move is not None:
+                    tt_move = self._move_from_tt(entry.move, symmetry, state.pick)
+                if entry.depth >= depth:
+                    if entry.flag == EXACT:
+                        return entry.value, tt_move
+                    elif entry.flag == LOWER:
+                        alpha = max(alpha, entry.value)
+                    else:
+                        beta = min(beta, entry.value)
+                    if beta <= alpha:
+                        return entry.value, tt_move
+
         # --- Recursive Step ---
-        if is_maximizing_player:  # Placing a piece to maximize our score
-            max_eval = float('-inf')
-            best_move = None
-            
-            valid_moves = game_state.game_board.get_valid_moves()
-            for r_g, c_g in valid_moves:
-                new_game_state = copy.deepcopy(game_state)
-                piece_to_place = new_game_state.selected_piece
-                new_game_state.game_board.put_piece(piece_to_place, r_g, c_g)
-
-                # If this move is a winning move, it's the best possible move.
-                if new_game_state.game_board.check_win(new_game_state.mode_2x2)[0]:
-                    return 100 + depth, (r_g, c_g)
-
-                new_game_state.pick = True # Switch to selection phase
-                
-                # Now it's the opponent's turn to select a piece (minimizing phase)
-                eval, _ = self._minimax(new_game_state, depth - 1, alpha, beta, False)
-                if eval > max_eval:
-                    max_eval = eval
-                    best_move = (r_g, c_g)
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break  # Prune
-            return max_eval, best_move
-
-        else:  # Selecting a piece for the opponent to minimize their score
-            min_eval = float('inf')
-            best_piece = None
-
-            possible_pieces = game_state.storage_board.get_valid_pieces()
-            for piece_to_give in possible_pieces:
-                new_game_state = copy.deepcopy(game_state)
-                new_game_state.select_and_remove_piece(piece_to_give)
-                new_game_state.pick = False  # Switch to placing phase
-                new_game_state.turn = not new_game_state.turn  # Opponent's turn to place
-
-                # Now it's the opponent's turn to place a piece (maximizing phase for them)
-                eval, _ = self._minimax(new_game_state, depth - 1, alpha, beta, True)
-                if eval < min_eval:
-                    min_eval = eval
-                    best_piece = piece_to_give
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break  # Prune
-            return min_eval, best_piece
+        moves = state.legal_moves()
+        if state.pick and poisoned:
+            # Giving a poisoned piece loses at once, so only safe pieces are searched
+            moves = [move for move in moves if not poisoned >> move & 1]
+        moves = self._order_moves(moves, state.pick, ply, tt_move)
+
+        best_eval = float('-inf')
+        best_move = None
+        for move in moves:
+            if state.pick:
+                # Selecting a piece: the opponent places it next, so the value flips sign
+                state.make_move(move)
+                eval = -self._search(state, depth - 1, -beta, -alpha, ply + 1)[0]
+                state.unmake_move()
+            else:
+                # Placing a piece: the same player selects next (no placement wins here)
+                state.make_move(move)
+                eval = self._search(state, depth - 1, alpha, beta, ply + 1)[0]
+                state.unmake_move()
+
+            if eval > best_eval:
+                best_eval = eval
+                best_move = move
+            alpha = max(alpha, eval)
+            if beta <= alpha:
+                self._record_cutoff(move, state.pick, ply, depth)
+                break  # Prune
+
+        self._store_tt(tt_key, symmetry, state.pick, depth, best_eval, alpha_orig, beta_orig, best_move)
+        return best_eval, best_move
+
+    def _order_moves(self, moves: list[int], is_pick: bool, ply: int, tt_move: int | None) -> list[int]:
+        """Transposition-table move first, then the killer moves of this ply, then by history score."""
+        history = self._history[is_pick]
+        ordered = sorted(moves, key=history.__getitem__, reverse=True)
+        front = [tt_move, *self._killers[ply]]
+        for move in reversed(front):
+            if move is not None and move in ordered:
+                ordered.remove(move)
+                ordered.insert(0, move)
+        return ordered
+
+    def _record_cutoff(self, move: int, is_pick: bool, ply: int, depth: int) -> None:
+        """Remembers a move that caused a beta cutoff as killer move and in the history scores."""
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self._history[is_pick][move] += depth * depth
+
+    def _store_tt(self, tt_key, symmetry, is_pick, depth, value, alpha_orig, beta_orig, best) -> None:
+        """Stores a searched node, classifying ``value`` against the original alpha-beta window."""
+        if self.tt is None or tt_key is None:
+            return
+        if value <= alpha_orig:
+            flag = UPPER
+        elif value >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+
+        if best is None:
+            move = None
+        elif is_pick:
+            move = symmetry.piece(best)
+        else:
+            move = symmetry.cell(best)
+        self.tt.store(tt_key, depth, value, flag, move)
+
+    @staticmethod
+    def _move_from_tt(move: int, symmetry, is_pick: bool) -> int:
+        """Maps a move stored in canonical coordinates back to the actual position."""
+        if is_pick:
+            return symmetry.piece_inverse(move)
+        return symmetry.cell_inverse(move)
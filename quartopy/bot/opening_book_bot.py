@@ -0,0 +1,84 @@
+"""
+Python 3
+18 / 10 / 2026
+
+Opening book in front of any other bot.
+"""
+from quartopy import BotAI, Piece, QuartoGame, logger
+from quartopy.game.opening_book import OpeningBook
+from quartopy.models import load_bot_class
+
+
+class OpeningBookBot(BotAI):
+    """
+    Plays from an ``OpeningBook`` while the position is in it and delegates to the
+    wrapped bot otherwise, or when the book move has already been rejected
+    (``ith_option > 0``).
+
+    A book lookup costs one canonicalisation and a binary search, so the first moves of
+    a game, where search-based bots are slowest, are played almost instantly.
+    """
+
+    def __init__(
+        self,
+        book_path: str,
+        bot: BotAI | str,
+        bot_params: dict | None = None,
+        name: str | None = None,
+        **kwargs,
+    ):
+        """
+        Args:
+            book_path: Path of a book written with ``OpeningBook.write``.
+            bot: Bot to fall back on, or the path of a bot script for ``load_bot_class``.
+            bot_params: Parameters for the bot when ``bot`` is a script path.
+            name: Name of the bot. Defaults to the name of the wrapped bot.
+        """
+        if isinstance(bot, str):
+            bot = load_bot_class(bot)(**(bot_params or {}))
+        self.bot = bot
+        self.book = OpeningBook(book_path)
+        self.name = name or f"{getattr(bot, 'name', type(bot).__name__)}+book"
+
+        # Moves of the current process played from the book and delegated to the bot
+        self.book_hits = 0
+        self.book_misses = 0
+        self._last_hit = False
+        logger.debug(f"OpeningBookBot loaded {len(self.book)} positions from {book_path}")
+
+    def select(self, game: QuartoGame, ith_option: int = 0, *args, **kwargs) -> Piece:
+        if ith_option == 0:
+            move = self.book.probe(game)
+            if move is not None:
+                self.book_hits += 1
+                self._last_hit = True
+                return Piece.from_index(move)
+        self.book_misses += 1
+        self._last_hit = False
+        return self.bot.select(game, ith_option, *args, **kwargs)
+
+    def place_piece(
+        self, game: QuartoGame, piece: Piece, ith_option: int = 0, *args, **kwargs
+    ) -> tuple[int, int]:
+        if ith_option == 0:
+            move = self.book.probe(game)
+            if move is not None:
+                self.book_hits += 1
+                self._last_hit = True
+                return divmod(move, 4)
+        self.book_misses += 1
+        self._last_hit = False
+        return self.bot.place_piece(game, piece, ith_option, *args, **kwargs)
+
+    def search_stats(self) -> dict[str, float]:
+        """``book_hit`` and, when the move came from the wrapped bot, its counters."""
+        if self._last_hit:
+            return {"book_hit": 1}
+        return {"book_hit": 0, **self.bot.search_stats()}
+
+    def batch_stats(self) -> dict[str, float]:
+        return self.bot.batch_stats()
+
+    def prepare_batch(self, games: list[QuartoGame]):
+        self._last_hit = False
+        self.bot.prepare_batch([game for game in games if self.book.probe(game) is None])
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""
+runtime_bot - CNN bot on the lightweight inference runtime, without torch
+"""
+
+import weakref
+
+import numpy as np
+
+from quartopy import BotAI, Piece, QuartoGame, logger
+from quartopy.game.endgame import EndgameSolver
+from quartopy.models.runtime import RuntimeModel, load_runtime_model
+
+
+class RuntimeBot(BotAI):
+    """
+    Plays like ``CNNBot`` with the same ``.pt`` checkpoints, or a model exported by
+    ``NN_abstract.export_numpy`` (``.npz``) or ``NN_abstract.export_onnx`` (``.onnx``),
+    so neither torch nor tensordict are imported.
+    """
+
+    def __init__(
+        self,
+        name: str = "Runtime_bot",
+        *,
+        model_path: str | None = None,
+        model: RuntimeModel | None = None,
+        deterministic: bool = True,
+        temperature: float = 0.1,
+        endgame_empty: int = 0,
+        seed: int | None = None,
+    ):
+        """
+        Initializes the bot.
+        ## Parameters
+        ``name``: str
+            Name of the bot.
+        ``model_path``: str | None
+            Path of a ``.pt`` checkpoint or an exported ``.npz`` or ``.onnx`` model.
+        ``model``: RuntimeModel | None
+            An already loaded runtime model. Cannot be used together with ``model_path``.
+        ``deterministic``, ``temperature``, ``endgame_empty``
+            As in ``CNNBot``.
+        ``seed``: int | None
+            Seed of the sampling when ``deterministic`` is False.
+        """
+        assert (model_path is None) != (model is None), "Provide either ``model_path`` or ``model``."
+        self.model = model if model is not None else load_runtime_model(model_path)  # type: ignore
+        self.name = f"{name}|{self.model.name}"
+        self.DETERMINISTIC = deterministic
+        self.TEMPERATURE = temperature
+        self.rng = np.random.default_rng(seed)
+        self.endgame = EndgameSolver(endgame_empty) if endgame_empty > 0 else None
+        self.forward_passes = 0  # in the last call, see ``search_stats``
+
+        # Per game: (len(move_history) when predicted, board indices, piece indices),
+        # reused for the selection that follows each placement
+        self._cache: weakref.WeakKeyDictionary[QuartoGame, tuple[int, np.ndarray, np.ndarray]] = (
+            weakref.WeakKeyDictionary()
+        )
+        logger.debug(f"RuntimeBot initialized with model {self.model.name}")
+
+    # ####################################################################
+    def _is_cached(self, game: QuartoGame) -> bool:
+        cached = self._cache.get(game)
+        if cached is None:
+            return False
+        n_moves = len(game.move_history)
+        return cached[0] == n_moves or (game.pick and cached[0] == n_moves - 1)
+
+    def prepare_batch(self, games: list[QuartoGame]):
+        """Predicts with a single forward pass the moves of the games not cached yet."""
+        stale = [game for game in games if not self._is_cached(game)]
+        self.forward_passes = int(bool(stale))
+        if not stale:
+            return
+        board_indices, piece_indices = self.model.predict_games(
+            stale, self.TEMPERATURE, self.DETERMINISTIC, self.rng
+        )
+        for i, game in enumerate(stale):
+            self._cache[game] = (len(game.move_history), board_indices[i], piece_indices[i])
+
+    def calculate(self, game: QuartoGame, ith_try: int = 0) -> tuple[tuple[int, int], Piece]:
+        """``ith_try`` preferred board position and piece. Legal options come first."""
+        self.forward_passes = 0
+        if not self._is_cached(game):
+            self.prepare_batch([game])
+        _, board_indices, piece_indices = self._cache[game]
+        return divmod(int(board_indices[ith_try]), 4), Piece.from_index(int(piece_indices[ith_try]))
+
+    def search_stats(self) -> dict[str, float]:
+        """Forward passes run by the last call: 0 when the move was predicted by an
+        earlier ``prepare_batch`` or comes from the endgame solver."""
+        return {"forward_passes": self.forward_passes}
+
+    def batch_stats(self) -> dict[str, float]:
+        """Forward passes run by the last ``prepare_batch``: 0 or 1."""
+        return {"forward_passes": self.forward_passes}
+
+    def select(self, game: QuartoGame, ith_option: int = 0, *args, **kwargs) -> Piece:
+        """Selects a piece for the other player."""
+        self.forward_passes = 0
+        if self.endgame is not None and self.endgame.can_solve(game):
+            _, idx_piece = self.endgame.solve(game)
+            return Piece.from_index(idx_piece)
+        _, selected_piece = self.calculate(game, ith_option)
+        return selected_piece
+
+    def place_piece(
+        self, game: QuartoGame, piece: Piece, ith_option: int = 0, *args, **kwargs
+    ) -> tuple[int, int]:
+        """Places the selected piece on the game board."""
+        self.forward_passes = 0
+        if self.endgame is not None and self.endgame.can_solve(game):
+            _, idx_cell = self.endgame.solve(game)
+            return divmod(idx_cell, 4)
+        board_position, _ = self.calculate(game, ith_option)
+        return board_position
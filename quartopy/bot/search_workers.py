@@ -0,0 +1,103 @@
+"""
+Worker processes for the multi-core search modes of ``MinimaxBot`` and ``MCTSBot``.
+"""
+import multiprocessing
+import traceback
+import weakref
+
+
+class _WorkerError:
+    """Sent back instead of a result when a worker call raises."""
+
+    def __init__(self, trace: str):
+        self.trace = trace
+
+
+def _worker_main(conn, bot, index: int, stop) -> None:
+    """Loop of a worker process: runs the ``(method, args)`` calls it receives on its
+    copy of ``bot`` and sends back the results, until it receives None."""
+    bot._setup_worker(index, stop)
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        method, args = request
+        try:
+            result = getattr(bot, method)(*args)
+        except Exception:
+            result = _WorkerError(traceback.format_exc())
+        conn.send(result)
+
+
+def _shutdown(conns: list, processes: list) -> None:
+    """Asks the workers to exit and waits for them."""
+    for conn in conns:
+        try:
+            conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for conn in conns:
+        conn.close()
+
+
+class SearchWorkers:
+    """
+    Processes that each keep their own copy of a bot between moves, so per-process
+    state (a search tree, killer moves...) survives from one call to the next.
+
+    Every worker calls ``bot._setup_worker(index, stop)`` once when it starts, with
+    ``index`` from 1 to ``n`` (the calling process is worker 0) and ``stop``, an event
+    shared by all of them that the owner sets to cut their searches short.
+    """
+
+    def __init__(self, bot, n: int):
+        """
+        :param bot: The bot to copy into every worker. It is pickled unless the processes are forked.
+        :param n: Number of worker processes.
+        """
+        ctx = multiprocessing.get_context()
+        self.stop = ctx.Event()
+        self._conns = []
+        self._processes = []
+        for index in range(1, n + 1):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker_main,
+                args=(child_conn, bot, index, self.stop),
+                name=f"{bot.name}-worker{index}",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        self._finalizer = weakref.finalize(self, _shutdown, self._conns, self._processes)
+
+    def __len__(self):
+        return len(self._processes)
+
+    def broadcast(self, method: str, *args) -> None:
+        """Starts ``method(*args)`` on every worker without waiting for it."""
+        for conn in self._conns:
+            conn.send((method, args))
+
+    def gather(self) -> list:
+        """Waits for the call started by ``broadcast`` and returns the result of every
+        worker. Raises RuntimeError if any of them failed."""
+        results = [conn.recv() for conn in self._conns]
+        for result in results:
+            if isinstance(result, _WorkerError):
+                raise RuntimeError(f"Search worker failed:\n{result.trace}")
+        return results
+
+    def close(self) -> None:
+        """Asks the workers to exit and waits for them. Also done when the object is
+        garbage collected."""
+        self._finalizer()
@@ -1,4 +1,34 @@
-from . import board
-from . import piece
-from . import play
-from . import quarto_game
\ No newline at end of file
+import importlib
+
+# Los submódulos se cargan al usarse: varios dependen de numpy, tqdm o de tablas que
+# se construyen al importarlos, y cada proceso de un torneo solo necesita unos pocos
+_SUBMODULES = (
+    "augmentation",
+    "bitboard",
+    "board",
+    "endgame",
+    "latency",
+    "lines",
+    "match_archive",
+    "opening_book",
+    "piece",
+    "play",
+    "position_index",
+    "quarto_game",
+    "search_state",
+    "symmetry",
+    "transposition",
+    "vector_env",
+)
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
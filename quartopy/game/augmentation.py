@@ -0,0 +1,232 @@
+"""Simetrías vectorizadas para lotes de posiciones codificadas.
+
+Aplica las simetrías de ``quartopy.game.symmetry`` a lotes completos, sin bucles de
+Python por muestra, mediante tablas de permutación precalculadas:
+
+* ``b``: índice de una permutación de celdas en ``board_symmetries(mode_2x2)``.
+* ``t``: índice de un reetiquetado de atributos en ``PIECE_PERMUTATIONS``
+  (``t = order_index * 16 + flip``, con ``order_index`` el índice en
+  ``ATTRIBUTE_PERMUTATIONS``).
+
+La simetría ``(b, t)`` lleva la celda ``c`` a ``CELL_PERMUTATIONS[b, c]`` y la pieza
+``p`` a ``PIECE_PERMUTATIONS[t, p]``, igual que ``Symmetry.cell``/``Symmetry.piece``.
+
+Los tableros usan la codificación de ``Board.encode`` (N, 16, 4, 4), las piezas
+seleccionadas un one-hot (N, 16) y las acciones índices de celda o pieza (-1 si no
+hay acción).
+"""
+
+import numpy as np
+
+from .bitboard import ATTRIBUTE_PIECES, FULL_MASK, N_ATTRIBUTES, N_CELLS, N_PIECES, PIECE_ATTRIBUTES
+from .symmetry import ATTRIBUTE_PERMUTATIONS, BOARD_SYMMETRIES, BOARD_SYMMETRIES_2X2, PIECE_MAPS
+
+
+def _inverse(table: np.ndarray) -> np.ndarray:
+    return np.argsort(table, axis=1)
+
+
+CELL_PERMUTATIONS = np.array(BOARD_SYMMETRIES, dtype=np.int64)  # (32, 16)
+CELL_PERMUTATIONS_2X2 = np.array(BOARD_SYMMETRIES_2X2, dtype=np.int64)  # (8, 16)
+CELL_INVERSES = _inverse(CELL_PERMUTATIONS)
+CELL_INVERSES_2X2 = _inverse(CELL_PERMUTATIONS_2X2)
+
+PIECE_PERMUTATIONS = np.array(
+    [PIECE_MAPS[(order, flip)] for order in ATTRIBUTE_PERMUTATIONS for flip in range(16)],
+    dtype=np.int64,
+)  # (384, 16)
+PIECE_INVERSES = _inverse(PIECE_PERMUTATIONS)
+N_PIECE_SYMMETRIES = len(PIECE_PERMUTATIONS)
+
+# Índice en ATTRIBUTE_PERMUTATIONS a partir de order[0]*64 + order[1]*16 + order[2]*4 + order[3]
+_ORDER_INDEX = np.zeros(4**N_ATTRIBUTES, dtype=np.int64)
+for _i, _order in enumerate(ATTRIBUTE_PERMUTATIONS):
+    _ORDER_INDEX[sum(a << (2 * (3 - k)) for k, a in enumerate(_order))] = _i
+
+_BIT_WEIGHTS = 1 << np.arange(N_CELLS, dtype=np.int64)
+_ATTRIBUTE_MASKS = np.array(ATTRIBUTE_PIECES, dtype=np.int64)
+
+
+def cell_tables(mode_2x2: bool = False) -> tuple[np.ndarray, np.ndarray]:
+    """Permutaciones de celdas del modo y sus inversas."""
+    if mode_2x2:
+        return CELL_PERMUTATIONS_2X2, CELL_INVERSES_2X2
+    return CELL_PERMUTATIONS, CELL_INVERSES
+
+
+def random_symmetries(
+    n: int, mode_2x2: bool = False, rng: np.random.Generator | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """``n`` simetrías ``(b, t)`` al azar."""
+    rng = rng or np.random.default_rng()
+    perms, _ = cell_tables(mode_2x2)
+    return rng.integers(len(perms), size=n), rng.integers(N_PIECE_SYMMETRIES, size=n)
+
+
+# ####################################################################
+def transform_boards(boards: np.ndarray, b, t, mode_2x2: bool = False) -> np.ndarray:
+    """Aplica la simetría ``(b[i], t[i])`` al tablero ``boards[i]`` (N, 16, 4, 4)."""
+    n = boards.shape[0]
+    _, inverses = cell_tables(mode_2x2)
+    inv_cells = inverses[np.broadcast_to(b, (n,))]  # (N, 16)
+    inv_pieces = PIECE_INVERSES[np.broadcast_to(t, (n,))]  # (N, 16)
+    flat = boards.reshape(n, N_PIECES, N_CELLS)
+    out = flat[np.arange(n)[:, None, None], inv_pieces[:, :, None], inv_cells[:, None, :]]
+    return out.reshape(boards.shape)
+
+
+def transform_pieces(pieces: np.ndarray, t) -> np.ndarray:
+    """Aplica el reetiquetado ``t[i]`` al one-hot ``pieces[i]`` (N, 16)."""
+    n = pieces.shape[0]
+    inv_pieces = PIECE_INVERSES[np.broadcast_to(t, (n,))]
+    return pieces[np.arange(n)[:, None], inv_pieces]
+
+
+def transform_cell_actions(cells: np.ndarray, b, mode_2x2: bool = False) -> np.ndarray:
+    """Índices de celda (N,) bajo las permutaciones ``b``. Los -1 se conservan."""
+    cells = np.asarray(cells)
+    perms, _ = cell_tables(mode_2x2)
+    moved = perms[np.broadcast_to(b, cells.shape), cells.clip(0)]
+    return np.where(cells < 0, cells, moved)
+
+
+def transform_piece_actions(pieces: np.ndarray, t) -> np.ndarray:
+    """Índices de pieza (N,) bajo los reetiquetados ``t``. Los -1 se conservan."""
+    pieces = np.asarray(pieces)
+    moved = PIECE_PERMUTATIONS[np.broadcast_to(t, pieces.shape), pieces.clip(0)]
+    return np.where(pieces < 0, pieces, moved)
+
+
+def augment(
+    boards: np.ndarray,
+    pieces: np.ndarray,
+    action_place: np.ndarray,
+    action_sel: np.ndarray,
+    copies: int = 1,
+    mode_2x2: bool = False,
+    rng: np.random.Generator | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Repite cada muestra ``copies`` veces, cada una con una simetría al azar.
+
+    ## Parameters
+    ``boards``: (N, 16, 4, 4), ``pieces``: (N, 16), ``action_place`` y ``action_sel``: (N,)
+
+    ## Return
+    Los cuatro arreglos transformados, con ``N * copies`` muestras.
+    """
+    if copies > 1:
+        boards, pieces, action_place, action_sel = (
+            np.repeat(x, copies, axis=0) for x in (boards, pieces, action_place, action_sel)
+        )
+    b, t = random_symmetries(boards.shape[0], mode_2x2, rng)
+    return (
+        transform_boards(boards, b, t, mode_2x2),
+        transform_pieces(pieces, t),
+        transform_cell_actions(action_place, b, mode_2x2),
+        transform_piece_actions(action_sel, t),
+    )
+
+
+# ####################################################################
+def _popcount(x: np.ndarray) -> np.ndarray:
+    return ((x[..., None] >> np.arange(N_CELLS)) & 1).sum(-1)
+
+
+def _pack(bits: np.ndarray) -> np.ndarray:
+    """Bits (..., 16) -> máscara entera (...)."""
+    return bits.astype(np.int64) @ _BIT_WEIGHTS
+
+
+def canonical_keys(
+    boards: np.ndarray, pieces: np.ndarray, mode_2x2: bool = False
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Versión vectorizada de ``canonical_form``.
+
+    Las piezas disponibles son las que no están en el tablero ni seleccionadas.
+
+    ## Parameters
+    ``boards``: (N, 16, 4, 4) y ``pieces``: (N, 16) one-hot de la pieza seleccionada
+    (ceros si no hay).
+
+    ## Return
+    * ``keys``: np.ndarray int64 (N, 7), la tupla ``(occupied, plane0..plane3,
+      remaining, selected)`` de ``canonical_form`` para cada muestra.
+    * ``b``, ``t``: simetrías (N,) que llevan cada muestra a su forma canónica.
+    """
+    n = boards.shape[0]
+    _, inverses = cell_tables(mode_2x2)
+    flat = boards.reshape(n, N_PIECES, N_CELLS).astype(bool)
+    occ_cells = flat.any(axis=1)  # (N, 16)
+    cell_piece = flat.argmax(axis=1)  # (N, 16)
+    attr_cells = PIECE_ATTRIBUTES[cell_piece].astype(bool) & occ_cells[..., None]  # (N, 16, 4)
+
+    has_selected = pieces.any(axis=1)
+    selected = np.where(has_selected, pieces.argmax(axis=1), -1)
+    remaining = FULL_MASK ^ (_pack(flat.any(axis=2)) | np.where(has_selected, 1 << selected.clip(0), 0))
+
+    # --- Permutaciones de tablero que minimizan ``occupied``
+    occ_b = _pack(occ_cells[:, inverses])  # (N, S)
+    occ = occ_b.min(axis=1)
+    candidate = occ_b == occ[:, None]
+
+    planes_b = _pack(attr_cells.transpose(0, 2, 1)[:, :, inverses])  # (N, 4, S)
+    planes_b = planes_b.transpose(0, 2, 1)  # (N, S, 4)
+
+    # --- Complementos: la pieza de la primera celda ocupada (o la seleccionada) pasa a 0000
+    ref = occ & -occ
+    if_board = (planes_b & ref[:, None, None]) != 0
+    if_selected = PIECE_ATTRIBUTES[selected.clip(0)].astype(bool)[:, None, :] & has_selected[:, None, None]
+    flip = np.where((occ != 0)[:, None, None], if_board, if_selected)  # (N, S, 4)
+    planes_b = np.where(flip, planes_b ^ occ[:, None, None], planes_b)
+
+    # --- Orden de atributos por (plano, piezas disponibles con el atributo, atributo)
+    rem_counts = _popcount(remaining[:, None] & _ATTRIBUTE_MASKS)  # (N, 4)
+    n_remaining = _popcount(remaining)
+    counts = np.where(flip, n_remaining[:, None, None] - rem_counts[:, None, :], rem_counts[:, None, :])
+    sort_keys = np.sort((planes_b << 8) | (counts << 2) | np.arange(N_ATTRIBUTES), axis=2)
+    order = sort_keys & 3
+    sorted_planes = sort_keys >> 8
+
+    packed = np.zeros(sorted_planes.shape[:2], dtype=np.uint64)
+    for a in range(N_ATTRIBUTES):
+        packed = (packed << np.uint64(16)) | sorted_planes[..., a].astype(np.uint64)
+    packed[~candidate] = np.iinfo(np.uint64).max
+    tied = packed == packed.min(axis=1, keepdims=True)
+
+    flip_mask = (flip.astype(np.int64) << np.arange(N_ATTRIBUTES)).sum(axis=2)
+    order_code = (order << (2 * np.arange(N_ATTRIBUTES - 1, -1, -1))).sum(axis=2)
+    t_all = _ORDER_INDEX[order_code] * 16 + flip_mask  # (N, S)
+
+    # --- Desempate por (piezas disponibles, pieza seleccionada) transformadas
+    maps = PIECE_PERMUTATIONS[t_all]  # (N, S, 16)
+    rem_bits = (remaining[:, None] >> np.arange(N_PIECES)) & 1  # (N, 16)
+    new_remaining = (rem_bits[:, None, :] << maps).sum(axis=2)
+    new_selected = np.where(
+        has_selected[:, None],
+        np.take_along_axis(maps, selected.clip(0)[:, None, None], axis=2)[..., 0],
+        -1,
+    )
+    rest = new_remaining * 32 + new_selected + 1
+    rest[~tied] = np.iinfo(np.int64).max
+    b = rest.argmin(axis=1)
+
+    rows = np.arange(n)
+    keys = np.empty((n, 7), dtype=np.int64)
+    keys[:, 0] = occ
+    keys[:, 1:5] = sorted_planes[rows, b]
+    keys[:, 5] = new_remaining[rows, b]
+    keys[:, 6] = new_selected[rows, b]
+    return keys, b, t_all[rows, b]
+
+
+def canonicalize(
+    boards: np.ndarray, pieces: np.ndarray, mode_2x2: bool = False
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Lleva cada muestra a su forma canónica.
+
+    ## Return
+    * ``boards``, ``pieces``: muestras canónicas, mismas formas que la entrada.
+    * ``b``, ``t``: simetrías aplicadas, para transformar también las acciones.
+    """
+    _, b, t = canonical_keys(boards, pieces, mode_2x2)
+    return transform_boards(boards, b, t, mode_2x2), transform_pieces(pieces, t), b, t
@@ -0,0 +1,216 @@
+"""Representación compacta (bitboard) del estado de una partida de Quarto.
+
+Las celdas del tablero se numeran en orden fila-mayor (``index = row * cols + col``)
+y las piezas por su ``Piece.index()``. El bit ``i`` de cada máscara de 16 bits
+corresponde a la celda (o pieza) ``i``.
+
+* ``occupied``: celdas ocupadas del tablero de juego.
+* ``planes``: un plano por atributo (tamaño, color, forma, agujero), con el bit
+  encendido cuando la pieza de esa celda tiene el atributo en 1 (ver ``Piece.vectorize``).
+* ``remaining``: piezas que aún están en el ``storage_board``.
+"""
+
+import numpy as np
+
+from .lines import LINES, LINES_2X2, is_winning_line, winning_line
+
+N_CELLS = 16
+N_PIECES = 16
+N_ATTRIBUTES = 4
+FULL_MASK = (1 << N_CELLS) - 1
+EMPTY = -1
+
+
+# ####################################################################
+def piece_attribute(piece_idx: int, attribute: int) -> int:
+    """Retorna el valor (0 o 1) del ``attribute`` de la pieza ``piece_idx``.
+    El orden de los atributos es el de ``Piece.vectorize``: tamaño, color, forma y agujero.
+    """
+    return (piece_idx >> (N_ATTRIBUTES - 1 - attribute)) & 1
+
+
+# Máscara de las piezas (por índice) que tienen el atributo ``a`` en 1
+ATTRIBUTE_PIECES: tuple[int, ...] = tuple(
+    sum(1 << p for p in range(N_PIECES) if piece_attribute(p, a))
+    for a in range(N_ATTRIBUTES)
+)
+
+
+# Atributos de cada pieza (16, 4), para las operaciones vectorizadas
+PIECE_ATTRIBUTES = np.array(
+    [[piece_attribute(p, a) for a in range(N_ATTRIBUTES)] for p in range(N_PIECES)],
+    dtype=np.int8,
+)
+
+
+def iter_bits(mask: int):
+    """Itera los índices de los bits encendidos de ``mask`` en orden ascendente."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask: int) -> int:
+    """Número de bits encendidos de ``mask``."""
+    return mask.bit_count()
+
+
+class BitBoard:
+    """Estado de juego empaquetado en enteros.
+
+    Las operaciones de generación de movimientos y consulta se reducen a operaciones
+    de bits sobre las máscaras. ``cells`` guarda el índice de pieza de cada celda
+    (``EMPTY`` si está vacía) para poder reconstruir el tablero.
+    """
+
+    __slots__ = ("occupied", "planes", "remaining", "cells", "selected")
+
+    def __init__(
+        self,
+        occupied: int = 0,
+        planes: list[int] | None = None,
+        remaining: int = FULL_MASK,
+        cells: list[int] | None = None,
+        selected: int = EMPTY,
+    ):
+        self.occupied = occupied
+        self.planes = planes if planes is not None else [0] * N_ATTRIBUTES
+        self.remaining = remaining
+        self.cells = cells if cells is not None else [EMPTY] * N_CELLS
+        self.selected = selected  # índice de la pieza seleccionada, EMPTY si no hay
+
+    # ####################################################################
+    @classmethod
+    def from_game(cls, game) -> "BitBoard":
+        """Construye el bitboard a partir de un ``QuartoGame``."""
+        selected = game.selected_piece
+        return cls(
+            occupied=game.game_board.occupancy,
+            planes=list(game.game_board.planes),
+            remaining=game.storage_board.occupancy,
+            cells=list(game.game_board.cell_pieces),
+            selected=selected.index() if selected else EMPTY,
+        )
+
+    def copy(self) -> "BitBoard":
+        return BitBoard(
+            self.occupied,
+            list(self.planes),
+            self.remaining,
+            list(self.cells),
+            self.selected,
+        )
+
+    # ####################################################################
+    def place(self, cell: int, piece_idx: int):
+        """Coloca la pieza ``piece_idx`` en la celda ``cell``. Se asume vacía."""
+        bit = 1 << cell
+        self.occupied |= bit
+        for a in range(N_ATTRIBUTES):
+            if piece_attribute(piece_idx, a):
+                self.planes[a] |= bit
+        self.cells[cell] = piece_idx
+
+    def unplace(self, cell: int):
+        """Retira la pieza de la celda ``cell``. Operación inversa de ``place``."""
+        bit = 1 << cell
+        self.occupied &= ~bit
+        for a in range(N_ATTRIBUTES):
+            self.planes[a] &= ~bit
+        self.cells[cell] = EMPTY
+
+    def take(self, piece_idx: int):
+        """Retira la pieza ``piece_idx`` de las piezas disponibles y la deja seleccionada."""
+        self.remaining &= ~(1 << piece_idx)
+        self.selected = piece_idx
+
+    def untake(self, piece_idx: int):
+        """Devuelve la pieza ``piece_idx`` a las piezas disponibles. Inversa de ``take``."""
+        self.remaining |= 1 << piece_idx
+        self.selected = EMPTY
+
+    # ####################################################################
+    @property
+    def empty(self) -> int:
+        """Máscara de celdas vacías."""
+        return ~self.occupied & FULL_MASK
+
+    def is_full(self) -> bool:
+        return self.occupied == FULL_MASK
+
+    def valid_moves(self) -> list[int]:
+        """Índices de las celdas vacías."""
+        return list(iter_bits(self.empty))
+
+    def valid_pieces(self) -> list[int]:
+        """Índices de las piezas disponibles."""
+        return list(iter_bits(self.remaining))
+
+    def is_winning_line(self, line: int) -> bool:
+        """True si la línea (máscara de celdas) está completa y todas sus piezas
+        comparten al menos un atributo."""
+        return is_winning_line(self.occupied, self.planes, line)
+
+    def winning_line(self, cell: int, mode_2x2: bool = False) -> int:
+        """Máscara de la línea ganadora que pasa por ``cell`` (0 si no hay)."""
+        return winning_line(self.occupied, self.planes, cell, mode_2x2)
+
+    def threats(self, mode_2x2: bool = False) -> list[tuple[int, int]]:
+        """Líneas a las que les falta una sola pieza para ganar.
+
+        ## Return
+        Lista de ``(cell, pieces)``: ``cell`` es la celda vacía de la línea y ``pieces``
+        la máscara de piezas que ganan al colocarse en ella.
+        """
+        occupied = self.occupied
+        found = []
+        for line in LINES_2X2 if mode_2x2 else LINES:
+            free = line & ~occupied
+            if not free or free & (free - 1):
+                continue  # llena o con más de una celda vacía
+            filled = line ^ free
+            pieces = 0
+            for a, plane in enumerate(self.planes):
+                common = plane & filled
+                if common == filled:
+                    pieces |= ATTRIBUTE_PIECES[a]
+                elif not common:
+                    pieces |= ~ATTRIBUTE_PIECES[a] & FULL_MASK
+            if pieces:
+                found.append((free.bit_length() - 1, pieces))
+        return found
+
+    def threat_pieces(self, mode_2x2: bool = False) -> int:
+        """Máscara de piezas que ganarían si se colocaran ahora en alguna celda."""
+        pieces = 0
+        for _, mask in self.threats(mode_2x2):
+            pieces |= mask
+        return pieces
+
+    def winning_cells(self, piece_idx: int, mode_2x2: bool = False) -> int:
+        """Máscara de celdas donde colocar ``piece_idx`` gana."""
+        cells = 0
+        for cell, pieces in self.threats(mode_2x2):
+            if pieces >> piece_idx & 1:
+                cells |= 1 << cell
+        return cells
+
+    # ####################################################################
+    def key(self) -> tuple[int, int, int, int, int, int, int]:
+        """Tupla hashable que identifica el estado."""
+        return (self.occupied, *self.planes, self.remaining, self.selected)
+
+    def __eq__(self, other):
+        if not isinstance(other, BitBoard):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return (
+            f"BitBoard(occupied={self.occupied:016b}, remaining={self.remaining:016b}, "
+            f"selected={self.selected})"
+        )
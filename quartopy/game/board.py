@@ -1,9 +1,47 @@
 from .piece import Piece
 from .piece import Coloration, Shape, Size, Hole
+from .bitboard import N_ATTRIBUTES, N_PIECES, EMPTY, BitBoard, iter_bits, piece_attribute
+from .lines import LINES, is_winning_line, winning_line, mask2coords
 
 import numpy as np
 from colorama import Fore, Style, Back
 
+# Atributos (tamaño, color, forma, agujero) de cada pieza, como ``Piece.vectorize``
+_PIECE_VECTORS = np.array(
+    [[piece_attribute(p, a) for a in range(N_ATTRIBUTES)] for p in range(N_PIECES)],
+    dtype=float,
+)
+
+
+def _cell_pieces(boards: list) -> np.ndarray:
+    """Índices de pieza por celda (N, rows*cols) de ``Board`` o ``BitBoard``, -1 si está vacía."""
+    return np.array(
+        [b.cells if isinstance(b, BitBoard) else b.cell_pieces for b in boards],
+        dtype=np.int8,
+    )
+
+
+def encode_cell_pieces(
+    cell_pieces: np.ndarray, rows: int = 4, cols: int = 4, out: np.ndarray | None = None
+) -> np.ndarray:
+    """Codificación de ``Board.encode`` para varios tableros, por indexado vectorizado.
+
+    ## Parameters
+    ``cell_pieces``: np.ndarray (N, rows*cols) índice de pieza por celda, -1 si está vacía.
+    ``out``: np.ndarray (N, 16, rows, cols) opcional donde escribir, de cualquier tipo.
+
+    ## Return
+    ``out`` o un nuevo np.ndarray bool (N, 16, rows, cols).
+    """
+    n = cell_pieces.shape[0]
+    if out is None:
+        out = np.zeros((n, N_PIECES, rows, cols), dtype=bool)
+    else:
+        out.fill(0)
+    boards, cells = np.nonzero(cell_pieces >= 0)
+    out[boards, cell_pieces[boards, cells], cells // cols, cells % cols] = 1
+    return out
+
 
 class Board:
     def __init__(self, name: str, storage: bool, rows, cols):
@@ -16,6 +54,14 @@ class Board:
         self.cols: int = cols
         self.last_move: tuple[int, int] | None = None  # (row, col) of last move
 
+        # Bitboard: bit ``i`` corresponde a la celda ``i = row * cols + col``.
+        # En el storage la celda coincide con el índice de la pieza, por lo que
+        # ``occupancy`` es la máscara de piezas disponibles.
+        self.full_mask: int = (1 << (rows * cols)) - 1
+        self.occupancy: int = 0
+        self.planes: list[int] = [0] * N_ATTRIBUTES
+        self.cell_pieces: list[int] = [EMPTY] * (rows * cols)
+
         if self.storage:
             self.__init_pieces()
 
@@ -27,10 +73,32 @@ class Board:
             for c in Coloration:
                 for sh in Shape:
                     for h in Hole:
-                        self.board[row][col] = Piece(si, c, sh, h)
+                        self.__set_cell(Piece(si, c, sh, h), row, col)
                         col += 1
             row += 1
 
+    def __set_cell(self, piece: Piece, row: int, col: int):
+        """Escribe la pieza en la celda y actualiza el bitboard."""
+        cell = row * self.cols + col
+        bit = 1 << cell
+        piece_idx = piece.index()
+        self.board[row][col] = piece
+        self.cell_pieces[cell] = piece_idx
+        self.occupancy |= bit
+        for a in range(N_ATTRIBUTES):
+            if piece_attribute(piece_idx, a):
+                self.planes[a] |= bit
+
+    def __clear_cell(self, row: int, col: int):
+        """Vacía la celda y actualiza el bitboard."""
+        cell = row * self.cols + col
+        bit = ~(1 << cell)
+        self.board[row][col] = 0
+        self.cell_pieces[cell] = EMPTY
+        self.occupancy &= bit
+        for a in range(N_ATTRIBUTES):
+            self.planes[a] &= bit
+
     def get_piece(self, row, col) -> Piece:
         """Retorna la pieza en la posición (row, col) del tablero.
         Se asume que la posición es válida.
@@ -42,17 +110,16 @@ class Board:
 
     def is_empty(self, row: int, col: int) -> bool:
         """Retorna True si la posición (row, col) está vacía (0)"""
-        return self.board[row][col] == 0
+        return not (self.occupancy >> (row * self.cols + col)) & 1
 
     def find_piece(self, piece: Piece) -> tuple[int, int] | None:
         """Busca una pieza en el tablero y retorna su posición (row, col)
         Si no la encuentra, retorna None"""
         if isinstance(piece, Piece):
-            for row in range(self.rows):
-                for col in range(self.cols):
-                    if self.board[row][col] == piece:
-                        return row, col
-            return None
+            piece_idx = piece.index()
+            if piece_idx not in self.cell_pieces:
+                return None
+            return divmod(self.cell_pieces.index(piece_idx), self.cols)
         else:
             raise ValueError("El item debe ser una pieza")
 
@@ -65,16 +132,23 @@ class Board:
 
         assert isinstance(self.board[row][col], Piece), "El item debe ser una pieza"
 
-        self.board[row][col] = 0
+        self.__clear_cell(row, col)
 
     def put_piece(self, piece: Piece | int, row, col):
         # Solo asignar si es una Pieza o 0 (vacío)
         if isinstance(piece, Piece):  # or piece == 0:
-            self.board[row][col] = piece
+            self.__set_cell(piece, row, col)
             self.last_move = (row, col)
         else:
             raise ValueError("Solo se pueden colocar objetos Piece o 0 (vacío)")
 
+    def clear_position(self, row: int, col: int):
+        """Vacía la posición (row, col) de cualquier tipo de tablero.
+        Si era el último movimiento, ``last_move`` pasa a None."""
+        self.__clear_cell(row, col)
+        if self.last_move == (row, col):
+            self.last_move = None
+
     def check_win(self, mode_2x2: bool = False) -> tuple[bool, list[tuple[int, int]] | None]:
         """Returns True if there is a winning condition on the board.
         False otherwise.
@@ -92,135 +166,41 @@ class Board:
 
         row, col = self.last_move
 
-        # Check the row of the last placed piece
-        if self.__is_winning_line(self.board[row]):
-            return True, [(row, c) for c in range(self.cols)]
-
-        # Check the column of the last placed piece
-        column_pieces = [self.board[r][col] for r in range(self.rows)]
-        if self.__is_winning_line(column_pieces):
-            return True, [(r, col) for r in range(self.rows)]
-
-        # Check main diagonal if the piece is on it
-        if row == col:
-            main_diagonal_pieces = [self.board[i][i] for i in range(self.rows)]
-            if self.__is_winning_line(main_diagonal_pieces):
-                return True, [(i, i) for i in range(self.rows)]
-
-        # Check anti-diagonal if the piece is on it
-        if row + col == self.cols - 1:
-            anti_diagonal_pieces = [
-                self.board[i][self.cols - 1 - i] for i in range(self.rows)
-            ]
-            if self.__is_winning_line(anti_diagonal_pieces):
-                return True, [(i, self.cols - 1 - i) for i in range(self.rows)]
-
-        # Check squares
-        if mode_2x2:
-            # Se evalúan las 4 posibles posiciones del cuadrado 2x2
-            # Cada square está conformado por las posiciones
-            # (r-1, c-1)   (r-1, c)
-            # (r  ,   c)   (r  , c)
-            # r itera de [row, row+1]
-            # c itera de [col, col+1]
-
-            for r in range(row, row + 2):
-                for c in range(col, col + 2):
-                    # check square only if it fits in the board
-                    if r - 1 < 0 or c - 1 < 0:
-                        continue
-                    if r >= self.rows or c >= self.cols:
-                        continue
-
-                    square_pieces = [
-                        self.board[r - 1][c - 1],
-                        self.board[r - 1][c],
-                        self.board[r][c - 1],
-                        self.board[r][c],
-                    ]
-                    if self.__is_winning_line(square_pieces):
-                        coords = [(r - 1, c - 1), (r - 1, c), (r, c - 1), (r, c)]
-                        return True, coords
+        # Solo se evalúan las líneas (y cuadrados 2x2) que pasan por el último
+        # movimiento, usando las máscaras precalculadas de ``lines``.
+        line = winning_line(
+            self.occupancy, self.planes, row * self.cols + col, mode_2x2
+        )
+        if line:
+            return True, mask2coords(line)
         return False, None
 
     def is_full(self):
-        for row in range(self.rows):
-            if 0 in self.board[row]:
-                return False
-        return True
-
-    def __is_winning_line(self, pieces):
-        if 0 in pieces:
-            return False
-        p = pieces[0]
-        ho, si, sh, co = True, True, True, True
-        for piece in pieces:
-            ho = p.hole == piece.hole and ho
-            si = p.size == piece.size and si
-            sh = p.shape == piece.shape and sh
-            co = p.coloration == piece.coloration and co
-        return ho or si or sh or co
+        return self.occupancy == self.full_mask
 
     def __check_all_lines(self):
-        # Check rows
-        for row in range(self.rows):
-            if not (0 in self.board[row]):
-                if self.__is_winning_line(self.board[row]):
-                    return True
-
-        # Check columns
-        for col in range(self.cols):
-            pieces = []
-            for row in range(self.rows):
-                pieces.append(self.board[row][col])
-            if not (0 in pieces):
-                if self.__is_winning_line(pieces):
-                    return True
-
-        # Check diagonals (only if square board)
-        if self.cols == self.rows:
-            pieces = []
-            pieces2 = []
-            for col in range(self.cols):
-                pieces.append(self.board[col][col])
-                pieces2.append(self.board[col][self.cols - col - 1])
-            if not (0 in pieces):
-                if self.__is_winning_line(pieces):
-                    return True
-            if not (0 in pieces2):
-                if self.__is_winning_line(pieces2):
-                    return True
+        for line in LINES:
+            if is_winning_line(self.occupancy, self.planes, line):
+                return True
         return False
 
     def get_valid_pieces(self):
         moves: list[Piece] = []
-        for row in range(self.rows):
-            for col in range(self.cols):
-                piece = self.board[row][col]
-                if self.storage:
-                    if piece != 0:
-                        # Piezas que están en storage
-                        moves.append(piece)  # type: ignore
-                else:
-                    if piece == 0:
-                        # Espacios vacíos
-                        pass
+        if self.storage:
+            # Piezas que están en storage
+            for cell in iter_bits(self.occupancy):
+                row, col = divmod(cell, self.cols)
+                moves.append(self.board[row][col])  # type: ignore
         return moves
 
     def get_valid_moves(self):
-        moves: list[tuple[int, int]] = []
-        for row in range(self.rows):
-            for col in range(self.cols):
-                piece = self.board[row][col]
-                if self.storage:
-                    if piece != 0:
-                        # Piezas que están en storage
-                        moves.append((row, col))
-                else:
-                    if piece == 0:
-                        # Espacios vacíos
-                        moves.append((row, col))
-        return moves
+        if self.storage:
+            # Piezas que están en storage
+            mask = self.occupancy
+        else:
+            # Espacios vacíos
+            mask = ~self.occupancy & self.full_mask
+        return [divmod(cell, self.cols) for cell in iter_bits(mask)]
 
     def __repr__(self):
         s = f"{self.name}:\n"
@@ -235,48 +215,63 @@ class Board:
         return s
 
     ####################################################################
-    def to_matrix(self):
+    def to_matrix(self, out: np.ndarray | None = None):
         """Convierte el tablero en una matriz de dimensiones
         (batch=1, dims, rows, cols)
+
+        ## Parameters
+        ``out``: np.ndarray opcional (1, 4, rows, cols) o (4, rows, cols) donde escribir
+        la matriz sin crear arreglos nuevos.
         """
 
         # dims (Tamaño, Color, Forma, Hueco)
-        B = np.zeros((1, 4, self.rows, self.cols))
-        for r in range(self.rows):
-            for c in range(self.cols):
-                piece = self.board[r][c]
-
-                if isinstance(piece, Piece):
-                    B[:, :, r, c] = piece.vectorize()
-                # else:
-                # continue
-
-        return B
+        if out is None:
+            out = np.zeros((1, 4, self.rows, self.cols))
+        else:
+            out.fill(0)
+        for cell in iter_bits(self.occupancy):
+            r, c = divmod(cell, self.cols)
+            out[..., :, r, c] = _PIECE_VECTORS[self.cell_pieces[cell]]
+        return out
 
     # ##############################################################
     def __contains__(self, item: Piece):
         """Retorna True si el item es una pieza del tablero"""
         if isinstance(item, Piece):
-            for row in range(self.rows):
-                for col in range(self.cols):
-                    if self.board[row][col] == item:
-                        return True
-            return False
+            return item.index() in self.cell_pieces
         else:
             raise ValueError("El item debe ser una pieza")
 
     @staticmethod
     # ##############################################################
-    def to_matrix_batch(boards: list["Board"]):
-        """Convierte una lista de tableros en una matriz de dimensiones
-        (batch, dims, rows, cols)
+    def to_matrix_batch(boards: list["Board | BitBoard"], out: np.ndarray | None = None):
+        """Convierte una lista de tableros (``Board`` o ``BitBoard``) en una matriz de
+        dimensiones (batch, dims, rows, cols)
 
-        Asume todos los tableros tienen el mismo tamaño.
+        Asume todos los tableros tienen el mismo tamaño (4x4 para los ``BitBoard``).
+        ``out``: np.ndarray opcional (batch, 4, rows, cols) donde escribir.
         """
-        B = np.zeros((len(boards), 4, boards[0].rows, boards[0].cols))
-        for i, board in enumerate(boards):
-            B[i, :, :, :] = board.to_matrix()
-        return B
+        rows, cols = (4, 4) if isinstance(boards[0], BitBoard) else (boards[0].rows, boards[0].cols)
+        cell_pieces = _cell_pieces(boards)
+        if out is None:
+            out = np.zeros((len(boards), 4, rows, cols))
+        else:
+            out.fill(0)
+        idx, cells = np.nonzero(cell_pieces >= 0)
+        out[idx, :, cells // cols, cells % cols] = _PIECE_VECTORS[cell_pieces[idx, cells]]
+        return out
+
+    @staticmethod
+    # ##############################################################
+    def encode_batch(boards: list["Board | BitBoard"], out: np.ndarray | None = None):
+        """Codificación de ``encode`` para una lista de tableros (``Board`` o ``BitBoard``).
+
+        ``out``: np.ndarray opcional (batch, 16, rows, cols) donde escribir.
+        ## Return
+        ``matrix``: np.array (batch, 16, rows, cols), bool si no se da ``out``.
+        """
+        rows, cols = (4, 4) if isinstance(boards[0], BitBoard) else (boards[0].rows, boards[0].cols)
+        return encode_cell_pieces(_cell_pieces(boards), rows, cols, out)
 
     def print_board(self, piece_highlight: Piece | int = 0):
         """Método auxiliar para imprimir un tablero con formato"""
@@ -345,19 +340,25 @@ class Board:
         return matrix
 
     # ####################################################################
-    def encode(self):
+    def encode(self, out: np.ndarray | None = None):
         """Convierte el tablero en una matriz (1-16-4-4)
+        ## Parameters
+        ``out``: np.ndarray contiguo opcional (1, 16, 4, 4) o (16, 4, 4), de cualquier
+        tipo, donde escribir la matriz sin crear arreglos nuevos.
         ## Return
         ``matrix``: np.array (1, 16, 4, 4 con one-hot encoded de las piezas del tablero de boolean.
 
         """
-        matrix = np.zeros((1, 16, self.rows, self.cols), dtype=bool)
-        for r in range(self.rows):
-            for c in range(self.cols):
-                piece = self.board[r][c]
-                if isinstance(piece, Piece):
-                    matrix[0, :, r, c] = piece.vectorize_onehot()
-        return matrix
+        if out is None:
+            out = np.zeros((1, 16, self.rows, self.cols), dtype=bool)
+        else:
+            assert out.flags.c_contiguous, "out must be C-contiguous"
+            out.fill(0)
+        # Índice plano de (pieza, celda): una sola asignación para todas las piezas
+        n_cells = self.rows * self.cols
+        cell_pieces = self.cell_pieces
+        out.reshape(-1)[[cell_pieces[cell] * n_cells + cell for cell in iter_bits(self.occupancy)]] = 1
+        return out
 
     @staticmethod
     # ####################################################################
@@ -0,0 +1,200 @@
+"""Resolución exacta de finales de partida.
+
+Con pocas celdas vacías el árbol de juego es lo bastante pequeño para recorrerlo
+entero. ``EndgameSolver`` lo resuelve sobre un ``SearchState`` (make/unmake sobre
+bitboards) con poda alfa-beta, memoización de cotas y poda por amenazas:
+
+* En la fase de colocación, si la pieza seleccionada gana en alguna celda, el
+  resultado es victoria sin explorar nada más.
+* En la fase de selección, las piezas que ganarían en el tablero actual
+  ("envenenadas") nunca se entregan mientras quede otra. Si todas lo están, el
+  resultado es derrota.
+
+Los resultados son desde el punto de vista del jugador que mueve: ``WIN``, ``DRAW``
+o ``LOSS``.
+"""
+
+from time import perf_counter
+
+from .bitboard import N_CELLS
+from .search_state import SearchState
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+ENDGAME_MAX_EMPTY = 8
+# Parte del tiempo de una jugada que los bots con presupuesto dan al resolvedor antes
+# de volver a su búsqueda normal
+ENDGAME_BUDGET_SHARE = 0.5
+
+_CHECK_EVERY = 256  # nodos entre consultas del reloj cuando hay ``deadline``
+
+_EXACT = 0
+_LOWER = 1
+_UPPER = 2
+
+
+class EndgameTimeout(Exception):
+    """El resolvedor no terminó antes del ``deadline`` dado a ``solve_state``."""
+
+
+class EndgameSolver:
+    """Resolvedor exacto para estados con ``max_empty`` celdas vacías o menos.
+
+    ## Parameters
+    ``max_empty``: int máximo de celdas vacías que se aceptan.
+    ``max_entries``: int tamaño máximo de la memoización; al llenarse se vacía.
+
+    ## Attributes
+    ``nodes``: int nodos visitados en la última llamada a ``solve``.
+    """
+
+    def __init__(self, max_empty: int = ENDGAME_MAX_EMPTY, max_entries: int = 1 << 20):
+        self.max_empty = max_empty
+        self.max_entries = max_entries
+        self._memo: dict[tuple, tuple[int, int, int | None]] = {}
+        self.nodes = 0
+        self._deadline: float | None = None
+
+    def __deepcopy__(self, memo):
+        # Caché compartida, igual que ``TranspositionTable``
+        return self
+
+    def clear(self):
+        self._memo.clear()
+
+    # ####################################################################
+    def can_solve(self, game) -> bool:
+        """True si ``game`` tiene como mucho ``max_empty`` celdas vacías."""
+        return N_CELLS - game.game_board.occupancy.bit_count() <= self.max_empty
+
+    def solve(self, game) -> tuple[int, int | None]:
+        """Resuelve el estado actual de un ``QuartoGame``.
+
+        ## Return
+        * ``outcome``: ``WIN``, ``DRAW`` o ``LOSS`` para el jugador que mueve.
+        * ``move``: índice de la mejor pieza (fase de selección) o de la mejor celda
+          (fase de colocación); None si no hay jugadas.
+        """
+        return self.solve_state(SearchState.from_game(game))
+
+    def solve_state(
+        self, state: SearchState, deadline: float | None = None
+    ) -> tuple[int, int | None]:
+        """Resuelve ``state``. El estado queda igual que al entrar.
+
+        ## Parameters
+        ``deadline``: float | None instante (``time.perf_counter``) a partir del cual
+            se abandona la búsqueda lanzando ``EndgameTimeout``. Lo ya resuelto queda en
+            la memoización, así que un nuevo intento empieza con ventaja.
+        """
+        n_empty = N_CELLS - state.board.occupied.bit_count()
+        if n_empty > self.max_empty:
+            raise ValueError(
+                f"{n_empty} empty cells, the solver accepts at most {self.max_empty}"
+            )
+        if len(self._memo) >= self.max_entries:
+            self._memo.clear()
+
+        self.nodes = 0
+        self._deadline = deadline
+        n_applied = len(state.history)
+        try:
+            return self._solve(state, LOSS, WIN)
+        except EndgameTimeout:
+            while len(state.history) > n_applied:
+                state.unmake_move()
+            raise
+
+    # ####################################################################
+    def _solve(self, state: SearchState, alpha: int, beta: int) -> tuple[int, int | None]:
+        """Negamax con ventana ``[alpha, beta]``. Colocar y seleccionar son dos
+        jugadas del mismo jugador: el signo solo cambia tras una selección."""
+        board = state.board
+        mode_2x2 = state.mode_2x2
+        self.nodes += 1
+        if (
+            self._deadline is not None
+            and not self.nodes % _CHECK_EVERY
+            and perf_counter() > self._deadline
+        ):
+            raise EndgameTimeout
+
+        if state.pick:
+            if board.is_full():
+                return DRAW, None
+            # Piezas que el rival colocaría ganando
+            poisoned = board.threat_pieces(mode_2x2) & board.remaining
+            safe = board.remaining & ~poisoned
+            if not safe:
+                return LOSS, board.valid_pieces()[0]
+            if board.occupied.bit_count() == N_CELLS - 1:
+                # Queda una celda y una pieza que no gana: tablas
+                return DRAW, safe.bit_length() - 1
+        else:
+            winning = board.winning_cells(board.selected, mode_2x2) & ~board.occupied
+            if winning:
+                return WIN, (winning & -winning).bit_length() - 1
+
+        key = (*board.key(), state.pick, mode_2x2)
+        entry = self._memo.get(key)
+        best_move = None
+        if entry is not None:
+            value, flag, best_move = entry
+            if flag == _EXACT:
+                return value, best_move
+            if flag == _LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value, best_move
+
+        alpha_orig, beta_orig = alpha, beta
+        if state.pick:
+            moves = [piece for piece in board.valid_pieces() if safe >> piece & 1]
+        else:
+            moves = board.valid_moves()
+        if best_move in moves:
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+        best_value = LOSS - 1
+        for move in moves:
+            if state.pick:
+                state.make_move(move)
+                value = -self._solve(state, -beta, -alpha)[0]
+            else:
+                state.make_move(move)  # no gana: las victorias ya se detectaron
+                value = self._solve(state, alpha, beta)[0]
+            state.unmake_move()
+
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_orig:
+            flag = _UPPER
+        elif best_value >= beta_orig:
+            flag = _LOWER
+        else:
+            flag = _EXACT
+        self._memo[key] = (best_value, flag, best_move)
+        return best_value, best_move
+
+
+# ####################################################################
+_default_solvers: dict[tuple[int, bool], EndgameSolver] = {}
+
+
+def solve(game, max_empty: int = ENDGAME_MAX_EMPTY) -> tuple[int, int | None]:
+    """Resuelve ``game`` con un ``EndgameSolver`` compartido por el proceso, uno por
+    ``max_empty`` y modo de juego. Ver ``EndgameSolver.solve``."""
+    key = (max_empty, game.mode_2x2)
+    solver = _default_solvers.get(key)
+    if solver is None:
+        solver = _default_solvers[key] = EndgameSolver(max_empty)
+    return solver.solve(game)
@@ -0,0 +1,152 @@
+"""Latencia de las llamadas de los bots durante las partidas.
+
+Un ``LatencyRecorder`` dado a ``QuartoGame`` (o ``play_games(..., latency=True)``)
+guarda, por bot y por fase, el tiempo de pared de cada jugada, cuántos intentos
+(``n_tries``) necesitó y los contadores del motor que devuelve
+``BotAI.search_stats`` (nodos, simulaciones, inferencias...) o, en la fase
+``batch``, ``BotAI.batch_stats``. Las fases son ``select``, ``place`` y ``batch``
+(``prepare_batch`` en ``play_games`` con ``batch_size > 1``).
+
+``summary`` resume cada bot y fase en percentiles p50/p95/p99 e histograma, y
+``report`` lo formatea como tabla. Los registros de varios procesos se juntan con
+``merge``.
+"""
+
+from time import perf_counter
+from typing import Any
+
+import numpy as np
+
+PHASES = ("select", "place", "batch")
+
+# Límites superiores (ms) de las barras del histograma; la última barra no tiene límite
+HISTOGRAM_EDGES_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1_000, 3_000, 10_000)
+
+
+# ####################################################################
+class PhaseSamples:
+    """Muestras de un bot en una fase: segundos e intentos por llamada y, por
+    contador del motor, sus valores en las llamadas que lo informaron."""
+
+    __slots__ = ("seconds", "tries", "stats")
+
+    def __init__(self):
+        self.seconds: list[float] = []
+        self.tries: list[int] = []
+        self.stats: dict[str, list[float]] = {}
+
+    def add(self, seconds: float, tries: int, stats: dict[str, float]):
+        self.seconds.append(seconds)
+        self.tries.append(tries)
+        for key, value in stats.items():
+            self.stats.setdefault(key, []).append(value)
+
+    def extend(self, other: "PhaseSamples"):
+        self.seconds.extend(other.seconds)
+        self.tries.extend(other.tries)
+        for key, values in other.stats.items():
+            self.stats.setdefault(key, []).extend(values)
+
+    def summary(self) -> dict[str, Any]:
+        ms = np.array(self.seconds) * 1e3
+        tries = np.array(self.tries)
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        counts = np.bincount(np.searchsorted(HISTOGRAM_EDGES_MS, ms), minlength=len(HISTOGRAM_EDGES_MS) + 1)
+        labels = [f"<={edge:g}ms" for edge in HISTOGRAM_EDGES_MS] + [f">{HISTOGRAM_EDGES_MS[-1]:g}ms"]
+
+        stats = {}
+        for key, values in self.stats.items():
+            values = np.array(values, dtype=float)
+            stats[key] = {
+                "mean": float(values.mean()),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(values.max()),
+                "total": float(values.sum()),
+            }
+        return {
+            "calls": len(ms),
+            "retries": int((tries > 1).sum()),  # llamadas que necesitaron más de un intento
+            "max_tries": int(tries.max()),
+            "total_s": float(ms.sum() / 1e3),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(ms.max()),
+            "histogram": dict(zip(labels, counts.tolist())),
+            "stats": stats,
+        }
+
+
+class LatencyRecorder:
+    """Registro de las llamadas de los bots, agrupadas por ``bot.name`` y fase.
+
+    Bots distintos con el mismo nombre comparten registro.
+    """
+
+    def __init__(self):
+        self.samples: dict[str, dict[str, PhaseSamples]] = {}
+
+    def record(self, bot, phase: str, seconds: float, tries: int = 1):
+        """Añade una llamada de ``bot`` en ``phase`` que tardó ``seconds`` y ``tries``
+        intentos. Los contadores se leen de ``bot.batch_stats()`` en la fase ``batch``
+        y de ``bot.search_stats()`` en las demás; ambos describen la última llamada
+        de esa clase."""
+        by_phase = self.samples.setdefault(bot.name, {})
+        samples = by_phase.get(phase)
+        if samples is None:
+            samples = by_phase[phase] = PhaseSamples()
+        stats = getattr(bot, "batch_stats" if phase == "batch" else "search_stats", None)
+        samples.add(seconds, tries, stats() if stats is not None else {})
+
+    def time_batch(self, bot, games: list):
+        """Llama a ``bot.prepare_batch(games)`` registrándola como fase ``batch``."""
+        start = perf_counter()
+        bot.prepare_batch(games)
+        self.record(bot, "batch", perf_counter() - start)
+
+    def merge(self, other: "LatencyRecorder"):
+        """Añade los registros de ``other`` (p. ej. de otro proceso)."""
+        for name, by_phase in other.samples.items():
+            for phase, samples in by_phase.items():
+                mine = self.samples.setdefault(name, {}).get(phase)
+                if mine is None:
+                    mine = self.samples[name][phase] = PhaseSamples()
+                mine.extend(samples)
+
+    def clear(self):
+        self.samples.clear()
+
+    # ####################################################################
+    def summary(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Resumen por bot y fase.
+
+        ## Return
+        ``{bot: {phase: {...}}}`` con ``calls``, ``retries``, ``max_tries``,
+        ``total_s``, ``mean_ms``, ``p50_ms``, ``p95_ms``, ``p99_ms``, ``max_ms``,
+        ``histogram`` (llamadas por barra de ``HISTOGRAM_EDGES_MS``) y ``stats``
+        (``mean``, ``p50``, ``p95``, ``max`` y ``total`` de cada contador del motor).
+        """
+        return {
+            name: {
+                phase: by_phase[phase].summary()
+                for phase in sorted(by_phase, key=lambda p: PHASES.index(p) if p in PHASES else len(PHASES))
+            }
+            for name, by_phase in self.samples.items()
+        }
+
+    def report(self) -> str:
+        """Tabla de ``summary``, una fila por bot y fase, con la media de cada contador."""
+        rows = [
+            f"{'bot':<28} {'fase':<6} {'llamadas':>8} {'reint.':>6} "
+            f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  contadores (media)"
+        ]
+        for name, by_phase in self.summary().items():
+            for phase, s in by_phase.items():
+                stats = ", ".join(f"{key}={value['mean']:.4g}" for key, value in s["stats"].items())
+                rows.append(
+                    f"{name[:28]:<28} {phase:<6} {s['calls']:>8} {s['retries']:>6} "
+                    f"{s['p50_ms']:>9.2f} {s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['max_ms']:>9.2f}  {stats}"
+                )
+        return "\n".join(rows)
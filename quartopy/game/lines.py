@@ -0,0 +1,108 @@
+"""Tablas precalculadas de líneas ganadoras del tablero 4x4.
+
+Cada línea es una máscara de 16 bits sobre las celdas (``index = row * 4 + col``),
+igual que en ``quartopy.game.bitboard``. Se incluyen las 10 líneas estándar
+(4 filas, 4 columnas y 2 diagonales) y los 9 cuadrados 2x2 del ``mode_2x2``.
+
+``LINES_BY_CELL[cell]`` y ``SQUARES_BY_CELL[cell]`` contienen solo las líneas que
+pasan por ``cell``, en el mismo orden en que ``Board.check_win`` las evalúa.
+"""
+
+ROWS = 4
+COLS = 4
+
+
+def _mask(coords) -> int:
+    mask = 0
+    for r, c in coords:
+        mask |= 1 << (r * COLS + c)
+    return mask
+
+
+ROW_LINES: tuple[int, ...] = tuple(
+    _mask((r, c) for c in range(COLS)) for r in range(ROWS)
+)
+COL_LINES: tuple[int, ...] = tuple(
+    _mask((r, c) for r in range(ROWS)) for c in range(COLS)
+)
+MAIN_DIAGONAL: int = _mask((i, i) for i in range(ROWS))
+ANTI_DIAGONAL: int = _mask((i, COLS - 1 - i) for i in range(ROWS))
+
+# 10 líneas estándar
+LINES: tuple[int, ...] = ROW_LINES + COL_LINES + (MAIN_DIAGONAL, ANTI_DIAGONAL)
+
+# 9 cuadrados 2x2, identificados por su esquina superior izquierda
+SQUARES: tuple[int, ...] = tuple(
+    _mask([(r, c), (r, c + 1), (r + 1, c), (r + 1, c + 1)])
+    for r in range(ROWS - 1)
+    for c in range(COLS - 1)
+)
+
+# Todas las líneas ganadoras en ``mode_2x2``
+LINES_2X2: tuple[int, ...] = LINES + SQUARES
+
+
+def _lines_through(cell: int) -> tuple[int, ...]:
+    row, col = divmod(cell, COLS)
+    lines = [ROW_LINES[row], COL_LINES[col]]
+    if row == col:
+        lines.append(MAIN_DIAGONAL)
+    if row + col == COLS - 1:
+        lines.append(ANTI_DIAGONAL)
+    return tuple(lines)
+
+
+def _squares_through(cell: int) -> tuple[int, ...]:
+    row, col = divmod(cell, COLS)
+    squares = []
+    # Esquina inferior derecha (r, c) del cuadrado, con r en [row, row+1] y c en [col, col+1]
+    for r in range(row, row + 2):
+        for c in range(col, col + 2):
+            if r - 1 < 0 or c - 1 < 0 or r >= ROWS or c >= COLS:
+                continue
+            squares.append(SQUARES[(r - 1) * (COLS - 1) + (c - 1)])
+    return tuple(squares)
+
+
+LINES_BY_CELL: tuple[tuple[int, ...], ...] = tuple(
+    _lines_through(cell) for cell in range(ROWS * COLS)
+)
+SQUARES_BY_CELL: tuple[tuple[int, ...], ...] = tuple(
+    _squares_through(cell) for cell in range(ROWS * COLS)
+)
+LINES_2X2_BY_CELL: tuple[tuple[int, ...], ...] = tuple(
+    LINES_BY_CELL[cell] + SQUARES_BY_CELL[cell] for cell in range(ROWS * COLS)
+)
+
+
+# ####################################################################
+def is_winning_line(occupied: int, planes, line: int) -> bool:
+    """True si ``line`` está completa y todas sus piezas comparten algún atributo,
+    es decir, si algún plano de atributo vale todo 1 o todo 0 sobre la línea."""
+    if occupied & line != line:
+        return False
+    for plane in planes:
+        common = plane & line
+        if common == line or not common:
+            return True
+    return False
+
+
+def winning_line(occupied: int, planes, cell: int, mode_2x2: bool = False) -> int:
+    """Retorna la máscara de la primera línea ganadora que pasa por ``cell``,
+    o 0 si no hay ninguna."""
+    lines = LINES_2X2_BY_CELL[cell] if mode_2x2 else LINES_BY_CELL[cell]
+    for line in lines:
+        if is_winning_line(occupied, planes, line):
+            return line
+    return 0
+
+
+def mask2coords(mask: int) -> list[tuple[int, int]]:
+    """Convierte una máscara de celdas en la lista de posiciones (row, col)."""
+    coords = []
+    while mask:
+        low = mask & -mask
+        coords.append(divmod(low.bit_length() - 1, COLS))
+        mask ^= low
+    return coords
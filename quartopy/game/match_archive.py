@@ -0,0 +1,329 @@
+"""Archivo binario de partidas.
+
+Sustituye a los CSV por partida de ``QuartoGame.export_history_to_csv``. Un archivo
+``<path>`` guarda los movimientos de todas las partidas como registros de ancho fijo
+(``MOVE_DTYPE``, 16 bytes) y ``<path>.idx`` guarda un registro por partida
+(``MATCH_DTYPE``) con el desplazamiento de su primer movimiento. Ambos solo crecen
+por el final, y se leen con ``np.memmap`` sin cargarlos en memoria; cada campo se
+consulta como columna (``archive.moves["board"]``).
+
+El tablero después de cada movimiento se empaqueta en ``board`` (un nibble por
+celda con el índice de la pieza, celda ``i`` en los bits ``4*i .. 4*i+3``) y
+``occupied`` (máscara de celdas ocupadas, como en ``quartopy.game.bitboard``).
+"""
+
+import csv
+from os import path
+
+import numpy as np
+
+from .bitboard import N_ATTRIBUTES, N_CELLS, piece_attribute
+from .board import encode_cell_pieces
+from .lines import LINES, LINES_2X2, is_winning_line
+
+MAGIC_MOVES = b"QMRM"
+MAGIC_MATCHES = b"QMRI"
+VERSION = 1
+HEADER_SIZE = 16
+
+SELECTED = 0
+PLACED = 1
+NO_INDEX = 255  # pieza o posición ausente
+NAME_SIZE = 48  # bytes utf-8 por nombre de jugador, se truncan
+
+RESULTS = {"Tie": 0, "Player 1": 1, "Player 2": 2}
+RESULT_NAMES = {v: k for k, v in RESULTS.items()}
+
+MOVE_DTYPE = np.dtype(
+    [
+        ("board", "<u8"),
+        ("occupied", "<u2"),
+        ("player", "u1"),  # 1 o 2
+        ("action", "u1"),  # SELECTED o PLACED
+        ("piece", "u1"),
+        ("position", "u1"),
+        ("attempt", "u1"),
+        ("_reserved", "u1"),
+    ]
+)
+MATCH_DTYPE = np.dtype(
+    [
+        ("offset", "<u8"),  # índice del primer movimiento
+        ("n_moves", "<u2"),
+        ("result", "u1"),  # 0 empate, 1 o 2 ganador
+        ("mode_2x2", "u1"),
+        ("_reserved", "<u4"),
+        ("player1", f"S{NAME_SIZE}"),
+        ("player2", f"S{NAME_SIZE}"),
+    ]
+)
+
+_SHIFTS = np.arange(N_CELLS, dtype=np.uint64) * np.uint64(4)
+
+
+# ####################################################################
+def unpack_boards(board: np.ndarray, occupied: np.ndarray) -> np.ndarray:
+    """Desempaqueta tableros.
+
+    ## Parameters
+    ``board``: np.ndarray uint64 (n,) y ``occupied``: np.ndarray uint16 (n,).
+
+    ## Return
+    np.ndarray int8 (n, 16) con el índice de la pieza en cada celda, -1 si está vacía.
+    """
+    board = np.asarray(board, dtype=np.uint64)
+    pieces = ((board[:, None] >> _SHIFTS) & np.uint64(0xF)).astype(np.int8)
+    empty = ((np.asarray(occupied, dtype=np.uint16)[:, None] >> np.arange(N_CELLS)) & 1) == 0
+    pieces[empty] = -1
+    return pieces
+
+
+def encode_boards(cell_pieces: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """Codificación de ``Board.encode`` para varios tableros.
+
+    ## Parameters
+    ``cell_pieces``: np.ndarray (n, 16) índice de pieza por celda, -1 si está vacía.
+    ``out``: np.ndarray (n, 16, 4, 4) opcional donde escribir.
+
+    ## Return
+    np.ndarray bool (n, 16, 4, 4)
+    """
+    return encode_cell_pieces(cell_pieces, out=out)
+
+
+def write_header(f, magic: bytes, record_size: int):
+    """Escribe en ``f`` la cabecera de ``HEADER_SIZE`` bytes de un archivo de registros:
+    ``magic`` (4 bytes), ``VERSION`` y ``record_size``."""
+    header = magic + np.array([VERSION, record_size], dtype="<u2").tobytes()
+    f.write(header.ljust(HEADER_SIZE, b"\0"))
+
+
+def check_header(filepath: str, magic: bytes, record_size: int, kind: str = "match archive"):
+    """Lanza ValueError si la cabecera de ``filepath`` no es la que escribe
+    ``write_header`` con ``magic`` y ``record_size``. ``kind`` nombra el tipo de
+    archivo en el mensaje."""
+    with open(filepath, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    version, size = np.frombuffer(header[4:8], dtype="<u2")
+    if header[:4] != magic or version != VERSION or size != record_size:
+        raise ValueError(f"{filepath} is not a valid {kind} (version {VERSION})")
+
+
+# ####################################################################
+class MatchArchive:
+    """Archivo binario de partidas, de solo añadir.
+
+    ## Parameters
+    ``filepath``: str ruta del archivo de movimientos; el índice es ``filepath + ".idx"``.
+    Se crean si no existen.
+
+    ## Example
+    ```
+    archive = MatchArchive("partidas_guardadas/torneo.qma")
+    archive.append(game.to_dict, mode_2x2=game.mode_2x2)
+    moves = archive.match_moves(0)  # registros MOVE_DTYPE de la partida 0
+    boards = encode_boards(unpack_boards(moves["board"], moves["occupied"]))
+    ```
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.index_path = filepath + ".idx"
+        for file, magic, dtype in (
+            (self.filepath, MAGIC_MOVES, MOVE_DTYPE),
+            (self.index_path, MAGIC_MATCHES, MATCH_DTYPE),
+        ):
+            if path.exists(file):
+                check_header(file, magic, dtype.itemsize)
+            else:
+                with open(file, "wb") as f:
+                    write_header(f, magic, dtype.itemsize)
+
+    # ####################################################################
+    def _count(self, file: str, dtype: np.dtype) -> int:
+        return (path.getsize(file) - HEADER_SIZE) // dtype.itemsize
+
+    def __len__(self) -> int:
+        """Número de partidas."""
+        return self._count(self.index_path, MATCH_DTYPE)
+
+    @property
+    def n_moves(self) -> int:
+        return self._count(self.filepath, MOVE_DTYPE)
+
+    def _memmap(self, file: str, dtype: np.dtype, n: int) -> np.ndarray:
+        if n == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(n,))
+
+    @property
+    def moves(self) -> np.ndarray:
+        """Todos los movimientos (``MOVE_DTYPE``), mapeados en memoria."""
+        return self._memmap(self.filepath, MOVE_DTYPE, self.n_moves)
+
+    @property
+    def matches(self) -> np.ndarray:
+        """Índice de partidas (``MATCH_DTYPE``), mapeado en memoria."""
+        return self._memmap(self.index_path, MATCH_DTYPE, len(self))
+
+    def match_moves(self, i: int) -> np.ndarray:
+        """Movimientos de la partida ``i``."""
+        match = self.matches[i]
+        start = int(match["offset"])
+        return self.moves[start : start + int(match["n_moves"])]
+
+    def read_match(self, i: int) -> dict:
+        """Partida ``i`` en el formato de ``QuartoGame.to_dict``. ``board_after`` se
+        reconstruye con la cadena de ``Board.serialize``."""
+        match = self.matches[i]
+        moves = self.match_moves(i)
+        names = {1: match["player1"].decode(), 2: match["player2"].decode()}
+        boards = encode_boards(unpack_boards(moves["board"], moves["occupied"]))
+
+        history = []
+        for move, board in zip(moves, boards):
+            player = int(move["player"])
+            info = {
+                "player_name": names[player],
+                "player_pos": f"Player {player}",
+                "attempt": int(move["attempt"]),
+            }
+            if move["action"] == SELECTED:
+                info.update(action="selected", piece_index=int(move["piece"]))
+            else:
+                position = int(move["position"])
+                info.update(
+                    action="placed",
+                    position=divmod(position, 4),
+                    position_index=position,
+                    board_after="".join("1" if x else "0" for x in board.flatten()),
+                )
+            history.append(info)
+
+        result = RESULT_NAMES[int(match["result"])]
+        return {
+            "move_history": history,
+            "Player 1": names[1],
+            "Player 2": names[2],
+            "result": result,
+            "winner": names[RESULTS[result]] if result != "Tie" else "Tie",
+        }
+
+    # ####################################################################
+    def append(self, match: dict, mode_2x2: bool = False):
+        """Añade una partida en el formato de ``QuartoGame.to_dict``."""
+        self.extend([match], mode_2x2)
+
+    def extend(self, matches: list[dict], mode_2x2: bool = False):
+        """Añade varias partidas en el formato de ``QuartoGame.to_dict``."""
+        offset = self.n_moves
+        all_moves = []
+        index = np.zeros(len(matches), dtype=MATCH_DTYPE)
+        for i, match in enumerate(matches):
+            records = move_records(match["move_history"])
+            all_moves.append(records)
+            index[i] = (
+                offset,
+                len(records),
+                RESULTS[match["result"]],
+                mode_2x2,
+                0,
+                _name(match["Player 1"]),
+                _name(match["Player 2"]),
+            )
+            offset += len(records)
+        self._write(all_moves, index)
+
+    def append_csv(self, filepath: str, mode_2x2: bool = False):
+        """Añade una partida exportada con ``QuartoGame.export_history_to_csv``. El
+        resultado se obtiene reproduciendo la partida."""
+        records, names = read_csv_records(filepath)
+        result = "Tie"
+        if len(records) and records[-1]["action"] == PLACED:
+            last = records[-1]
+            cells = unpack_boards(last["board"][None], last["occupied"][None])[0]
+            if _has_winning_line(cells, mode_2x2):
+                result = f"Player {int(last['player'])}"
+
+        index = np.zeros(1, dtype=MATCH_DTYPE)
+        index[0] = (self.n_moves, len(records), RESULTS[result], mode_2x2, 0, _name(names[0]), _name(names[1]))
+        self._write([records], index)
+
+    def _write(self, moves: list[np.ndarray], index: np.ndarray):
+        # Primero los movimientos: una partida solo existe cuando está en el índice
+        with open(self.filepath, "ab") as f:
+            for records in moves:
+                f.write(records.tobytes())
+        with open(self.index_path, "ab") as f:
+            f.write(index.tobytes())
+
+
+# ####################################################################
+def read_csv_records(filepath: str) -> tuple[np.ndarray, list[str]]:
+    """Lee una partida exportada con ``QuartoGame.export_history_to_csv``.
+
+    ## Return
+    * ``records``: np.ndarray ``MOVE_DTYPE`` con los movimientos.
+    * ``names``: list[str] nombres de los jugadores 1 y 2.
+    """
+    with open(filepath, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("Acción")]
+
+    # El jugador 1 selecciona primero; después cada jugador coloca y selecciona
+    names = ["?", "?"]
+    history = []
+    for i, row in enumerate(rows):
+        player = 1 if i == 0 or (i - 1) // 2 % 2 == 1 else 2
+        names[player - 1] = row["Jugador"]
+        info = {
+            "player_pos": f"Player {player}",
+            "action": row["Acción"],
+            "attempt": int(row["Intento"]),
+        }
+        if row["Acción"] == "selected":
+            info["piece_index"] = int(row["Pieza Index"])
+        else:
+            info["position_index"] = int(row["Posición Index"])
+        history.append(info)
+
+    return move_records(history), names
+
+
+def _name(name: str) -> bytes:
+    return name.encode("utf-8")[:NAME_SIZE]
+
+
+def move_records(history: list[dict]) -> np.ndarray:
+    """Registros ``MOVE_DTYPE`` de un ``move_history``, reproduciendo el tablero."""
+    records = np.zeros(len(history), dtype=MOVE_DTYPE)
+    board = 0
+    occupied = 0
+    selected = NO_INDEX
+    for i, move in enumerate(history):
+        player = 1 if move["player_pos"] == "Player 1" else 2
+        if move["action"] == "selected":
+            selected = int(move["piece_index"])
+            action, position = SELECTED, NO_INDEX
+        else:
+            position = int(move["position_index"])
+            board |= selected << (4 * position)
+            occupied |= 1 << position
+            action = PLACED
+        records[i] = (board, occupied, player, action, selected, position, move["attempt"], 0)
+    return records
+
+
+def _has_winning_line(cells: np.ndarray, mode_2x2: bool) -> bool:
+    occupied = 0
+    planes = [0, 0, 0, 0]
+    for cell, piece in enumerate(cells):
+        if piece < 0:
+            continue
+        occupied |= 1 << cell
+        for a in range(N_ATTRIBUTES):
+            if piece_attribute(int(piece), a):
+                planes[a] |= 1 << cell
+    return any(
+        is_winning_line(occupied, planes, line)
+        for line in (LINES_2X2 if mode_2x2 else LINES)
+    )
@@ -0,0 +1,241 @@
+"""Libro de aperturas.
+
+Guarda la jugada a hacer en las primeras posiciones de la partida, indexadas por el
+hash de su forma canónica (ver ``position_index.position_hash``). Las jugadas se
+guardan en coordenadas canónicas y se llevan al tablero real con la simetría
+inversa, así que una entrada sirve para todas las posiciones equivalentes.
+
+El archivo es una tabla ordenada por hash (``BOOK_DTYPE``) que se consulta con
+búsqueda binaria sobre un ``np.memmap``. Se construye con ``book_from_archives``
+(estadísticas de partidas guardadas) o con ``book_from_search`` (una búsqueda por
+posición, p. ej. ``MinimaxBot.best_move``) y se escribe con ``OpeningBook.write``.
+"""
+
+from typing import Callable
+
+import numpy as np
+
+from .augmentation import CELL_PERMUTATIONS, CELL_PERMUTATIONS_2X2, PIECE_PERMUTATIONS, canonical_keys
+from .bitboard import EMPTY, BitBoard
+from .match_archive import HEADER_SIZE, MatchArchive, check_header, encode_boards, write_header
+from .position_index import decision_positions
+from .search_state import SearchState
+from .transposition import canonical_key, zobrist_hashes
+
+MAGIC_BOOK = b"QOBK"
+
+BOOK_DTYPE = np.dtype(
+    [
+        ("hash", "<u8"),
+        ("visits", "<u4"),  # partidas en que se jugó ``move`` (0 si viene de una búsqueda)
+        ("score", "<f4"),  # puntuación media de ``move``: 1 victoria, 0.5 tablas, 0 derrota
+        ("move", "u1"),  # pieza o celda, en coordenadas canónicas
+        ("_reserved", "u1", (3,)),
+    ]
+)
+
+
+# ####################################################################
+class OpeningBook:
+    """Libro de aperturas de solo lectura.
+
+    ## Parameters
+    ``filepath``: str ruta del libro, escrito con ``OpeningBook.write``.
+
+    ## Example
+    ```
+    OpeningBook.write("aperturas.qob", book_from_archives(["torneo.qma"], max_ply=6))
+    book = OpeningBook("aperturas.qob")
+    move = book.probe(game)  # pieza o celda, None si la posición no está
+    ```
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        check_header(filepath, MAGIC_BOOK, BOOK_DTYPE.itemsize, "opening book")
+        with open(filepath, "rb") as f:
+            f.seek(0, 2)
+            n = (f.tell() - HEADER_SIZE) // BOOK_DTYPE.itemsize
+        if n:
+            self.entries = np.memmap(filepath, dtype=BOOK_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n,))
+        else:
+            self.entries = np.zeros(0, dtype=BOOK_DTYPE)
+        self._hashes = self.entries["hash"]
+        # Resultados de ``probe_state`` por estado sin canonizar: las aperturas se repiten
+        self._cache: dict[tuple, int | None] = {}
+        self.max_cache = 1 << 16
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def write(filepath: str, entries: np.ndarray):
+        """Escribe un libro con las entradas ``BOOK_DTYPE`` dadas (un hash por entrada)."""
+        entries = entries[np.argsort(entries["hash"], kind="stable")]
+        with open(filepath, "wb") as f:
+            write_header(f, MAGIC_BOOK, BOOK_DTYPE.itemsize)
+            f.write(entries.tobytes())
+
+    # ####################################################################
+    def lookup(self, key: int) -> np.void | None:
+        """Entrada del hash ``key``, None si no está."""
+        if not len(self.entries):
+            return None
+        i = int(np.searchsorted(self._hashes, np.uint64(key)))
+        if i < len(self.entries) and self._hashes[i] == key:
+            return self.entries[i]
+        return None
+
+    def probe(self, game) -> int | None:
+        """Jugada del libro para el estado actual de un ``QuartoGame``.
+
+        ## Return
+        Índice de la pieza a entregar (fase de selección) o de la celda donde colocar
+        (fase de colocación), o None si la posición no está en el libro.
+        """
+        return self.probe_state(SearchState.from_game(game))
+
+    def probe_state(self, state: SearchState) -> int | None:
+        """Como ``probe``, sobre un ``SearchState``."""
+        if len(self.entries) == 0:
+            return None
+        board = state.board
+        selected = EMPTY if state.pick else board.selected
+        raw = (board.occupied, *board.planes, board.remaining, selected, state.pick, state.mode_2x2)
+        if raw in self._cache:
+            return self._cache[raw]
+
+        key, symmetry = canonical_key(
+            board.occupied, board.planes, board.remaining, selected, state.pick, state.mode_2x2
+        )
+        entry = self.lookup(key)
+        move = None
+        if entry is not None:
+            move = int(entry["move"])
+            if state.pick:
+                move = symmetry.piece_inverse(move)
+                move = move if board.remaining >> move & 1 else None
+            else:
+                move = symmetry.cell_inverse(move)
+                move = move if not board.occupied >> move & 1 else None
+
+        if len(self._cache) >= self.max_cache:
+            self._cache.clear()
+        self._cache[raw] = move
+        return move
+
+
+# ####################################################################
+def book_from_archives(
+    archives: list[str | MatchArchive],
+    max_ply: int = 6,
+    min_visits: int = 10,
+    mode_2x2: bool = False,
+) -> np.ndarray:
+    """Entradas de libro con las estadísticas de partidas guardadas.
+
+    Para cada posición de las primeras ``max_ply`` jugadas se elige la jugada
+    canónica con mayor puntuación media entre las jugadas al menos ``min_visits``
+    veces (a igual puntuación, la más jugada). Solo se usan las partidas del modo dado.
+
+    ## Return
+    np.ndarray ``BOOK_DTYPE``
+    """
+    cell_perms = CELL_PERMUTATIONS_2X2 if mode_2x2 else CELL_PERMUTATIONS
+    hashes, moves, scores = [], [], []
+    for archive in archives:
+        if isinstance(archive, str):
+            archive = MatchArchive(archive)
+        matches = archive.matches
+        matches = matches[matches["mode_2x2"] == mode_2x2]
+        if len(matches) == 0:
+            continue
+        offsets = matches["offset"].astype(np.int64)
+        lengths = matches["n_moves"].astype(np.int64)
+        # Solo los primeros ``max_ply`` movimientos de cada partida
+        clipped = np.minimum(lengths, max_ply)
+        idx = np.concatenate([np.arange(o, o + n) for o, n in zip(offsets, clipped)])
+        records = archive.moves[idx]
+        starts = np.concatenate([[0], np.cumsum(clipped)[:-1]])
+
+        # La posición tras el último movimiento recortado queda fuera, como la final
+        cells, pieces, pick, mover, move_idx = decision_positions(records, starts, clipped)
+        keys, b, t = canonical_keys(encode_boards(cells), pieces, mode_2x2)
+
+        played = np.where(pick, records["piece"][move_idx], records["position"][move_idx]).astype(np.int64)
+        canonical = np.where(pick, PIECE_PERMUTATIONS[t, played], cell_perms[b, played])
+        match_of = np.repeat(np.arange(len(matches)), clipped)[move_idx]
+        result = matches["result"][match_of].astype(np.int64)
+        score = np.where(result == 0, 0.5, (result == mover).astype(np.float64))
+
+        hashes.append(zobrist_hashes(keys, pick, mode_2x2))
+        moves.append(canonical)
+        scores.append(score)
+
+    if not hashes:
+        return np.zeros(0, dtype=BOOK_DTYPE)
+    h, m, s = np.concatenate(hashes), np.concatenate(moves), np.concatenate(scores)
+
+    # Estadísticas por (posición, jugada)
+    pairs, inverse, visits = np.unique(
+        np.stack([h, m.astype(np.uint64)], axis=1), axis=0, return_inverse=True, return_counts=True
+    )
+    mean = np.bincount(inverse.ravel(), weights=s) / visits
+    ok = visits >= min_visits
+    pairs, visits, mean = pairs[ok], visits[ok], mean[ok]
+
+    # Mejor jugada por posición: orden por (hash, -score, -visits) y primera de cada hash
+    order = np.lexsort((-visits, -mean, pairs[:, 0]))
+    pairs, visits, mean = pairs[order], visits[order], mean[order]
+    first = np.flatnonzero(np.diff(pairs[:, 0], prepend=~pairs[:1, 0]))
+
+    entries = np.zeros(len(first), dtype=BOOK_DTYPE)
+    entries["hash"] = pairs[first, 0]
+    entries["move"] = pairs[first, 1]
+    entries["visits"] = visits[first]
+    entries["score"] = mean[first]
+    return entries
+
+
+def book_from_search(
+    search: Callable[[SearchState], int | None],
+    max_ply: int = 4,
+    mode_2x2: bool = False,
+) -> np.ndarray:
+    """Entradas de libro resolviendo cada posición con ``search``.
+
+    Recorre todas las posiciones de las primeras ``max_ply`` jugadas, una por clase de
+    simetría, y guarda la jugada que devuelve ``search`` (por ejemplo
+    ``MinimaxBot(time_budget_ms=10_000).best_move``). ``search`` debe dejar el estado
+    como lo recibe.
+
+    ## Return
+    np.ndarray ``BOOK_DTYPE``
+    """
+    entries = []
+    seen: set[int] = set()
+    frontier = [SearchState(BitBoard(), True, mode_2x2)]
+    for _ in range(max_ply):
+        next_frontier = []
+        for state in frontier:
+            board = state.board
+            selected = EMPTY if state.pick else board.selected
+            key, symmetry = canonical_key(
+                board.occupied, board.planes, board.remaining, selected, state.pick, mode_2x2
+            )
+            if key in seen:
+                continue
+            seen.add(key)
+
+            move = search(state)
+            if move is not None:
+                canonical = symmetry.piece(move) if state.pick else symmetry.cell(move)
+                entries.append((key, 0, 0.0, canonical, (0, 0, 0)))
+
+            for child_move in state.legal_moves():
+                child = state.copy()
+                if child.make_move(child_move):
+                    continue  # victoria: la partida termina
+                next_frontier.append(child)
+        frontier = next_frontier
+    return np.array(entries, dtype=BOOK_DTYPE)
@@ -23,7 +23,20 @@ class Hole(Enum):
 
 
 class Piece:
-    def __init__(self, size, coloration, shape, hole):
+    """Pieza del Quarto.
+
+    Solo existen 16 instancias, creadas una vez al importar el módulo (flyweight):
+    ``Piece(size, coloration, shape, hole)`` retorna siempre la misma instancia para
+    los mismos atributos. Las piezas son inmutables y guardan en caché su índice,
+    su vector de atributos y su one-hot (arrays de solo lectura). La igualdad y el
+    hash se basan en la identidad.
+    """
+
+    __slots__ = ("size", "coloration", "shape", "hole", "_index", "_vector", "_onehot")
+
+    _TABLE: list["Piece"] = []  # piezas internadas, ordenadas por índice
+
+    def __new__(cls, size, coloration, shape, hole):
         if not isinstance(size, Size):
             raise ValueError("size must be a Size enum")
         if not isinstance(coloration, Coloration):
@@ -33,10 +46,46 @@ class Piece:
         if not isinstance(hole, Hole):
             raise ValueError("hole must be a Hole enum")
 
-        self.coloration = coloration
-        self.shape = shape
-        self.size = size
-        self.hole = hole
+        idx = (
+            int(size == Size.TALL) << 3
+            | int(coloration == Coloration.WHITE) << 2
+            | int(shape == Shape.SQUARE) << 1
+            | int(hole == Hole.WITH)
+        )
+        if len(cls._TABLE) == 16:
+            return cls._TABLE[idx]
+
+        piece = super().__new__(cls)
+        _set = super(Piece, piece).__setattr__
+        _set("size", size)
+        _set("coloration", coloration)
+        _set("shape", shape)
+        _set("hole", hole)
+        _set("_index", idx)
+
+        vector = np.array(
+            [(idx >> 3) & 1, (idx >> 2) & 1, (idx >> 1) & 1, idx & 1], dtype=float
+        ).reshape((1, 4))
+        vector.flags.writeable = False
+        _set("_vector", vector)
+
+        onehot = np.zeros((16,), dtype=float)
+        onehot[idx] = 1.0
+        onehot.flags.writeable = False
+        _set("_onehot", onehot)
+        return piece
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Piece es inmutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (Piece.from_index, (self._index,))
 
     def __repr__(self, verbose=False):
         if verbose:
@@ -49,23 +98,17 @@ class Piece:
         """Convierte la pieza en un vector booleano de 4 dimensiones, donde cada dimensión representa una propiedad de la pieza.
 
         ## Return
-        np.array de (tamaño, color, forma y agujero).
+        np.array (1, 4) de solo lectura de (tamaño, color, forma y agujero).
         * Tamaño 0 = LITTLE, 1 = TALL
         * Color 0 = BEIGE, 1 = BROWN
         * Forma 0 = CIRCLE, 1 = SQUARE
         * Agujero 0 = WITHOUT_HOLE, 1 = WITH_HOLE
         """
-        v = [
-            1 if self.size == Size.TALL else 0,
-            1 if self.coloration == Coloration.WHITE else 0,
-            1 if self.shape == Shape.SQUARE else 0,
-            1 if self.hole == Hole.WITH else 0,
-        ]
-        return np.array(v, dtype=float).reshape((1, 4))
+        return self._vector
 
     def copy(self):
-        """Crea una copia de la pieza"""
-        return Piece(self.size, self.coloration, self.shape, self.hole)
+        """Las piezas son inmutables, retorna la misma instancia"""
+        return self
 
     # ####################################################################
     def index(self):
@@ -73,8 +116,7 @@ class Piece:
         ## Return
         ``index``: int [0, 15]
         """
-        vector = self.vectorize_onehot()
-        return np.argmax(vector)
+        return self._index
 
     # ####################################################################
     def vectorize_onehot(self) -> np.ndarray:
@@ -82,29 +124,16 @@ class Piece:
 
         ## Return
 
-        ``vector``: np.array (16, )
+        ``vector``: np.array (16, ) de solo lectura
         """
-        vector = np.zeros((2, 2, 2, 2), dtype=float)
-        vector[
-            int(self.size == Size.TALL),
-            int(self.coloration == Coloration.WHITE),
-            int(self.shape == Shape.SQUARE),
-            int(self.hole == Hole.WITH),
-        ] = 1.0
-        vector = vector.flatten()
-        return vector
+        return self._onehot
 
     def __eq__(self, other):
-        """Compara dos piezas para ver si son iguales.
-        Ignora las coordenadas (row, col) de la pieza."""
-        if isinstance(other, int):
-            return False
-        return (
-            self.size == other.size
-            and self.coloration == other.coloration
-            and self.shape == other.shape
-            and self.hole == other.hole
-        )
+        """Compara dos piezas por identidad (solo existe una instancia por pieza)."""
+        return self is other
+
+    def __hash__(self):
+        return self._index
 
     # ####################################################################
     @classmethod
@@ -124,16 +153,7 @@ class Piece:
         if not np.sum(vector) == 1:
             raise ValueError("vector must be one-hot encoded")
 
-        vector = vector.reshape((2, 2, 2, 2))
-
-        coords = np.argwhere(vector == 1)[0]
-        size = Size.LITTLE if coords[0] == 0 else Size.TALL
-        coloration = Coloration.BLACK if coords[1] == 0 else Coloration.WHITE
-        shape = Shape.CIRCLE if coords[2] == 0 else Shape.SQUARE
-        hole = Hole.WITHOUT if coords[3] == 0 else Hole.WITH
-
-        piece = cls(size, coloration, shape, hole)
-        return piece
+        return cls._TABLE[int(np.argmax(vector))]
 
     @classmethod
     # ####################################################################
@@ -141,17 +161,24 @@ class Piece:
         """Convierte un índice de pieza en una pieza.
         ## Parameters
         ``piece_idx``: int [0, 15]
-        ``rc_idx``: int [0, 15]
 
         ## Return
         ``piece``: Piece
         """
         if piece_idx < 0 or piece_idx > 15:
             raise ValueError("piece_idx must be between 0 and 15")
-
-        # Convertir el índice de pieza en un vector one-hot encoded
-        vector = np.zeros((16,), dtype=float)
-        vector[piece_idx] = 1.0
-        # Convertir el vector one-hot encoded en una pieza
-        piece = cls.from_onehot(vector)
-        return piece
+        return cls._TABLE[piece_idx]
+
+
+Piece._TABLE.extend(
+    sorted(
+        (
+            Piece(si, c, sh, h)
+            for si in Size
+            for c in Coloration
+            for sh in Shape
+            for h in Hole
+        ),
+        key=Piece.index,
+    )
+)
@@ -5,9 +5,11 @@ from ..models import BotAI
 
 import time
 import os
+import random
+import sys
+import numpy as np
 from colorama import Fore, Back, Style
 from os import path
-from tqdm.auto import tqdm
 
 from typing import Any
 from collections import defaultdict
@@ -28,6 +30,9 @@ def go_quarto(
     folder_bots: str = "bot/",
     builtin_bots: bool = False,
     mode_2x2: bool = True,
+    workers: int = 1,
+    seed: int | None = None,
+    latency: bool = False,
 ):
     """Inicia un torneo de Quarto entre dos bots.
     Args:
@@ -41,6 +46,9 @@ def go_quarto(
         folder_bots (str): Directorio donde se encuentran los scripts de los bots, default "bot/".
         builtin_bots (bool): Si True, usa bots integrados en lugar de scripts externos.
         match_dir (str): Directorio donde se guardarán las partidas, default "./partidas_guardadas/".
+        workers (int): Número de procesos. Con más de 1, cada proceso carga los bots con ``load_bot_class``.
+        seed (int | None): Semilla para que el torneo sea reproducible.
+        latency (bool): Si True, mide la latencia de cada jugada de los bots (ver ``play_games``).
     Returns:
         dict: Resultados del torneo con victorias de cada jugador y empates.
     """
@@ -57,18 +65,33 @@ def go_quarto(
         )
     
     # --- Player 1
-    player1_class = load_bot_class(path.join(folder_bots, f"{player1_file}.py"))
+    player1_path = path.join(folder_bots, f"{player1_file}.py")
     # Add model path if CNN bot
     if player1_file == "CNN_bot":
         params_p1['model_path'] = "quartopy/CHECKPOINTS/LOSS_APPROACHs_1212-2_only_select/20251212_2206-LOSS_APPROACHs_1212-2_only_select_E_1034.pt"
-    player1 = player1_class(**params_p1)
 
     # --- Player 2
-    player2_class = load_bot_class(path.join(folder_bots, f"{player2_file}.py"))
+    player2_path = path.join(folder_bots, f"{player2_file}.py")
     # Add model path if CNN bot
     if player2_file == "CNN_bot":
         params_p2['model_path'] = "quartopy/CHECKPOINTS/LOSS_APPROACHs_1212-2_only_select/20251212_2206-LOSS_APPROACHs_1212-2_only_select_E_1034.pt"
-    player2 = player2_class(**params_p2)
+
+    if workers > 1:
+        # Cada proceso carga sus propios bots
+        return play_games_parallel(
+            matches=matches,
+            player1=(player1_path, params_p1),
+            player2=(player2_path, params_p2),
+            workers=workers,
+            seed=seed,
+            delay=delay,
+            verbose=verbose,
+            mode_2x2=mode_2x2,
+            latency=latency,
+        )
+
+    player1 = load_bot_class(player1_path)(**params_p1)
+    player2 = load_bot_class(player2_path)(**params_p2)
 
     results = play_games(
         matches=matches,
@@ -77,6 +100,8 @@ def go_quarto(
         delay=delay,
         verbose=verbose,
         mode_2x2=mode_2x2,
+        seed=seed,
+        latency=latency,
     )
     return results
 
@@ -90,6 +115,12 @@ def play_games(
     PROGRESS_MESSAGE: str = "Playing matches...",
     save_match: bool = True,
     mode_2x2: bool = True,
+    batch_size: int = 1,
+    workers: int = 1,
+    seed: int | None = None,
+    match_archive: str | None = None,
+    position_index: str | None = None,
+    latency: bool = False,
 ):
     """Juega un torneo de Quarto entre dos jugadores.
     Args:
@@ -102,17 +133,86 @@ def play_games(
         * save_match (bool): Si True, guarda el historial de cada partida en CSV.
                     NOTA: Legacy code, ya no se puede usar en entrenamiento.
         * mode_2x2 (bool): Si True, activa el modo de victoria 2x2.
+        * batch_size (int): Número de partidas que se juegan a la vez, avanzando un turno
+                    en todas en cada paso. Antes de cada paso, cada bot recibe en
+                    ``prepare_batch`` las partidas en las que juega, de modo que una sola
+                    inferencia sirve a todas. Con 1 las partidas se juegan una a una.
+        * workers (int): Número de procesos entre los que se reparten las partidas. Cada
+                    proceso recibe una copia de los bots (deben poder serializarse con
+                    pickle). Ver ``play_games_parallel``.
+        * seed (int | None): Semilla de ``random``, ``numpy`` y ``torch`` para que el
+                    torneo sea reproducible.
+        * match_archive (str | None): Ruta de un ``MatchArchive``. Si se da, con
+                    ``save_match`` las partidas se añaden a ese archivo binario en
+                    lugar de exportarse a CSV.
+        * position_index (str | None): Ruta de un ``PositionIndex``. Si se da, con
+                    ``save_match`` las posiciones de las partidas se añaden al índice.
+        * latency (bool): Si True, registra en un ``LatencyRecorder`` el tiempo, los
+                    intentos y los contadores del motor de cada jugada de los bots.
     Returns:
         * matches_data (list): Lista de diccionarios con resultados de cada partida.
         * win_rate (dict): Diccionario con conteo de victorias por jugador y empates.
+        * recorder (LatencyRecorder): Solo con ``latency``. ``recorder.summary()`` da
+                    los percentiles p50/p95/p99 por bot y fase, ``recorder.report()``
+                    la tabla.
     """
 
     # counter of wins and ties
     win_rate: dict[str, int] = defaultdict(lambda: 0)
 
+    if workers > 1:
+        return play_games_parallel(
+            matches=matches,
+            player1=player1,
+            player2=player2,
+            workers=workers,
+            seed=seed,
+            delay=delay,
+            verbose=verbose,
+            PROGRESS_MESSAGE=PROGRESS_MESSAGE,
+            save_match=save_match,
+            mode_2x2=mode_2x2,
+            batch_size=batch_size,
+            match_archive=match_archive,
+            position_index=position_index,
+            latency=latency,
+        )
+    if seed is not None:
+        _seed_everything(seed)
+    from tqdm.auto import tqdm
+
+    recorder = None
+    if latency:
+        from .latency import LatencyRecorder
+
+        recorder = LatencyRecorder()
+
     # list by match
     matches_data: list[dict[str, Any]] = []
 
+    if batch_size > 1:
+        games = _play_lockstep(
+            matches,
+            player1,
+            player2,
+            delay=delay,
+            verbose=verbose,
+            PROGRESS_MESSAGE=PROGRESS_MESSAGE,
+            mode_2x2=mode_2x2,
+            batch_size=batch_size,
+            recorder=recorder,
+        )
+        for match, game in enumerate(games, start=1):
+            if save_match and match_archive is None:
+                game.export_history_to_csv(match_number=match)
+            win_rate[game.winner_pos] += 1
+            matches_data.append(game.to_dict)
+        if save_match:
+            _save_matches(matches_data, mode_2x2, match_archive, position_index)
+        if latency:
+            return matches_data, win_rate, recorder
+        return matches_data, win_rate
+
     for match in tqdm(
         range(1, matches + 1),
         desc=PROGRESS_MESSAGE,
@@ -122,7 +222,9 @@ def play_games(
         leave=False,
     ):
 
-        game = QuartoGame(player1=player1, player2=player2, mode_2x2=mode_2x2)
+        game = QuartoGame(
+            player1=player1, player2=player2, mode_2x2=mode_2x2, recorder=recorder
+        )
         # -------- PLAYING
         while not game.player_won and not game.game_board.is_full():
             game.play_turn()
@@ -135,11 +237,295 @@ def play_games(
         if verbose:
             game.display_end()
         # Aftermath
-        if save_match:
+        if save_match and match_archive is None:
             # Exportar historial con número de match
             game.export_history_to_csv(match_number=match)
 
         win_rate[game.winner_pos] += 1
         matches_data.append(game.to_dict)
 
+    if save_match:
+        _save_matches(matches_data, mode_2x2, match_archive, position_index)
+    if latency:
+        return matches_data, win_rate, recorder
+    return matches_data, win_rate
+
+
+def _save_matches(
+    matches_data: list[dict[str, Any]],
+    mode_2x2: bool,
+    match_archive: str | None,
+    position_index: str | None,
+):
+    """Añade las partidas al archivo binario y al índice de posiciones, si se dan."""
+    if match_archive is not None:
+        from .match_archive import MatchArchive
+
+        MatchArchive(match_archive).extend(matches_data, mode_2x2)
+    if position_index is not None:
+        from .position_index import PositionIndex
+
+        PositionIndex(position_index).update(matches_data, mode_2x2)
+
+
+def _play_lockstep(
+    matches: int,
+    player1: BotAI,
+    player2: BotAI,
+    delay: float = 0,
+    verbose: bool = True,
+    PROGRESS_MESSAGE: str = "Playing matches...",
+    mode_2x2: bool = True,
+    batch_size: int = 64,
+    recorder=None,
+) -> list[QuartoGame]:
+    """Juega ``matches`` partidas de ``batch_size`` en ``batch_size``, avanzando un
+    turno en todas las partidas activas en cada paso. Con ``recorder`` también se
+    mide cada ``prepare_batch``.
+    Returns:
+        * games (list): Partidas terminadas, en orden de número de partida.
+    """
+    players = [player1] if player1 is player2 else [player1, player2]
+    active: dict[int, QuartoGame] = {}
+    finished: dict[int, QuartoGame] = {}
+    next_match = 1
+    from tqdm.auto import tqdm
+
+    with tqdm(
+        total=matches,
+        desc=PROGRESS_MESSAGE,
+        mininterval=0.3,
+        miniters=1,
+        position=0,
+        leave=False,
+    ) as progress:
+        while active or next_match <= matches:
+            while len(active) < batch_size and next_match <= matches:
+                active[next_match] = QuartoGame(
+                    player1=player1, player2=player2, mode_2x2=mode_2x2, recorder=recorder
+                )
+                next_match += 1
+
+            # Una sola inferencia por bot para todas sus partidas
+            for player in players:
+                waiting = [
+                    game
+                    for game in active.values()
+                    if game.get_current_player() is player
+                ]
+                if waiting and recorder is not None:
+                    recorder.time_batch(player, waiting)
+                elif waiting:
+                    player.prepare_batch(waiting)
+
+            for match, game in list(active.items()):
+                game.play_turn()
+                if verbose:
+                    game.display_boards()
+                game.cambiar_turno()
+
+                if game.player_won or game.game_board.is_full():
+                    if verbose:
+                        game.display_end()
+                    finished[match] = active.pop(match)
+                    progress.update()
+
+            if delay > 0:
+                time.sleep(delay)
+
+    return [finished[match] for match in range(1, matches + 1)]
+
+
+# ####################################################################
+# Torneos en paralelo
+# Un jugador se indica como instancia de ``BotAI`` o como ``(ruta_del_script, params)``.
+BotSpec = BotAI | tuple[str, dict]
+
+# Bots del proceso actual, creados una sola vez por ``_init_worker``
+_worker_players: tuple[BotAI, BotAI] | None = None
+
+
+def _seed_everything(seed: int):
+    """Fija la semilla de ``random``, ``numpy`` y, si ya está cargado, ``torch``."""
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    if "torch" in sys.modules:
+        sys.modules["torch"].manual_seed(seed)
+
+
+def _make_player(spec: BotSpec) -> BotAI:
+    if isinstance(spec, BotAI):
+        return spec
+    file_path, params = spec
+    return load_bot_class(file_path)(**params)
+
+
+def _init_worker(player1: BotSpec, player2: BotSpec):
+    global _worker_players
+    _worker_players = (_make_player(player1), _make_player(player2))
+
+
+def _play_shard(
+    shard: int,
+    match_numbers: list[int],
+    seed: int | None,
+    delay: float,
+    verbose: bool,
+    save_match: bool,
+    mode_2x2: bool,
+    batch_size: int,
+    latency: bool = False,
+):
+    """Juega las partidas ``match_numbers`` con los bots del proceso.
+    Returns:
+        * Lista de ``(match, to_dict, winner_pos)`` por partida.
+        * ``LatencyRecorder`` de las partidas si ``latency``, si no None.
+    """
+    assert _worker_players is not None, "Worker not initialized"
+    player1, player2 = _worker_players
+    if seed is not None:
+        _seed_everything(seed + shard)
+    recorder = None
+    if latency:
+        from .latency import LatencyRecorder
+
+        recorder = LatencyRecorder()
+
+    if batch_size > 1:
+        games = _play_lockstep(
+            len(match_numbers),
+            player1,
+            player2,
+            delay=delay,
+            verbose=verbose,
+            mode_2x2=mode_2x2,
+            batch_size=batch_size,
+            recorder=recorder,
+        )
+    else:
+        games = []
+        for _ in match_numbers:
+            game = QuartoGame(
+                player1=player1, player2=player2, mode_2x2=mode_2x2, recorder=recorder
+            )
+            while not game.player_won and not game.game_board.is_full():
+                game.play_turn()
+                if verbose:
+                    game.display_boards()
+                if delay > 0:
+                    time.sleep(delay)
+                game.cambiar_turno()
+            if verbose:
+                game.display_end()
+            games.append(game)
+
+    results = []
+    for match, game in zip(match_numbers, games):
+        if save_match:
+            game.export_history_to_csv(match_number=match)
+        results.append((match, game.to_dict, game.winner_pos))
+    return results, recorder
+
+
+def play_games_parallel(
+    matches: int,
+    player1: BotSpec,
+    player2: BotSpec,
+    workers: int = os.cpu_count() or 1,
+    seed: int | None = None,
+    delay: float = 0,
+    verbose: bool = False,
+    PROGRESS_MESSAGE: str = "Playing matches...",
+    save_match: bool = True,
+    mode_2x2: bool = True,
+    batch_size: int = 1,
+    match_archive: str | None = None,
+    position_index: str | None = None,
+    latency: bool = False,
+):
+    """Juega un torneo repartiendo las partidas entre ``workers`` procesos.
+
+    Las partidas se dividen en ``workers`` bloques consecutivos. Cada proceso crea sus
+    bots una sola vez al arrancar (con ``load_bot_class`` si se dan como
+    ``(ruta_del_script, params)``) y el bloque ``i`` se juega con la semilla
+    ``seed + i``, así que el resultado no depende de qué proceso juega cada bloque.
+    Args:
+        * player1, player2 (BotAI | tuple[str, dict]): Instancia del bot o
+                    ``(ruta_del_script, params)``.
+        * workers (int): Número de procesos.
+        * El resto como en ``play_games``.
+    Returns:
+        * matches_data (list), win_rate (dict) y, con ``latency``, el ``LatencyRecorder``
+                    con las jugadas de todos los procesos, en el mismo formato y orden
+                    que ``play_games``.
+    """
+    workers = max(1, min(workers, matches))
+    match_numbers = list(range(1, matches + 1))
+    size, extra = divmod(matches, workers)
+    shards, start = [], 0
+    for i in range(workers):
+        end = start + size + (i < extra)
+        shards.append(match_numbers[start:end])
+        start = end
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from tqdm.auto import tqdm
+
+    collected: dict[int, tuple[dict[str, Any], str]] = {}
+    shard_recorders: dict[int, Any] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(player1, player2),
+    ) as executor:
+        futures = {
+            executor.submit(
+                _play_shard,
+                shard,
+                numbers,
+                seed,
+                delay,
+                verbose,
+                save_match and match_archive is None,
+                mode_2x2,
+                batch_size,
+                latency,
+            ): shard
+            for shard, numbers in enumerate(shards)
+        }
+        with tqdm(
+            total=matches,
+            desc=PROGRESS_MESSAGE,
+            mininterval=0.3,
+            position=0,
+            leave=False,
+        ) as progress:
+            for future in as_completed(futures):
+                results, shard_recorder = future.result()
+                for match, data, winner_pos in results:
+                    collected[match] = (data, winner_pos)
+                    progress.update()
+                shard_recorders[futures[future]] = shard_recorder
+
+    recorder = None
+    if latency:
+        from .latency import LatencyRecorder
+
+        # Se juntan en orden de bloque, no de llegada, como las jugadas de play_games
+        recorder = LatencyRecorder()
+        for shard in range(len(shards)):
+            recorder.merge(shard_recorders[shard])
+
+    win_rate: dict[str, int] = defaultdict(lambda: 0)
+    matches_data: list[dict[str, Any]] = []
+    for match in match_numbers:
+        data, winner_pos = collected[match]
+        win_rate[winner_pos] += 1
+        matches_data.append(data)
+
+    if save_match:
+        # Solo escribe el proceso principal
+        _save_matches(matches_data, mode_2x2, match_archive, position_index)
+    if latency:
+        return matches_data, win_rate, recorder
     return matches_data, win_rate
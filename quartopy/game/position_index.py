@@ -0,0 +1,293 @@
+"""Índice de posiciones canónicas de las partidas guardadas.
+
+Cada posición en la que un jugador tuvo que decidir (selección o colocación) se
+identifica con el hash de su forma canónica (``transposition.zobrist_hash`` de
+``symmetry.canonical_form``), por lo que las posiciones equivalentes por simetría
+comparten entrada. Para cada una se cuentan las visitas y el resultado final desde
+el punto de vista del jugador que movía.
+
+El archivo es una tabla ordenada por hash (``POSITION_DTYPE``, 24 bytes por entrada)
+que se consulta con búsqueda binaria sobre un ``np.memmap``. Las actualizaciones
+fusionan las posiciones nuevas con la tabla y la reescriben entera.
+"""
+
+import os
+from os import path
+
+import numpy as np
+
+from .augmentation import canonical_keys
+from .bitboard import EMPTY, N_CELLS, N_PIECES
+from .match_archive import (
+    PLACED,
+    RESULTS,
+    MatchArchive,
+    encode_boards,
+    move_records,
+    unpack_boards,
+)
+from .transposition import canonical_key, zobrist_hashes
+
+MAGIC = b"QPIX"
+VERSION = 1
+HEADER_SIZE = 16  # magic, versión, tamaño de registro y partidas indexadas
+
+POSITION_DTYPE = np.dtype(
+    [
+        ("hash", "<u8"),
+        ("visits", "<u4"),
+        ("wins", "<u4"),  # el jugador que movía ganó la partida
+        ("draws", "<u4"),
+        ("losses", "<u4"),
+    ]
+)
+_COUNTS = ("visits", "wins", "draws", "losses")
+
+
+# ####################################################################
+def position_hash(game) -> int:
+    """Hash canónico del estado actual de un ``QuartoGame``. Es el mismo para todos
+    los estados equivalentes por simetría. En la fase de selección se ignora
+    ``game.selected_piece``."""
+    board = game.to_bitboard()
+    selected = EMPTY if game.pick else board.selected
+    key, _ = canonical_key(
+        board.occupied, board.planes, board.remaining, selected, game.pick, game.mode_2x2
+    )
+    return key
+
+
+def position_hashes(
+    boards: np.ndarray, pieces: np.ndarray, pick: np.ndarray, mode_2x2: bool = False
+) -> np.ndarray:
+    """Versión vectorizada de ``position_hash``.
+
+    ## Parameters
+    ``boards``: (N, 16, 4, 4) codificación de ``Board.encode``.
+    ``pieces``: (N, 16) one-hot de la pieza seleccionada (ceros en la fase de selección).
+    ``pick``: (N,) True en la fase de selección.
+
+    ## Return
+    np.ndarray uint64 (N,)
+    """
+    keys, _, _ = canonical_keys(boards, pieces, mode_2x2)
+    return zobrist_hashes(keys, pick, mode_2x2)
+
+
+def decision_positions(
+    records: np.ndarray, starts: np.ndarray, lengths: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Posiciones de decisión de partidas completas: la inicial de cada partida y la
+    siguiente a cada movimiento salvo el último.
+
+    ## Parameters
+    ``records``: registros ``MOVE_DTYPE`` de partidas consecutivas.
+    ``starts``, ``lengths``: posición de cada partida en ``records`` y su número de movimientos.
+
+    ## Return
+    * ``cells``: np.ndarray int8 (N, 16) pieza en cada celda, -1 si está vacía.
+    * ``pieces``: np.ndarray bool (N, 16) one-hot de la pieza seleccionada.
+    * ``pick``: np.ndarray bool (N,) True en la fase de selección.
+    * ``mover``: np.ndarray int64 (N,) jugador que decide, 1 o 2.
+    * ``move``: np.ndarray int64 (N,) índice en ``records`` de la jugada que se hizo.
+    """
+    n = len(records)
+    is_last = np.zeros(n, dtype=bool)
+    is_last[starts + lengths - 1] = True
+    after = np.flatnonzero(~is_last)  # movimientos tras los que alguien decide
+
+    placed = records["action"][after] == PLACED
+    cells = unpack_boards(records["board"][after], records["occupied"][after])
+    pieces = np.zeros((len(after), N_PIECES), dtype=bool)
+    selecting = np.flatnonzero(~placed)
+    pieces[selecting, records["piece"][after][selecting]] = True
+    # Tras colocar mueve el mismo jugador; tras seleccionar, el rival
+    player = records["player"][after].astype(np.int64)
+    mover = np.where(placed, player, 3 - player)
+
+    # Posición inicial de cada partida: tablero vacío, selecciona el jugador 1
+    n_start = len(starts)
+    cells = np.concatenate([np.full((n_start, N_CELLS), -1, dtype=np.int8), cells])
+    pieces = np.concatenate([np.zeros((n_start, N_PIECES), dtype=bool), pieces])
+    pick = np.concatenate([np.ones(n_start, dtype=bool), placed])
+    mover = np.concatenate([np.ones(n_start, dtype=np.int64), mover])
+    move = np.concatenate([starts, after + 1]).astype(np.int64)
+    return cells, pieces, pick, mover, move
+
+
+def match_positions(
+    records: np.ndarray,
+    starts: np.ndarray,
+    lengths: np.ndarray,
+    results: np.ndarray,
+    mode_2x2: bool = False,
+) -> np.ndarray:
+    """Entradas de las posiciones de decisión (ver ``decision_positions``).
+
+    ## Parameters
+    ``results``: (n_matches,) 0 empate, 1 o 2 ganador. El resto como en ``decision_positions``.
+
+    ## Return
+    np.ndarray ``POSITION_DTYPE`` con una entrada por posición (``visits`` = 1), sin agregar.
+    """
+    cells, pieces, pick, mover, move = decision_positions(records, starts, lengths)
+    match_of = np.repeat(np.arange(len(starts)), lengths)
+    result = results[match_of[move]]
+
+    positions = np.zeros(len(pick), dtype=POSITION_DTYPE)
+    positions["hash"] = position_hashes(encode_boards(cells), pieces, pick, mode_2x2)
+    positions["visits"] = 1
+    positions["wins"] = result == mover
+    positions["draws"] = result == 0
+    positions["losses"] = (result != 0) & (result != mover)
+    return positions
+
+
+def aggregate(positions: np.ndarray) -> np.ndarray:
+    """Suma las entradas con el mismo hash. Devuelve una tabla ordenada por hash."""
+    if len(positions) == 0:
+        return np.zeros(0, dtype=POSITION_DTYPE)
+    positions = positions[np.argsort(positions["hash"], kind="stable")]
+    first = np.flatnonzero(np.diff(positions["hash"], prepend=~positions["hash"][:1]))
+    table = np.zeros(len(first), dtype=POSITION_DTYPE)
+    table["hash"] = positions["hash"][first]
+    for field in _COUNTS:
+        table[field] = np.add.reduceat(positions[field].astype(np.uint64), first)
+    return table
+
+
+# ####################################################################
+class PositionIndex:
+    """Tabla en disco de posiciones canónicas con visitas y resultados.
+
+    Sigue a un ``MatchArchive``: ``n_matches`` es el número de partidas del archivo ya
+    indexadas, y ``sync`` añade las que falten.
+
+    ## Parameters
+    ``filepath``: str ruta del índice. Se crea vacío si no existe.
+
+    ## Example
+    ```
+    index = PositionIndex("partidas_guardadas/torneo.qpi")
+    index.sync(MatchArchive("partidas_guardadas/torneo.qma"))
+    entry = index.lookup(position_hash(game))  # None si nunca se jugó
+    ```
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        if path.exists(filepath):
+            self._read_header()
+        else:
+            self._save(np.zeros(0, dtype=POSITION_DTYPE), 0)
+
+    def _read_header(self) -> int:
+        with open(self.filepath, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        version, size = np.frombuffer(header[4:8], dtype="<u2")
+        if header[:4] != MAGIC or version != VERSION or size != POSITION_DTYPE.itemsize:
+            raise ValueError(f"{self.filepath} is not a position index (version {VERSION})")
+        return int(np.frombuffer(header[8:16], dtype="<u8")[0])
+
+    def _save(self, table: np.ndarray, n_matches: int):
+        """Reescribe el índice. Se escribe en un archivo temporal y se reemplaza, así
+        que los lectores nunca ven un índice a medias."""
+        tmp = self.filepath + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.array([VERSION, POSITION_DTYPE.itemsize], dtype="<u2").tobytes())
+            f.write(np.array([n_matches], dtype="<u8").tobytes())
+            f.write(table.tobytes())
+        os.replace(tmp, self.filepath)
+
+    # ####################################################################
+    def __len__(self) -> int:
+        """Número de posiciones distintas."""
+        return (path.getsize(self.filepath) - HEADER_SIZE) // POSITION_DTYPE.itemsize
+
+    @property
+    def n_matches(self) -> int:
+        """Partidas indexadas."""
+        return self._read_header()
+
+    @property
+    def entries(self) -> np.ndarray:
+        """Tabla completa (``POSITION_DTYPE``) ordenada por hash, mapeada en memoria."""
+        n = len(self)
+        if n == 0:
+            return np.zeros(0, dtype=POSITION_DTYPE)
+        return np.memmap(self.filepath, dtype=POSITION_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n,))
+
+    def lookup_many(self, hashes) -> tuple[np.ndarray, np.ndarray]:
+        """Busca varios hashes.
+
+        ## Return
+        * ``found``: np.ndarray bool (n,).
+        * ``entries``: np.ndarray ``POSITION_DTYPE`` (n,), con ceros donde no se encontró.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        table = self.entries
+        out = np.zeros(len(hashes), dtype=POSITION_DTYPE)
+        if len(table) == 0:
+            return np.zeros(len(hashes), dtype=bool), out
+        idx = np.searchsorted(table["hash"], hashes).clip(0, len(table) - 1)
+        found = table["hash"][idx] == hashes
+        out[found] = table[idx[found]]
+        return found, out
+
+    def lookup(self, key: int) -> np.void | None:
+        """Entrada del hash ``key`` (ver ``position_hash``), None si no está."""
+        found, entries = self.lookup_many([key])
+        return entries[0] if found[0] else None
+
+    def __contains__(self, key: int) -> bool:
+        return self.lookup(key) is not None
+
+    # ####################################################################
+    def add_positions(self, positions: np.ndarray, n_new_matches: int = 0):
+        """Fusiona entradas ``POSITION_DTYPE`` (agregadas o no) con la tabla."""
+        n_matches = self.n_matches
+        table = np.array(self.entries)  # copia: el archivo se va a reemplazar
+        merged = aggregate(np.concatenate([table, positions]))
+        self._save(merged, n_matches + n_new_matches)
+
+    def update(self, matches: list[dict], mode_2x2: bool = False):
+        """Añade partidas en el formato de ``QuartoGame.to_dict``."""
+        if not matches:
+            return
+        all_records = [move_records(match["move_history"]) for match in matches]
+        lengths = np.array([len(r) for r in all_records], dtype=np.int64)
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        results = np.array([RESULTS[match["result"]] for match in matches], dtype=np.int64)
+        positions = match_positions(np.concatenate(all_records), starts, lengths, results, mode_2x2)
+        self.add_positions(positions, len(matches))
+
+    def sync(self, archive: MatchArchive, chunk_matches: int = 4096):
+        """Indexa las partidas de ``archive`` que todavía no lo están."""
+        first = self.n_matches
+        matches = archive.matches[first:]
+        if len(matches) == 0:
+            return
+        moves = archive.moves
+        parts = []
+        for begin in range(0, len(matches), chunk_matches):
+            chunk = matches[begin : begin + chunk_matches]
+            offsets = chunk["offset"].astype(np.int64)
+            lengths = chunk["n_moves"].astype(np.int64)
+            for mode in (False, True):
+                sel = np.flatnonzero(chunk["mode_2x2"] == mode)
+                if len(sel) == 0:
+                    continue
+                # Solo las partidas de este modo, reempaquetadas de forma contigua
+                idx = np.concatenate([np.arange(o, o + n) for o, n in zip(offsets[sel], lengths[sel])])
+                sub_lengths = lengths[sel]
+                sub_starts = np.concatenate([[0], np.cumsum(sub_lengths)[:-1]])
+                positions = match_positions(
+                    moves[idx],
+                    sub_starts,
+                    sub_lengths,
+                    chunk["result"][sel].astype(np.int64),
+                    mode,
+                )
+                parts.append(aggregate(positions))
+        self.add_positions(np.concatenate(parts), len(matches))
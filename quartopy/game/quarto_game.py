@@ -1,12 +1,22 @@
 from .board import Board
+from .bitboard import BitBoard
 from ..models.Bot import BotAI
 from .piece import Piece
 from ..utils.logger import logger
 
 from os import path, makedirs
 from datetime import datetime
+from time import perf_counter
 import csv
 from colorama import Fore, Back
+from typing import TYPE_CHECKING
+
+# ``latency`` y ``match_archive`` cargan numpy, así que aquí solo se importan para las
+# anotaciones; ``match_archive`` y ``position_index`` se importan dentro de los métodos
+# que los usan, para que crear y jugar partidas no pague ese coste
+if TYPE_CHECKING:
+    from .latency import LatencyRecorder
+    from .match_archive import MatchArchive
 
 
 logger.debug(f"{__name__} importado correctamente")
@@ -14,7 +24,13 @@ logger.debug(f"{__name__} importado correctamente")
 
 class QuartoGame:
 
-    def __init__(self, player1: BotAI, player2: BotAI, mode_2x2: bool = False):
+    def __init__(
+        self,
+        player1: BotAI,
+        player2: BotAI,
+        mode_2x2: bool = False,
+        recorder: "LatencyRecorder | None" = None,
+    ):
         self.MAX_TRIES = 16  # todos los intentos posibles
         self.TIE = "Tie"
         self.selected_piece: Piece | int = 0
@@ -34,6 +50,9 @@ class QuartoGame:
         self.valid_moves = []
         self.winner_pos: str = self.TIE
 
+        # Si se da, registra el tiempo de cada jugada de los bots (ver ``latency``)
+        self.recorder = recorder
+
     def get_current_player(self):
         return self.player1 if self.turn else self.player2
 
@@ -46,14 +65,22 @@ class QuartoGame:
 
     def play_turn(self):
         current_player = self.get_current_player()
+        recorder = self.recorder
+        if recorder is not None:
+            start = perf_counter()
 
         if self.pick:  # Selección de pieza
             valid_selection = False
             for n_tries in range(self.MAX_TRIES):
                 selected_piece: Piece = current_player.select(self, n_tries)
 
-                if coord := self.storage_board.find_piece(selected_piece):
-                    _r_storage, _c_storage = coord  # en storage_board
+                # En el storage la celda es el índice de la pieza
+                if isinstance(selected_piece, Piece) and (
+                    self.storage_board.occupancy >> selected_piece.index() & 1
+                ):
+                    _r_storage, _c_storage = divmod(
+                        selected_piece.index(), self.storage_board.cols
+                    )
                     valid_selection = True
                     break
                 logger.debug(
@@ -62,6 +89,8 @@ class QuartoGame:
 
             if not valid_selection:
                 raise ValueError(f"Invalid selection after {self.MAX_TRIES} tries")
+            if recorder is not None:
+                recorder.record(current_player, "select", perf_counter() - start, n_tries + 1)
 
             self.storage_board.remove_piece(_r_storage, _c_storage)
             self.selected_piece = selected_piece
@@ -101,6 +130,8 @@ class QuartoGame:
 
             if not valid_placement:
                 raise ValueError(f"Invalid selection after {self.MAX_TRIES} tries")
+            if recorder is not None:
+                recorder.record(current_player, "place", perf_counter() - start, n_tries + 1)
 
             self.game_board.put_piece(piece, row, col)
 
@@ -118,7 +149,7 @@ class QuartoGame:
             self.move_history.append(move_info)
 
             # Verificar ganador
-            if self.game_board.check_win(mode_2x2=self.mode_2x2):
+            if self.game_board.check_win(mode_2x2=self.mode_2x2)[0]:
                 self.match_result = current_player.name
                 self.winner_pos = self.player_turn
                 self.player_won = True
@@ -140,6 +171,18 @@ class QuartoGame:
             logger.error(f"Attempted to select piece {piece} not found in storage.")
             return False
 
+    def to_bitboard(self) -> BitBoard:
+        """Retorna el estado actual (tablero, piezas disponibles y pieza seleccionada)
+        como un ``BitBoard``."""
+        return BitBoard.from_game(self)
+
+    def canonical_hash(self) -> int:
+        """Hash de 64 bits del estado actual, igual para los estados equivalentes por
+        simetría. Ver ``quartopy.game.position_index``."""
+        from .position_index import position_hash
+
+        return position_hash(self)
+
     def cambiar_turno(self):
         """Cambia el turno y la fase del juego"""
         # Cambiar turno
@@ -204,6 +247,14 @@ class QuartoGame:
 
         return filepath
 
+    def export_history_to_archive(self, archive_path: str) -> "MatchArchive":
+        """Añade la partida a un ``MatchArchive`` (se crea si no existe)."""
+        from .match_archive import MatchArchive
+
+        archive = MatchArchive(archive_path)
+        archive.append(self.to_dict, mode_2x2=self.mode_2x2)
+        return archive
+
     def display_boards(self, exclude_footer: bool = False):
         """Muestra ambos tableros con formato mejorado"""
 
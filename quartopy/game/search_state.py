@@ -0,0 +1,95 @@
+"""Estado ligero para búsquedas con make/unmake.
+
+``SearchState`` aplica y revierte jugadas en el mismo objeto, sin copiar tableros,
+piezas, jugadores ni historial. Las jugadas son enteros: el índice de la pieza en la
+fase de selección y el índice de la celda en la fase de colocación.
+"""
+
+from .bitboard import BitBoard, EMPTY
+
+
+class SearchState:
+    """Estado de búsqueda sobre un ``BitBoard``.
+
+    ## Attributes
+    ``board``: BitBoard con el tablero, las piezas disponibles y la pieza seleccionada.
+    ``pick``: bool True en la fase de selección, False en la de colocación.
+    ``mode_2x2``: bool si los cuadrados 2x2 también ganan.
+    ``history``: list[int] jugadas aplicadas, para poder revertirlas.
+    """
+
+    __slots__ = ("board", "pick", "mode_2x2", "history")
+
+    def __init__(self, board: BitBoard, pick: bool, mode_2x2: bool = False):
+        self.board = board
+        self.pick = pick
+        self.mode_2x2 = mode_2x2
+        self.history: list[int] = []
+
+    @classmethod
+    def from_game(cls, game) -> "SearchState":
+        """Crea el estado de búsqueda a partir de un ``QuartoGame``.
+        En la fase de selección se ignora ``game.selected_piece``."""
+        board = BitBoard.from_game(game)
+        if game.pick:
+            board.selected = EMPTY
+        return cls(board, game.pick, game.mode_2x2)
+
+    def copy(self) -> "SearchState":
+        state = SearchState(self.board.copy(), self.pick, self.mode_2x2)
+        state.history = list(self.history)
+        return state
+
+    # ####################################################################
+    def legal_moves(self) -> list[int]:
+        """Piezas disponibles en la fase de selección, celdas vacías en la de colocación."""
+        if self.pick:
+            return self.board.valid_pieces()
+        return self.board.valid_moves()
+
+    def is_winning_move(self, cell: int) -> bool:
+        """True si colocar la pieza seleccionada en ``cell`` gana. No modifica el estado."""
+        board = self.board
+        board.place(cell, board.selected)
+        won = board.winning_line(cell, self.mode_2x2) != 0
+        board.unplace(cell)
+        return won
+
+    def make_move(self, move: int) -> bool:
+        """Aplica ``move`` y cambia de fase.
+
+        ## Return
+        True si la jugada es una colocación que forma una línea ganadora.
+        """
+        board = self.board
+        self.history.append(move)
+        if self.pick:
+            board.take(move)
+            self.pick = False
+            return False
+
+        board.place(move, board.selected)
+        board.selected = EMPTY
+        self.pick = True
+        return board.winning_line(move, self.mode_2x2) != 0
+
+    def unmake_move(self) -> int:
+        """Revierte la última jugada aplicada y la retorna."""
+        board = self.board
+        move = self.history.pop()
+        if self.pick:
+            # La última jugada fue una colocación
+            board.selected = board.cells[move]
+            board.unplace(move)
+            self.pick = False
+        else:
+            board.untake(move)
+            self.pick = True
+        return move
+
+    # ####################################################################
+    def is_full(self) -> bool:
+        return self.board.is_full()
+
+    def __repr__(self):
+        return f"SearchState({self.board}, pick={self.pick}, mode_2x2={self.mode_2x2})"
@@ -0,0 +1,263 @@
+"""Simetrías del Quarto y forma canónica de un estado.
+
+Dos estados son equivalentes si uno se obtiene del otro mediante:
+
+* Una permutación de las celdas que conserva las líneas ganadoras. Son 32 en el modo
+  clásico (D4 y las permutaciones interior/exterior de filas y columnas) y 8 (D4) en
+  ``mode_2x2``, porque también deben conservarse los cuadrados 2x2.
+* Un reetiquetado de los atributos de las piezas: una de las 4! permutaciones de
+  atributos combinada con uno de los 2^4 complementos.
+
+Las máscaras siguen la convención de ``quartopy.game.bitboard``.
+"""
+
+from itertools import permutations
+
+from .bitboard import (
+    ATTRIBUTE_PIECES,
+    N_ATTRIBUTES,
+    N_CELLS,
+    EMPTY,
+    iter_bits,
+    piece_attribute,
+)
+from .lines import LINES, SQUARES, ROWS, COLS
+
+
+# ####################################################################
+def _cell_permutation(row_perm, col_perm, transpose: bool) -> tuple[int, ...]:
+    if transpose:
+        return tuple(col_perm[c] * COLS + row_perm[r] for r in range(ROWS) for c in range(COLS))
+    return tuple(row_perm[r] * COLS + col_perm[c] for r in range(ROWS) for c in range(COLS))
+
+
+def permute_mask(mask: int, perm) -> int:
+    """Aplica la permutación de celdas ``perm`` (celda ``i`` -> ``perm[i]``) a ``mask``."""
+    out = 0
+    for cell in iter_bits(mask):
+        out |= 1 << perm[cell]
+    return out
+
+
+def _candidate_permutations() -> list[tuple[int, ...]]:
+    """Permutaciones de celdas generadas por filas, columnas y trasposición, sin repetir."""
+    found = {}
+    for transpose in (False, True):
+        for row_perm in permutations(range(ROWS)):
+            for col_perm in permutations(range(COLS)):
+                found.setdefault(_cell_permutation(row_perm, col_perm, transpose), None)
+    return list(found)
+
+
+def _board_symmetries(lines, candidates) -> tuple[tuple[int, ...], ...]:
+    """Permutaciones de ``candidates`` que conservan ``lines``, en el mismo orden."""
+    target = set(lines)
+    # Las diagonales y cuadrados (al final) descartan antes que filas y columnas
+    line_cells = [tuple(iter_bits(line)) for line in reversed(lines)]
+    return tuple(
+        perm
+        for perm in candidates
+        # Biyección: basta con que cada línea caiga en una línea
+        if all(sum(1 << perm[c] for c in cells) in target for cells in line_cells)
+    )
+
+
+# La identidad es siempre la primera; las del modo 2x2 son un subconjunto
+BOARD_SYMMETRIES: tuple[tuple[int, ...], ...] = _board_symmetries(LINES, _candidate_permutations())
+BOARD_SYMMETRIES_2X2: tuple[tuple[int, ...], ...] = _board_symmetries(LINES + SQUARES, BOARD_SYMMETRIES)
+
+
+def board_symmetries(mode_2x2: bool = False) -> tuple[tuple[int, ...], ...]:
+    """Permutaciones de celdas válidas para el modo de juego."""
+    return BOARD_SYMMETRIES_2X2 if mode_2x2 else BOARD_SYMMETRIES
+
+
+def _byte_tables(perm) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """Tablas para permutar una máscara de 16 bits con dos consultas de un byte."""
+    low, high = [0] * 256, [0] * 256
+    for b in range(1, 256):
+        # La tabla de ``b`` es la de ``b`` sin su bit más bajo más ese bit permutado
+        rest, lsb = b & (b - 1), (b & -b).bit_length() - 1
+        low[b] = low[rest] | 1 << perm[lsb]
+        high[b] = high[rest] | 1 << perm[lsb + 8]
+    return tuple(low), tuple(high)
+
+
+_MASK_TABLES = {perm: _byte_tables(perm) for perm in BOARD_SYMMETRIES}
+
+
+# ####################################################################
+ATTRIBUTE_PERMUTATIONS: tuple[tuple[int, ...], ...] = tuple(
+    permutations(range(N_ATTRIBUTES))
+)
+
+
+def transform_piece(piece_idx: int, order, flip: int) -> int:
+    """Reetiqueta la pieza ``piece_idx``.
+
+    El atributo ``k`` de la nueva pieza es el atributo ``order[k]`` de la original,
+    complementado si el bit ``order[k]`` de ``flip`` está encendido.
+    """
+    new_idx = 0
+    for k, a in enumerate(order):
+        bit = piece_attribute(piece_idx, a) ^ ((flip >> a) & 1)
+        new_idx |= bit << (N_ATTRIBUTES - 1 - k)
+    return new_idx
+
+
+def _piece_maps() -> dict[tuple, tuple[int, ...]]:
+    """Reetiquetado de las 16 piezas por (``order``, ``flip``). El complemento es un
+    XOR sobre la pieza sin complementar, así que basta una tabla por ``order``."""
+    maps = {}
+    for order in ATTRIBUTE_PERMUTATIONS:
+        base = [transform_piece(p, order, 0) for p in range(16)]
+        for flip in range(1 << N_ATTRIBUTES):
+            mask = transform_piece(0, order, flip)
+            maps[order, flip] = tuple(p ^ mask for p in base)
+    return maps
+
+
+# Reetiquetado de las 16 piezas por (``order``, ``flip``): ``PIECE_MAPS[order, flip][p]``
+PIECE_MAPS: dict[tuple, tuple[int, ...]] = _piece_maps()
+
+
+# ####################################################################
+class Symmetry:
+    """Transformación (celdas + atributos) que lleva un estado a su forma canónica."""
+
+    __slots__ = ("cell_perm", "cell_inv", "piece_map", "piece_inv")
+
+    def __init__(self, cell_perm, order, flip: int):
+        self.cell_perm: tuple[int, ...] = cell_perm
+        inv = [0] * N_CELLS
+        for i, j in enumerate(cell_perm):
+            inv[j] = i
+        self.cell_inv: tuple[int, ...] = tuple(inv)
+
+        self.piece_map: tuple[int, ...] = PIECE_MAPS[(tuple(order), flip)]
+        inv = [0] * 16
+        for i, j in enumerate(self.piece_map):
+            inv[j] = i
+        self.piece_inv: tuple[int, ...] = tuple(inv)
+
+    def cell(self, cell: int) -> int:
+        """Celda original -> celda canónica."""
+        return self.cell_perm[cell]
+
+    def cell_inverse(self, cell: int) -> int:
+        """Celda canónica -> celda original."""
+        return self.cell_inv[cell]
+
+    def piece(self, piece_idx: int) -> int:
+        """Pieza original -> pieza canónica."""
+        return self.piece_map[piece_idx]
+
+    def piece_inverse(self, piece_idx: int) -> int:
+        """Pieza canónica -> pieza original."""
+        return self.piece_inv[piece_idx]
+
+
+_SYMMETRY_CACHE: dict[tuple, "Symmetry"] = {}
+
+
+def get_symmetry(cell_perm, order, flip: int) -> Symmetry:
+    """``Symmetry`` compartida para la combinación dada (se crean una sola vez)."""
+    key = (cell_perm, order, flip)
+    symmetry = _SYMMETRY_CACHE.get(key)
+    if symmetry is None:
+        symmetry = _SYMMETRY_CACHE[key] = Symmetry(cell_perm, order, flip)
+    return symmetry
+
+
+def canonical_form(
+    occupied: int,
+    planes,
+    remaining: int,
+    selected: int = EMPTY,
+    mode_2x2: bool = False,
+) -> tuple[tuple[int, ...], Symmetry]:
+    """Forma canónica de un estado.
+
+    Entre las simetrías de tablero se conservan las que minimizan ``occupied``. Para
+    cada una, los atributos se complementan para que la pieza de la primera celda
+    ocupada (o la pieza seleccionada, con el tablero vacío) sea 0000 y se ordenan
+    por el valor de su plano y el número de piezas disponibles con el atributo.
+    Se elige la candidata con la tupla menor.
+
+    La elección es determinista, por lo que dos estados con la misma forma canónica
+    son siempre equivalentes.
+
+    ## Return
+    * ``canonical``: tupla ``(occupied, plane0..plane3, remaining, selected)``
+    * ``symmetry``: ``Symmetry`` que transforma el estado original en el canónico
+    """
+    best_occ = None
+    candidates = []
+    for perm in board_symmetries(mode_2x2):
+        low, high = _MASK_TABLES[perm]
+        occ = low[occupied & 0xFF] | high[occupied >> 8]
+        if best_occ is None or occ < best_occ:
+            best_occ = occ
+            candidates = [(perm, low, high)]
+        elif occ == best_occ:
+            candidates.append((perm, low, high))
+
+    occ = best_occ
+    ref_cell = occ & -occ
+    n_remaining = remaining.bit_count()
+    rem_counts = [(remaining & m).bit_count() for m in ATTRIBUTE_PIECES]
+
+    # Primera pasada: solo tablero. La fase de piezas disponibles se calcula para
+    # las candidatas empatadas.
+    best_planes = None
+    tied = []
+    for perm, low, high in candidates:
+        new_planes = [low[p & 0xFF] | high[p >> 8] for p in planes]
+
+        flip = 0
+        for a in range(N_ATTRIBUTES):
+            if occ:
+                bit = new_planes[a] & ref_cell
+            elif selected != EMPTY:
+                bit = piece_attribute(selected, a)
+            else:
+                bit = 0
+            if bit:
+                new_planes[a] ^= occ
+                flip |= 1 << a
+
+        keys = [
+            (
+                new_planes[a],
+                n_remaining - rem_counts[a] if flip >> a & 1 else rem_counts[a],
+                a,
+            )
+            for a in range(N_ATTRIBUTES)
+        ]
+        keys.sort()
+        order = tuple(k[2] for k in keys)
+        sorted_planes = tuple(k[0] for k in keys)
+
+        if best_planes is None or sorted_planes < best_planes:
+            best_planes = sorted_planes
+            tied = [(perm, order, flip)]
+        elif sorted_planes == best_planes:
+            tied.append((perm, order, flip))
+
+    best = None
+    best_args = None
+    for perm, order, flip in tied:
+        piece_map = PIECE_MAPS[(order, flip)]
+        new_remaining = 0
+        for p in iter_bits(remaining):
+            new_remaining |= 1 << piece_map[p]
+        new_selected = piece_map[selected] if selected != EMPTY else EMPTY
+        rest = (new_remaining, new_selected)
+        if best is None or rest < best:
+            best = rest
+            best_args = (perm, order, flip)
+        if len(tied) == 1:
+            break
+
+    perm, order, flip = best_args  # type: ignore
+    return (occ, *best_planes, *best), get_symmetry(perm, order, flip)  # type: ignore
@@ -0,0 +1,328 @@
+"""Tabla de transposición para las búsquedas sobre estados de Quarto.
+
+Las claves son hashes tipo Zobrist (XOR de claves aleatorias de 64 bits por cada
+bit encendido) de la forma canónica del estado (ver ``quartopy.game.symmetry``),
+por lo que posiciones equivalentes por simetría comparten entrada. Cada entrada
+guarda la profundidad, el valor, el tipo de cota y la mejor jugada en coordenadas
+canónicas.
+
+``SharedTranspositionTable`` tiene la misma interfaz en memoria compartida, para que
+varios procesos busquen sobre la misma tabla.
+"""
+
+import os
+import weakref
+from collections import OrderedDict
+from random import Random
+
+import numpy as np
+
+from .bitboard import EMPTY
+from .symmetry import Symmetry, canonical_form
+
+EXACT = 0
+LOWER = 1  # el valor es una cota inferior (fail-high)
+UPPER = 2  # el valor es una cota superior (fail-low)
+
+EVICTION_POLICIES = ("lru", "fifo", "depth")
+
+# ####################################################################
+# occupied, 4 planos y remaining: 6 máscaras de 16 bits, consultadas por bytes
+_N_MASKS = 6
+_rng = Random(0x51A770)
+
+
+def _build_zobrist():
+    tables = []
+    for _ in range(_N_MASKS):
+        bit_keys = [_rng.getrandbits(64) for _ in range(16)]
+        halves = []
+        for offset in (0, 8):
+            table = []
+            for b in range(256):
+                key = 0
+                for i in range(8):
+                    if b >> i & 1:
+                        key ^= bit_keys[offset + i]
+                table.append(key)
+            halves.append(tuple(table))
+        tables.append(tuple(halves))
+    return tuple(tables)
+
+
+_ZOBRIST_BYTES: tuple[tuple[tuple[int, ...], tuple[int, ...]], ...] = _build_zobrist()
+_ZOBRIST_SELECTED: tuple[int, ...] = tuple(_rng.getrandbits(64) for _ in range(16))
+_ZOBRIST_PICK: int = _rng.getrandbits(64)
+_ZOBRIST_2X2: int = _rng.getrandbits(64)
+
+# Las mismas claves como arrays, para ``zobrist_hashes``
+_ZOBRIST_TABLES = np.array(_ZOBRIST_BYTES, dtype=np.uint64)  # (6, 2, 256)
+_ZOBRIST_SELECTED_TABLE = np.array((0, *_ZOBRIST_SELECTED), dtype=np.uint64)  # EMPTY (-1) -> 0
+
+
+def zobrist_hash(state: tuple[int, ...], pick: bool, mode_2x2: bool = False) -> int:
+    """Hash de 64 bits de ``state`` = ``(occupied, plane0..plane3, remaining, selected)``.
+    ``pick`` indica la fase (True selección, False colocación)."""
+    h = 0
+    for i in range(_N_MASKS):
+        mask = state[i]
+        low, high = _ZOBRIST_BYTES[i]
+        h ^= low[mask & 0xFF] ^ high[mask >> 8]
+    if state[6] != EMPTY:
+        h ^= _ZOBRIST_SELECTED[state[6]]
+    if pick:
+        h ^= _ZOBRIST_PICK
+    if mode_2x2:
+        h ^= _ZOBRIST_2X2
+    return h
+
+
+def zobrist_hashes(keys: np.ndarray, pick: np.ndarray, mode_2x2: bool = False) -> np.ndarray:
+    """Versión vectorizada de ``zobrist_hash``.
+
+    ## Parameters
+    ``keys``: np.ndarray (N, 7) de estados ``(occupied, plane0..plane3, remaining, selected)``.
+    ``pick``: np.ndarray bool (N,), True en la fase de selección.
+
+    ## Return
+    np.ndarray uint64 (N,)
+    """
+    masks = keys[:, :_N_MASKS]
+    cols = np.arange(_N_MASKS)
+    h = np.bitwise_xor.reduce(
+        _ZOBRIST_TABLES[cols, 0, masks & 0xFF] ^ _ZOBRIST_TABLES[cols, 1, masks >> 8], axis=1
+    )
+    h ^= _ZOBRIST_SELECTED_TABLE[keys[:, 6] + 1]
+    h ^= np.where(pick, np.uint64(_ZOBRIST_PICK), np.uint64(0))
+    if mode_2x2:
+        h ^= np.uint64(_ZOBRIST_2X2)
+    return h
+
+
+def canonical_key(
+    occupied: int,
+    planes,
+    remaining: int,
+    selected: int,
+    pick: bool,
+    mode_2x2: bool = False,
+) -> tuple[int, Symmetry]:
+    """Clave Zobrist de la forma canónica y la simetría usada para obtenerla."""
+    state, symmetry = canonical_form(occupied, planes, remaining, selected, mode_2x2)
+    return zobrist_hash(state, pick, mode_2x2), symmetry
+
+
+# ####################################################################
+class TTEntry:
+    __slots__ = ("depth", "value", "flag", "move")
+
+    def __init__(self, depth: int, value: float, flag: int, move: int | None):
+        self.depth = depth
+        self.value = value
+        self.flag = flag  # EXACT, LOWER o UPPER
+        self.move = move  # celda o pieza en coordenadas canónicas
+
+
+class TranspositionTable:
+    """Tabla de transposición acotada a ``max_entries`` entradas.
+
+    ## Parameters
+    ``max_entries``: int número máximo de entradas.
+    ``policy``: str política de reemplazo cuando la tabla está llena:
+        * ``"lru"``: se descarta la entrada usada hace más tiempo.
+        * ``"fifo"``: se descarta la entrada más antigua.
+        * ``"depth"``: entre las ``sample`` entradas más antiguas se descarta la de
+          menor profundidad. Además, una entrada solo se sobrescribe con otra de
+          profundidad igual o mayor.
+    """
+
+    def __init__(self, max_entries: int = 1 << 18, policy: str = "lru", sample: int = 8):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"policy must be one of {EVICTION_POLICIES}")
+        assert max_entries > 0, "max_entries must be positive"
+
+        self.max_entries = max_entries
+        self.policy = policy
+        self.sample = sample
+        self._table: OrderedDict[int, TTEntry] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._table)
+
+    def __deepcopy__(self, memo):
+        # Es una caché compartida: copiar el estado del juego (y con él los bots)
+        # no debe duplicarla.
+        return self
+
+    def __contains__(self, key: int):
+        return key in self._table
+
+    def clear(self):
+        self._table.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key: int) -> TTEntry | None:
+        entry = self._table.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == "lru":
+            self._table.move_to_end(key)
+        return entry
+
+    def store(self, key: int, depth: int, value: float, flag: int, move: int | None):
+        old = self._table.get(key)
+        if old is not None:
+            if self.policy == "depth" and old.depth > depth:
+                return
+            old.depth, old.value, old.flag = depth, value, flag
+            if move is not None:
+                old.move = move
+            if self.policy == "lru":
+                self._table.move_to_end(key)
+            return
+
+        if len(self._table) >= self.max_entries:
+            self._evict()
+        self._table[key] = TTEntry(depth, value, flag, move)
+
+    def _evict(self):
+        if self.policy == "depth":
+            victim = None
+            for i, (key, entry) in enumerate(self._table.items()):
+                if victim is None or entry.depth < victim[1]:
+                    victim = (key, entry.depth)
+                if i + 1 >= self.sample:
+                    break
+            del self._table[victim[0]]  # type: ignore
+        else:
+            self._table.popitem(last=False)
+
+
+# ####################################################################
+_VALUE_OFFSET = 1 << 15
+
+
+def _release_shared_memory(shm, slots: memoryview, owner_pid: int | None):
+    slots.release()  # la memoria no se puede cerrar con vistas abiertas
+    shm.close()
+    if os.getpid() == owner_pid:
+        shm.unlink()
+
+
+class SharedTranspositionTable:
+    """Tabla de transposición en memoria compartida entre procesos, sin bloqueos.
+
+    Es una tabla hash de ``max_entries`` casillas (redondeado a potencia de dos)
+    indexada por los bits bajos de la clave. Cada casilla son dos enteros de 64 bits:
+    los datos empaquetados (valor, profundidad, tipo de cota y jugada) y la clave XOR
+    los datos, así una casilla a medio escribir por otro proceso no coincide con
+    ninguna clave y se ignora. Una entrada nueva reemplaza siempre a la de otra
+    posición, y a la de la misma posición salvo que esta tenga más profundidad.
+
+    Los valores deben ser enteros en [-32768, 32767], como los de ``MinimaxBot``.
+    Se pasa a otros procesos con pickle (se adjunta a la misma memoria); la memoria se
+    libera cuando el objeto del proceso que la creó se destruye o con ``close``.
+
+    ## Parameters
+    ``max_entries``: int número mínimo de casillas.
+    """
+
+    def __init__(self, max_entries: int = 1 << 18):
+        from multiprocessing import shared_memory
+
+        assert max_entries > 0, "max_entries must be positive"
+        self.max_entries = 1 << (max_entries - 1).bit_length()
+        self._mask = self.max_entries - 1
+        shm = shared_memory.SharedMemory(create=True, size=16 * self.max_entries)
+        self._attach(shm, os.getpid())
+
+        self.hits = 0
+        self.misses = 0
+
+    def _attach(self, shm, owner_pid: int | None):
+        """``owner_pid``: proceso que borra la memoria al liberarla, None en las copias."""
+        self._shm = shm
+        self._owner_pid = owner_pid
+        # Casilla i: [2 * i] clave XOR datos, [2 * i + 1] datos (0 si está vacía)
+        self._slots = shm.buf.cast("Q")
+        self._finalizer = weakref.finalize(
+            self, _release_shared_memory, shm, self._slots, owner_pid
+        )
+
+    def __getstate__(self):
+        return {"name": self._shm.name, "max_entries": self.max_entries}
+
+    def __setstate__(self, state):
+        from multiprocessing import shared_memory
+
+        self.max_entries = state["max_entries"]
+        self._mask = self.max_entries - 1
+        self._attach(shared_memory.SharedMemory(name=state["name"]), None)
+        self.hits = 0
+        self.misses = 0
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __len__(self):
+        import numpy as np
+
+        return int(np.count_nonzero(np.frombuffer(self._shm.buf, dtype=np.uint64)[1::2]))
+
+    def __contains__(self, key: int):
+        return self._read(key) is not None
+
+    def close(self):
+        """Suelta la memoria compartida (y la borra si este proceso la creó)."""
+        self._finalizer()
+
+    def clear(self):
+        self._shm.buf[:] = bytes(len(self._shm.buf))
+        self.hits = 0
+        self.misses = 0
+
+    # ####################################################################
+    def _read(self, key: int) -> int | None:
+        """Datos empaquetados de ``key``, None si no está."""
+        i = (key & self._mask) << 1
+        data = self._slots[i + 1]
+        if data and self._slots[i] ^ data == key:
+            return data
+        return None
+
+    def probe(self, key: int) -> TTEntry | None:
+        data = self._read(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        move = data >> 26 & 0x1F
+        return TTEntry(
+            data >> 16 & 0xFF,
+            (data & 0xFFFF) - _VALUE_OFFSET,
+            data >> 24 & 0x3,
+            move - 1 if move else None,
+        )
+
+    def store(self, key: int, depth: int, value: float, flag: int, move: int | None):
+        old = self._read(key)
+        if old is not None:
+            if old >> 16 & 0xFF > depth:
+                return
+            if move is None and old >> 26 & 0x1F:
+                move = (old >> 26 & 0x1F) - 1
+        data = (
+            (int(value) + _VALUE_OFFSET)
+            | depth << 16
+            | flag << 24
+            | (0 if move is None else move + 1) << 26
+        )
+        i = (key & self._mask) << 1
+        self._slots[i + 1] = data
+        self._slots[i] = key ^ data
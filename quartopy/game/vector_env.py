@@ -0,0 +1,174 @@
+"""Entorno vectorizado: ``K`` partidas de Quarto en arreglos de NumPy.
+
+Todas las partidas avanzan a la vez con ``step(actions)``, sin crear objetos por
+turno. Las convenciones son las de ``QuartoGame``:
+
+* Una partida empieza en la fase de selección con el turno del jugador 1.
+* Tras seleccionar, el turno pasa al rival, que coloca la pieza y luego selecciona.
+* Las acciones son índices: la pieza (``Piece.index()``) en la fase de selección y la
+  celda (``row * 4 + col``) en la de colocación.
+
+Los tableros se guardan con la codificación de ``Board.encode`` (one-hot de la pieza
+en cada celda), listos para los modelos.
+"""
+
+import numpy as np
+
+from .bitboard import N_CELLS, N_PIECES, PIECE_ATTRIBUTES
+from .lines import LINES, LINES_2X2, ROWS, COLS
+
+
+def _line_matrix(lines) -> np.ndarray:
+    """Líneas como matriz (n_lines, 16) de 0/1 sobre las celdas."""
+    return np.array(
+        [[line >> cell & 1 for cell in range(N_CELLS)] for line in lines],
+        dtype=np.int8,
+    )
+
+
+LINE_MATRIX = _line_matrix(LINES)
+LINE_MATRIX_2X2 = _line_matrix(LINES_2X2)
+
+
+class VectorQuartoEnv:
+    """``n_games`` partidas de Quarto simuladas en bloque.
+
+    ## Parameters
+    ``n_games``: int número de partidas ``K``.
+    ``mode_2x2``: bool si los cuadrados 2x2 también ganan.
+
+    ## Attributes
+    ``boards``: np.ndarray bool (K, 16, 4, 4) pieza (one-hot) en cada celda.
+    ``storage``: np.ndarray bool (K, 16) piezas todavía disponibles.
+    ``cell_piece``: np.ndarray int8 (K, 16) pieza en cada celda, -1 si está vacía.
+    ``selected``: np.ndarray int8 (K,) pieza seleccionada, -1 si no hay.
+    ``pick``: np.ndarray bool (K,) True en la fase de selección.
+    ``turn``: np.ndarray bool (K,) True si juega el jugador 1.
+    ``done``: np.ndarray bool (K,) partida terminada.
+    ``winner``: np.ndarray int8 (K,) 1 o 2 si ganó ese jugador, 0 si no hay ganador.
+    """
+
+    def __init__(self, n_games: int, mode_2x2: bool = False):
+        assert n_games > 0, "n_games must be positive"
+        self.n_games = n_games
+        self.mode_2x2 = mode_2x2
+        self._lines = LINE_MATRIX_2X2 if mode_2x2 else LINE_MATRIX
+
+        K = n_games
+        self.boards = np.zeros((K, N_PIECES, ROWS, COLS), dtype=bool)
+        self.storage = np.ones((K, N_PIECES), dtype=bool)
+        self.cell_piece = np.full((K, N_CELLS), -1, dtype=np.int8)
+        self.selected = np.full(K, -1, dtype=np.int8)
+        self.pick = np.ones(K, dtype=bool)
+        self.turn = np.ones(K, dtype=bool)
+        self.done = np.zeros(K, dtype=bool)
+        self.winner = np.zeros(K, dtype=np.int8)
+
+    # ####################################################################
+    def reset(self, mask: np.ndarray | None = None):
+        """Reinicia todas las partidas, o solo aquellas donde ``mask`` es True."""
+        idx = slice(None) if mask is None else np.asarray(mask, dtype=bool)
+        self.boards[idx] = False
+        self.storage[idx] = True
+        self.cell_piece[idx] = -1
+        self.selected[idx] = -1
+        self.pick[idx] = True
+        self.turn[idx] = True
+        self.done[idx] = False
+        self.winner[idx] = 0
+        return self.observe()
+
+    def observe(self) -> tuple[np.ndarray, np.ndarray]:
+        """Entradas de los modelos para cada partida.
+
+        ## Return
+        * ``x_board``: np.ndarray float32 (K, 16, 4, 4).
+        * ``x_piece``: np.ndarray float32 (K, 16) one-hot de la pieza a colocar, ceros
+          en la fase de selección.
+        """
+        x_piece = np.zeros((self.n_games, N_PIECES), dtype=np.float32)
+        placing = np.flatnonzero(~self.pick & ~self.done)
+        x_piece[placing, self.selected[placing]] = 1
+        return self.boards.astype(np.float32), x_piece
+
+    def empty_cells(self) -> np.ndarray:
+        """np.ndarray bool (K, 16), True en las celdas vacías."""
+        return self.cell_piece < 0
+
+    def legal_mask(self) -> np.ndarray:
+        """Acciones legales (K, 16): piezas disponibles en la fase de selección y celdas
+        vacías en la de colocación. Las partidas terminadas no tienen acciones."""
+        mask = np.where(self.pick[:, None], self.storage, self.empty_cells())
+        mask[self.done] = False
+        return mask
+
+    def random_actions(self, rng: np.random.Generator | None = None) -> np.ndarray:
+        """Una acción legal al azar por partida (-1 en las terminadas)."""
+        rng = rng or np.random.default_rng()
+        legal = self.legal_mask()
+        scores = np.where(legal, rng.random(legal.shape), -1.0)
+        actions = scores.argmax(axis=1)
+        actions[self.done] = -1
+        return actions
+
+    # ####################################################################
+    def step(self, actions) -> tuple[np.ndarray, np.ndarray]:
+        """Aplica una acción en cada partida no terminada.
+
+        ## Parameters
+        ``actions``: array (K,) de enteros. Se ignora en las partidas terminadas.
+
+        ## Return
+        * ``reward``: np.ndarray float32 (K,) 1 para el jugador que acaba de ganar con
+          su colocación, 0 en otro caso.
+        * ``done``: np.ndarray bool (K,) partidas terminadas (victoria o tablero lleno).
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        assert actions.shape == (self.n_games,), f"Expected {self.n_games} actions"
+        reward = np.zeros(self.n_games, dtype=np.float32)
+
+        live = ~self.done
+        act = np.where(live, actions, 0)
+        legal = self.legal_mask()
+        in_range = (act >= 0) & (act < N_CELLS)
+        bad = live & (~in_range | ~legal[np.arange(self.n_games), act.clip(0, N_CELLS - 1)])
+        if bad.any():
+            raise ValueError(f"Illegal actions in games {np.flatnonzero(bad).tolist()}")
+
+        picking = np.flatnonzero(live & self.pick)
+        placing = np.flatnonzero(live & ~self.pick)
+
+        # --- Selección: la pieza sale del almacenamiento y el turno pasa al rival
+        self.storage[picking, act[picking]] = False
+        self.selected[picking] = act[picking]
+        self.turn[picking] = ~self.turn[picking]
+        self.pick[picking] = False
+
+        # --- Colocación: el mismo jugador seleccionará después
+        if placing.size:
+            cells = act[placing]
+            pieces = self.selected[placing]
+            self.cell_piece[placing, cells] = pieces
+            self.boards[placing, pieces, cells // COLS, cells % COLS] = True
+            self.selected[placing] = -1
+            self.pick[placing] = True
+
+            won = self._check_win(placing)
+            full = (self.cell_piece[placing] >= 0).all(axis=1)
+            winners = placing[won]
+            reward[winners] = 1
+            self.winner[winners] = np.where(self.turn[winners], 1, 2)
+            self.done[placing[won | full]] = True
+
+        return reward, self.done.copy()
+
+    def _check_win(self, idx: np.ndarray) -> np.ndarray:
+        """True para las partidas ``idx`` con alguna línea ganadora."""
+        cell_piece = self.cell_piece[idx]
+        occupied = (cell_piece >= 0).astype(np.int8)  # (n, 16)
+        attributes = PIECE_ATTRIBUTES[cell_piece.clip(0)] * occupied[..., None]  # (n, 16, 4)
+
+        full = occupied @ self._lines.T == 4  # (n, L)
+        counts = np.einsum("nca,lc->nla", attributes, self._lines)  # (n, L, 4)
+        shared = ((counts == 4) | (counts == 0)).any(axis=2)
+        return (full & shared).any(axis=1)
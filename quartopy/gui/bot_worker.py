@@ -0,0 +1,57 @@
+"""Cálculo de las jugadas de los bots fuera del hilo de la interfaz.
+
+``GameBoard`` lanza cada jugada de un bot como un ``BotWorker`` en el
+``QThreadPool`` global y recibe el resultado por señales, que Qt entrega en el hilo
+principal. Cada petición lleva un número de generación: al reiniciar la partida o
+volver al menú se incrementa y los resultados que lleguen después se descartan.
+"""
+
+import time
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+
+
+class BotWorkerSignals(QObject):
+    """Señales de un ``BotWorker``. ``QRunnable`` no es un ``QObject`` y no puede emitirlas."""
+
+    # (generación, resultado de la jugada, segundos de cálculo)
+    finished = pyqtSignal(int, object, float)
+    # (generación, traza del error)
+    failed = pyqtSignal(int, str)
+
+
+class BotWorker(QRunnable):
+    """Ejecuta ``fn(*args)`` (``bot.select`` o ``bot.place_piece``) en un hilo del pool.
+
+    ## Parameters
+    ``generation``: int número de la petición, se devuelve con el resultado.
+    ``fn``: callable jugada del bot.
+    ``args``: argumentos de ``fn``.
+    """
+
+    def __init__(self, generation: int, fn, *args):
+        super().__init__()
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+        self.signals = BotWorkerSignals()
+
+    def cancel(self):
+        """Marca el trabajo como cancelado: si aún no empezó no se ejecuta y, si está
+        calculando, su resultado no se emite."""
+        self.cancelled = True
+
+    def run(self):
+        if self.cancelled:
+            return
+        start = time.perf_counter()
+        try:
+            result = self.fn(*self.args)
+        except Exception:
+            if not self.cancelled:
+                self.signals.failed.emit(self.generation, traceback.format_exc())
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(self.generation, result, time.perf_counter() - start)
@@ -1,4 +1,4 @@
-from asyncio.log import logger
+from quartopy.utils.logger import logger
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QGraphicsView, QGraphicsScene,
     QGraphicsRectItem, QMessageBox, QPushButton, QGraphicsPixmapItem,
@@ -6,20 +6,21 @@ from PyQt5.QtWidgets import (
     QDialog, QCheckBox
 )
 from PyQt5.QtGui import QPen, QColor, QPixmap, QPainter, QFont
-from PyQt5.QtCore import Qt, QRectF, QPointF, QTimer, pyqtSignal, QUrl
+from PyQt5.QtCore import Qt, QRectF, QPointF, QTimer, QThreadPool, pyqtSignal, QUrl
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent # Importacion para el sonido
 import sys 
 import math
 import os
+import time
 
 from quartopy.game.board import Board
 from quartopy.game.piece import Piece, Size, Coloration, Shape, Hole
 from quartopy.bot.human import Quarto_bot as HumanBot
 from quartopy.bot.random_bot import Quarto_bot as RandomBot
 from quartopy.bot.minimax_bot import MinimaxBot
-from quartopy.bot.CNN_bot import CNNBot
 from quartopy.models.Bot import BotAI
 from quartopy.game.quarto_game import QuartoGame
+from quartopy.gui.bot_worker import BotWorker
 
 # ================================================================
 # 🔷 Clase PieceItem (pieza movible con imagen)
@@ -538,6 +539,15 @@ class GameBoard(QWidget):
         self.create_turn_display() # This creates QGraphicsItems in self.scene
         self.create_player_info_display() # Added: Display player info
 
+        # --- Cálculo de los bots en segundo plano ---
+        # Un solo hilo: los bots no son thread-safe y una jugada cancelada que sigue
+        # calculando debe terminar antes de que empiece la siguiente
+        self.bot_pool = QThreadPool(self)
+        self.bot_pool.setMaxThreadCount(1)
+        self._bot_worker = None
+        self._bot_generation = 0 # Se incrementa al cancelar; descarta resultados viejos
+        self._bot_started_at = 0.0
+        self.create_thinking_display()
 
         # --- Common game logic setup ---
         def create_player(p_config, p_name):
@@ -554,8 +564,12 @@ class GameBoard(QWidget):
                 else: # Fallback, though weights_path should always be there for custom_bot
                     return actual_bot_class(name=p_name, model_class=model_class)
             elif p_type == 'minimax_bot':
-                return MinimaxBot(name=p_name)
+                # Piensa en segundo plano mientras el humano decide
+                return MinimaxBot(name=p_name, ponder=True)
             elif p_type == 'cnn_bot':
+                # torch y tensordict solo se cargan si se elige el bot CNN
+                from quartopy.bot.CNN_bot import CNNBot
+
                 return CNNBot(name=p_name)
             else:  # 'random_bot'
                 return RandomBot(name=p_name)
@@ -891,7 +905,7 @@ class GameBoard(QWidget):
         if 0 <= row < 4 and 0 <= col < 4:
             # Limpiar tablero lógico
             if not self.logic_board.is_empty(row, col):
-                self.logic_board.board[row][col] = 0
+                self.logic_board.clear_position(row, col)
             
             # Limpiar celda visual
             cell = self.cells[row][col]
@@ -1077,6 +1091,9 @@ class GameBoard(QWidget):
         cell.setBrush(QColor("#808080"))
 
     def reset_board(self):
+        # Descartar la jugada del bot que esté calculando
+        self.cancel_bot_turn()
+
         # Limpiar tablero lógico
         self.quarto_game = QuartoGame(
             player1=self.player1_instance, 
@@ -1192,20 +1209,94 @@ QDialogButtonBox {
     def _execute_bot_turn(self):
         """Ejecuta la lógica del turno del bot, manejando ambas fases (selección y colocación)."""
         print(f"[DEBUG] _execute_bot_turn - quarto_game.pick: {self.quarto_game.pick}")
-        
+        # Un temporizador de una partida anterior puede llegar con otra jugada en curso
+        if self.game_over or self.current_turn != "BOT" or self._bot_worker is not None:
+            return
+
         game = self.quarto_game
         current_player = game.get_current_player()
         
         print(f"[DEBUG] Current player type: {type(current_player)}")
         
-        # Determine if it's the current player's turn to pick or place
+        # El bot calcula en el pool y el resultado vuelve por señales al hilo de la interfaz
         if game.pick: # Bot needs to select a piece
-            self._bot_select_piece_for_opponent()
+            worker = BotWorker(self._bot_generation, current_player.select, game)
+            worker.signals.finished.connect(self._on_bot_selected)
         else: # Bot needs to place a piece
-            self._bot_place_piece()
-    
-    def _bot_place_piece(self):
-        """El bot coloca una pieza en el tablero"""
+            worker = BotWorker(self._bot_generation, current_player.place_piece, game, game.selected_piece)
+            worker.signals.finished.connect(self._on_bot_placed)
+        worker.signals.failed.connect(self._on_bot_failed)
+        self._bot_worker = worker
+        self.start_thinking_display()
+        self.bot_pool.start(worker)
+
+    def _take_bot_result(self, generation: int) -> bool:
+        """Retorna True si el resultado es de la jugada en curso y la da por terminada."""
+        if generation != self._bot_generation or self._bot_worker is None:
+            logger.debug(f"Discarding result of cancelled bot turn {generation}")
+            return False
+        self._bot_worker = None
+        self.stop_thinking_display()
+        return True
+
+    def _on_bot_selected(self, generation: int, piece, seconds: float):
+        if self._take_bot_result(generation):
+            logger.debug(f"Bot selected in {seconds:.2f} s")
+            self._bot_select_piece_for_opponent(piece)
+
+    def _on_bot_placed(self, generation: int, position, seconds: float):
+        if self._take_bot_result(generation):
+            logger.debug(f"Bot placed in {seconds:.2f} s")
+            self._bot_place_piece(*position)
+
+    def _on_bot_failed(self, generation: int, error: str):
+        if self._take_bot_result(generation):
+            logger.error(f"Bot failed:\n{error}")
+            self.end_game()
+
+    def cancel_bot_turn(self):
+        """Cancela la jugada del bot en curso: la que está en cola no se ejecuta y la
+        que está calculando termina en segundo plano sin aplicarse."""
+        if self._bot_worker is not None:
+            self._bot_worker.cancel()
+            self._bot_worker = None
+        self.bot_pool.clear()
+        self._bot_generation += 1
+        self.stop_thinking_display()
+        for player in (self.player1_instance, self.player2_instance):
+            if isinstance(player, MinimaxBot):
+                player.stop_pondering()
+
+    def create_thinking_display(self):
+        """Indicador de que el bot está pensando, con el tiempo transcurrido."""
+        self.thinking_text = QGraphicsSimpleTextItem("")
+        self.thinking_text.setFont(QFont("Arial", 11, QFont.Bold))
+        self.thinking_text.setBrush(QColor("#FFD700"))
+        self.thinking_text.setPos(500, 150)
+        self.thinking_text.hide()
+        self.scene.addItem(self.thinking_text)
+
+        self.thinking_timer = QTimer(self)
+        self.thinking_timer.setInterval(100)
+        self.thinking_timer.timeout.connect(self.update_thinking_display)
+
+    def start_thinking_display(self):
+        self._bot_started_at = time.perf_counter()
+        self.update_thinking_display()
+        self.thinking_text.show()
+        self.thinking_timer.start()
+
+    def stop_thinking_display(self):
+        self.thinking_timer.stop()
+        self.thinking_text.hide()
+
+    def update_thinking_display(self):
+        elapsed = time.perf_counter() - self._bot_started_at
+        name = self.quarto_game.get_current_player().name
+        self.thinking_text.setText(f"{name} está pensando... {elapsed:.1f} s")
+
+    def _bot_place_piece(self, row: int, col: int):
+        """Coloca en el tablero la pieza seleccionada en la celda que eligió el bot."""
         print("[DEBUG] _bot_place_piece")
         
         game = self.quarto_game
@@ -1224,9 +1315,7 @@ QDialogButtonBox {
             return
 
         # Bot coloca la pieza en el tablero
-        print(f"[DEBUG] Bot placing piece: {piece_to_place}")
-        row, col = game.get_current_player().place_piece(game, piece_to_place)
-        print(f"[DEBUG] Bot placed at: ({row}, {col})")
+        logger.debug(f"Bot placed {piece_to_place} at: ({row}, {col})")
         
         if self.try_place_piece_on_board(piece_item_to_place, row, col):
             piece_item_to_place.is_on_board = True
@@ -1297,16 +1386,13 @@ QDialogButtonBox {
     
 
     
-    def _bot_select_piece_for_opponent(self):
-        """El bot selecciona una pieza para el oponente y la coloca en container3"""
+    def _bot_select_piece_for_opponent(self, selected_piece_logic: Piece):
+        """Entrega al oponente la pieza que seleccionó el bot y la coloca en container3"""
         print("[DEBUG] _bot_select_piece_for_opponent")
         
         game = self.quarto_game
         current_bot = game.get_current_player()
         
-        # Bot selecciona una pieza
-        selected_piece_logic = current_bot.select(game)
-        
         # Actualizar el juego lógico
         if not game.select_and_remove_piece(selected_piece_logic):
             # Si la pieza seleccionada por el bot no se encuentra (error de lógica del bot), terminar el juego.
@@ -32,3 +32,26 @@ class BotAI(ABC):
         ``col``: int
         """
         pass
+
+    def prepare_batch(self, games: list["QuartoGame"]):  # type: ignore
+        """Se llama antes de cada paso de ``play_games`` con ``batch_size > 1`` con las
+        partidas en las que este bot juega el siguiente turno. Los bots que evalúan un
+        modelo pueden precalcular aquí todas las jugadas con una sola inferencia.
+        Por defecto no hace nada.
+        ## Parameters
+        ``games``: list[QuartoGame]
+        """
+        pass
+
+    def search_stats(self) -> dict[str, float]:
+        """Contadores del motor en la última llamada a ``select`` o ``place_piece``
+        (nodos buscados, simulaciones, inferencias...), para ``LatencyRecorder``.
+        Por defecto no informa ninguno.
+        """
+        return {}
+
+    def batch_stats(self) -> dict[str, float]:
+        """Contadores del motor en la última llamada a ``prepare_batch``, para
+        ``LatencyRecorder``. Por defecto no informa ninguno.
+        """
+        return {}
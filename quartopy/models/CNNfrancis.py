@@ -15,11 +15,11 @@ Python 3
 
 # Handle both relative and absolute imports for better compatibility
 try:
-    from .NN_abstract import NN_abstract
+    from .NN_abstract import NN_abstract, order_actions
 except ImportError:
     # Fallback for direct execution
     try:
-        from NN_abstract import NN_abstract
+        from NN_abstract import NN_abstract, order_actions
     except ImportError:
         # Alternative path resolution
         import sys
@@ -27,7 +27,7 @@ except ImportError:
 
         current_dir = Path(__file__).parent
         sys.path.insert(0, str(current_dir))
-        from NN_abstract import NN_abstract
+        from NN_abstract import NN_abstract, order_actions
 
 import torch
 import torch.nn as nn
@@ -132,6 +132,8 @@ class QuartoCNN(NN_abstract):
         x_piece: torch.Tensor,
         TEMPERATURE: float = 1.0,
         DETERMINISTIC: bool = True,
+        board_mask: torch.Tensor | None = None,
+        piece_mask: torch.Tensor | None = None,
     ):
         """
         Predicts the preferred order of the all the board positions and pieces, with optional ``TEMPERATURE`` for randomness.
@@ -141,6 +143,7 @@ class QuartoCNN(NN_abstract):
             ``x_piece``: Input tensor of shape (batch_size, 16).
             ``TEMPERATURE``: Sampling temperature (>0). Lower values make predictions more deterministic.
             ``DETERMINISTIC``: If True, use argmax instead of sampling.
+            ``board_mask``, ``piece_mask``: Optional bool tensors (batch_size, 16) of legal actions.
 
         Returns:
             * ``board_position``: Predicted idx board position (batch_size, 4, 4).
@@ -160,23 +163,6 @@ class QuartoCNN(NN_abstract):
         with torch.no_grad():
             qav_board, qav_piece = self.forward(x_board, x_piece)
 
-            # Use tanh outputs directly for deterministic prediction
-            if DETERMINISTIC:
-                board_indices = torch.argsort(qav_board, descending=True, dim=1)
-                piece_indices = torch.argsort(qav_piece, descending=True, dim=1)
-                return board_indices, piece_indices
-            else:
-                # For stochastic prediction, use softmax over tanh outputs and sample
-                board_probs = F.softmax(qav_board / TEMPERATURE, dim=1)
-                piece_probs = F.softmax(qav_piece / TEMPERATURE, dim=1)
-                board_indices = torch.multinomial(
-                    board_probs,
-                    board_probs.shape[1],  # all possible combinations
-                    replacement=False,
-                )
-                piece_indices = torch.multinomial(
-                    piece_probs,
-                    piece_probs.shape[1],  # all possible combinations
-                    replacement=False,
-                )
-                return board_indices, piece_indices
+            board_indices = order_actions(qav_board, board_mask, TEMPERATURE, DETERMINISTIC)
+            piece_indices = order_actions(qav_piece, piece_mask, TEMPERATURE, DETERMINISTIC)
+            return board_indices, piece_indices
@@ -18,7 +18,32 @@ import torch
 
 from datetime import datetime
 from os import path, makedirs
-import torch.nn.functional as F
+import numpy as np
+
+from quartopy.models import encoding
+from quartopy.models.encoding import encode_games
+
+
+def order_actions(
+    qav: torch.Tensor,
+    mask: torch.Tensor | None = None,
+    TEMPERATURE: float = 1.0,
+    DETERMINISTIC: bool = True,
+) -> torch.Tensor:
+    """
+    ``encoding.order_actions`` on tensors, returned on the device of ``qav``. The
+    sampling noise is seeded from torch's generator, so ``torch.manual_seed`` keeps
+    stochastic predictions reproducible.
+    """
+    rng = None if DETERMINISTIC else np.random.default_rng(int(torch.randint(2**62, ())))
+    order = encoding.order_actions(
+        qav.detach().cpu().numpy(),
+        None if mask is None else mask.cpu().numpy(),
+        TEMPERATURE,
+        DETERMINISTIC,
+        rng,
+    )
+    return torch.from_numpy(order).to(qav.device)
 
 
 class NN_abstract(ABC, torch.nn.Module):
@@ -46,6 +71,8 @@ class NN_abstract(ABC, torch.nn.Module):
         x_piece: torch.Tensor,
         TEMPERATURE: float = 1.0,
         DETERMINISTIC: bool = True,
+        board_mask: torch.Tensor | None = None,
+        piece_mask: torch.Tensor | None = None,
     ) -> tuple[torch.Tensor, torch.Tensor]:
         """
         Predicts the preferred order of all board positions and pieces, with optional ``TEMPERATURE`` for randomness.
@@ -57,6 +84,9 @@ class NN_abstract(ABC, torch.nn.Module):
                 Only used when ``DETERMINISTIC`` is False.
             ``DETERMINISTIC``: If True, returns sorted indices by Q-value (argmax).
                 If False, samples from softmax distribution.
+            ``board_mask``: Optional bool tensor (batch_size, 16), True for legal board positions.
+            ``piece_mask``: Optional bool tensor (batch_size, 16), True for legal pieces.
+                Illegal actions are placed after all the legal ones.
 
         Returns:
             * ``board_indices``: Ordered board position indices (batch_size, 16).
@@ -74,7 +104,6 @@ class NN_abstract(ABC, torch.nn.Module):
             x_board.shape[0] == x_piece.shape[0]
         ), "Input tensors must have the same batch size"
 
-        assert x_board.shape[0] == 1, "Batch size of 1 is required for prediction"
         self.eval()
         with torch.no_grad():
             # Move inputs to the same device as the model
@@ -82,28 +111,36 @@ class NN_abstract(ABC, torch.nn.Module):
             x_piece = x_piece.to(self.device)
             qav_board, qav_piece = self.forward(x_board, x_piece)
 
-            # Use tanh outputs directly for deterministic prediction
-            if DETERMINISTIC:
-                # Independent sorting for board positions and pieces
-                board_indices = torch.argsort(qav_board, descending=True, dim=1)
-                piece_indices = torch.argsort(qav_piece, descending=True, dim=1)
-                return board_indices, piece_indices
-            else:
-                # For stochastic prediction, use softmax over tanh outputs and sample
-                board_probs = F.softmax(qav_board / TEMPERATURE, dim=1)
-                piece_probs = F.softmax(qav_piece / TEMPERATURE, dim=1)
-                # Independent sorting for board positions and pieces
-                board_indices = torch.multinomial(
-                    board_probs,
-                    board_probs.shape[1],  # all possible combinations
-                    replacement=False,
-                )
-                piece_indices = torch.multinomial(
-                    piece_probs,
-                    piece_probs.shape[1],  # all possible combinations
-                    replacement=False,
-                )
-                return board_indices, piece_indices
+            board_indices = order_actions(qav_board, board_mask, TEMPERATURE, DETERMINISTIC)
+            piece_indices = order_actions(qav_piece, piece_mask, TEMPERATURE, DETERMINISTIC)
+            return board_indices, piece_indices
+
+    def predict_games(
+        self,
+        games: list,
+        TEMPERATURE: float = 1.0,
+        DETERMINISTIC: bool = True,
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        Predicts the ordered actions of many games with a single forward pass.
+
+        Args:
+            ``games``: List of ``QuartoGame`` instances.
+            ``TEMPERATURE``, ``DETERMINISTIC``: As in ``predict``.
+
+        Returns:
+            * ``board_indices``: Ordered board position indices (n_games, 16), empty cells first.
+            * ``piece_indices``: Ordered piece indices (n_games, 16), pieces still in storage first.
+        """
+        x_board, x_piece, board_mask, piece_mask = encode_games(games)
+        return self.predict(
+            torch.from_numpy(x_board).float(),
+            torch.from_numpy(x_piece).float(),
+            TEMPERATURE=TEMPERATURE,
+            DETERMINISTIC=DETERMINISTIC,
+            board_mask=torch.from_numpy(board_mask).to(self.device),
+            piece_mask=torch.from_numpy(piece_mask).to(self.device),
+        )
 
     # ####################################################################
     @classmethod
@@ -163,3 +200,66 @@ class NN_abstract(ABC, torch.nn.Module):
         torch.save(self.state_dict(), file_path)
 
         return file_path
+
+    # ####################################################################
+    def _example_inputs(self, batch_size: int = 1) -> tuple[torch.Tensor, torch.Tensor]:
+        x_board = torch.zeros((batch_size, 16, 4, 4), device=self.device)
+        x_piece = torch.zeros((batch_size, 16), device=self.device)
+        return x_board, x_piece
+
+    def export_traced(self, file_path: str) -> str:
+        """
+        Export the model as a TorchScript graph traced in evaluation mode, loadable with
+        ``torch.jit.load`` without the model class.
+
+        Args:
+            file_path: Path of the ``.pt`` file to write.
+        Returns:
+            The path of the saved file.
+        """
+        self.eval()
+        with torch.no_grad():
+            traced = torch.jit.trace(self, self._example_inputs())
+        makedirs(path.dirname(path.abspath(file_path)), exist_ok=True)
+        traced.save(file_path)
+        return file_path
+
+    def export_onnx(self, file_path: str, opset_version: int = 17) -> str:
+        """
+        Export the model to ONNX with inputs ``x_board``, ``x_piece``, outputs
+        ``qav_board``, ``qav_piece`` and a dynamic batch dimension. Run it with
+        ``quartopy.models.runtime.OnnxQuartoCNN``.
+
+        Args:
+            file_path: Path of the ``.onnx`` file to write.
+        Returns:
+            The path of the saved file.
+        """
+        self.eval()
+        makedirs(path.dirname(path.abspath(file_path)), exist_ok=True)
+        batch = {0: "batch"}
+        torch.onnx.export(
+            self,
+            self._example_inputs(),
+            file_path,
+            input_names=["x_board", "x_piece"],
+            output_names=["qav_board", "qav_piece"],
+            dynamic_axes={"x_board": batch, "x_piece": batch, "qav_board": batch, "qav_piece": batch},
+            opset_version=opset_version,
+        )
+        return file_path
+
+    def export_numpy(self, file_path: str) -> str:
+        """
+        Export the weights as a NumPy ``.npz`` archive, run without torch by
+        ``quartopy.models.runtime.NumpyQuartoCNN``.
+
+        Args:
+            file_path: Path of the ``.npz`` file to write.
+        Returns:
+            The path of the saved file.
+        """
+        makedirs(path.dirname(path.abspath(file_path)), exist_ok=True)
+        weights = {k: v.detach().cpu().numpy() for k, v in self.state_dict().items()}
+        np.savez(file_path, **weights)
+        return file_path
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""Streaming dataset of saved matches for training.
+
+Reads matches from ``MatchArchive`` files and from the CSV exports of
+``QuartoGame.export_history_to_csv`` and yields ``TensorDict`` batches with the keys
+that ``CNNBot.evaluate`` expects:
+
+* ``state_board``: float32 (batch_size, 16, 4, 4), board before the placement.
+* ``state_piece``: float32 (batch_size, 16), one-hot of the piece to place (zeros in
+  the first move of a match, where there is nothing to place).
+* ``action_place``: int64 (batch_size,), cell where the piece was placed, -1 in the
+  first move.
+* ``action_sel``: int64 (batch_size,), piece selected afterwards, -1 when the
+  placement ended the match.
+
+Matches are decoded a chunk at a time straight into preallocated buffers, so memory
+stays constant regardless of how many positions are streamed.
+"""
+
+from glob import glob
+from os import path
+from typing import Iterator
+
+import numpy as np
+import torch
+from tensordict import TensorDict
+
+from ..game.match_archive import (
+    PLACED,
+    MatchArchive,
+    read_csv_records,
+    unpack_boards,
+)
+
+MAX_SAMPLES_PER_MATCH = 17  # first selection + 16 placements
+
+
+def decode_positions(
+    records: np.ndarray,
+    starts: np.ndarray,
+    lengths: np.ndarray,
+    out_board: np.ndarray,
+    out_piece: np.ndarray,
+    out_place: np.ndarray,
+    out_sel: np.ndarray,
+) -> int:
+    """
+    Decodes the training samples of whole matches into the given buffers.
+
+    Args:
+        ``records``: ``MOVE_DTYPE`` records of consecutive matches.
+        ``starts``, ``lengths``: Position of each match in ``records`` and its number of moves.
+        ``out_*``: Buffers to write into, from index 0. They must have room for
+            ``MAX_SAMPLES_PER_MATCH`` samples per match.
+
+    Returns:
+        Number of samples written.
+    """
+    n = len(records)
+    is_start = np.zeros(n, dtype=bool)
+    is_start[starts] = True
+    is_last = np.zeros(n, dtype=bool)
+    is_last[starts + lengths - 1] = True
+
+    keys = np.flatnonzero(is_start | (records["action"] == PLACED))
+    m = len(keys)
+    first = is_start[keys]
+
+    # Board before each placement: the one stored in the previous record
+    prev = np.where(first, keys, keys - 1)
+    occupied = np.where(first, 0, records["occupied"][prev])
+    cells = unpack_boards(records["board"][prev], occupied)
+
+    board = out_board[:m]
+    board.fill(0)
+    rows, cols = np.nonzero(cells >= 0)
+    pieces = cells[rows, cols]
+    board[rows, pieces, cols // 4, cols % 4] = 1
+
+    piece = out_piece[:m]
+    piece.fill(0)
+    placing = np.flatnonzero(~first)
+    piece[placing, records["piece"][keys[placing]]] = 1
+
+    positions = records["position"].astype(np.int64)
+    selected = records["piece"].astype(np.int64)
+    out_place[:m] = np.where(first, -1, positions[keys])
+    following = selected[np.minimum(keys + 1, n - 1)]
+    out_sel[:m] = np.where(first, selected[keys], np.where(is_last[keys], -1, following))
+    return m
+
+
+class MatchDataset:
+    """
+    Iterable over training batches from saved matches.
+
+    Args:
+        ``sources``: Path or list of paths. Each one may be a ``MatchArchive`` file,
+            a CSV export or a folder; folders contribute all their ``*.csv`` files
+            and archives (``*.qma``).
+        ``batch_size``: Samples per batch.
+        ``shuffle_buffer``: Size of the shuffle buffer. With 0 the samples come out
+            in file order; otherwise each batch is drawn at random from the buffer,
+            and the file order is shuffled too.
+        ``seed``: Seed for the shuffling.
+        ``drop_last``: If True, the last incomplete batch is not yielded.
+        ``chunk_matches``: Matches decoded at once from an archive.
+
+    Example:
+        ```
+        dataset = MatchDataset("partidas_guardadas/", batch_size=512, shuffle_buffer=100_000)
+        for batch in dataset:
+            q_place, q_select = bot.evaluate(batch)
+        ```
+    """
+
+    def __init__(
+        self,
+        sources: str | list[str],
+        batch_size: int = 256,
+        shuffle_buffer: int = 0,
+        seed: int | None = None,
+        drop_last: bool = False,
+        chunk_matches: int = 256,
+    ):
+        assert batch_size > 0, "batch_size must be positive"
+        self.files = self._find_files([sources] if isinstance(sources, str) else sources)
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer
+        self.drop_last = drop_last
+        self.chunk_matches = chunk_matches
+        self.rng = np.random.default_rng(seed)
+
+        # Preallocated buffers: pending samples plus room for one decoded chunk
+        capacity = shuffle_buffer + batch_size + chunk_matches * MAX_SAMPLES_PER_MATCH
+        self._board = np.zeros((capacity, 16, 4, 4), dtype=np.float32)
+        self._piece = np.zeros((capacity, 16), dtype=np.float32)
+        self._place = np.zeros(capacity, dtype=np.int64)
+        self._sel = np.zeros(capacity, dtype=np.int64)
+
+    @staticmethod
+    def _find_files(sources: list[str]) -> list[str]:
+        files = []
+        for source in sources:
+            if path.isdir(source):
+                files += sorted(glob(path.join(source, "*.csv")))
+                files += sorted(glob(path.join(source, "*.qma")))
+            else:
+                files.append(source)
+        return files
+
+    # ####################################################################
+    def _chunks(self) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Yields ``(records, starts, lengths)`` for groups of whole matches."""
+        files = list(self.files)
+        if self.shuffle_buffer > 0:
+            self.rng.shuffle(files)
+
+        for file in files:
+            if file.endswith(".csv"):
+                records, _ = read_csv_records(file)
+                if len(records):
+                    yield records, np.array([0]), np.array([len(records)])
+                continue
+
+            archive = MatchArchive(file)
+            matches = archive.matches
+            moves = archive.moves
+            for first in range(0, len(matches), self.chunk_matches):
+                chunk = matches[first : first + self.chunk_matches]
+                offsets = chunk["offset"].astype(np.int64)
+                lengths = chunk["n_moves"].astype(np.int64)
+                begin = offsets[0]
+                records = moves[begin : offsets[-1] + lengths[-1]]
+                yield records, offsets - begin, lengths
+
+    def _take(self, idx, n: int) -> TensorDict:
+        """Copies the samples ``idx`` out of the buffers as a batch."""
+        return TensorDict(
+            {
+                "state_board": torch.from_numpy(self._board[idx]),
+                "state_piece": torch.from_numpy(self._piece[idx]),
+                "action_place": torch.from_numpy(self._place[idx]),
+                "action_sel": torch.from_numpy(self._sel[idx]),
+            },
+            batch_size=[n],
+        )
+
+    def _remove(self, idx: np.ndarray, n: int) -> int:
+        """Removes the samples ``idx`` from the first ``n`` of the buffers, filling the
+        holes with the last samples, and returns the new count."""
+        new_n = n - len(idx)
+        holes = idx[idx < new_n]
+        tail = np.setdiff1d(np.arange(new_n, n), idx, assume_unique=True)
+        for buffer in (self._board, self._piece, self._place, self._sel):
+            buffer[holes] = buffer[tail]
+        return new_n
+
+    def _compact(self, start: int, n: int) -> int:
+        """Moves the samples ``start:n`` to the front of the buffers, keeping their
+        order, and returns their count."""
+        for buffer in (self._board, self._piece, self._place, self._sel):
+            buffer[: n - start] = buffer[start:n]
+        return n - start
+
+    def __iter__(self) -> Iterator[TensorDict]:
+        B = self.batch_size
+        threshold = self.shuffle_buffer + B
+        # Pending samples are ``start:n``. Without shuffling batches are read from
+        # ``start`` on, and the buffers are compacted once per chunk, not per batch
+        start = n = 0
+
+        for records, starts, lengths in self._chunks():
+            if start:
+                n = self._compact(start, n)
+                start = 0
+            n += decode_positions(
+                records,
+                starts,
+                lengths,
+                self._board[n:],
+                self._piece[n:],
+                self._place[n:],
+                self._sel[n:],
+            )
+            while n - start >= threshold:
+                if self.shuffle_buffer > 0:
+                    idx = self.rng.choice(n, B, replace=False)
+                    yield self._take(idx, B)
+                    n = self._remove(idx, n)
+                else:
+                    yield self._take(np.arange(start, start + B), B)
+                    start += B
+
+        # Remaining samples
+        order = self.rng.permutation(n) if self.shuffle_buffer > 0 else np.arange(start, n)
+        for first in range(0, len(order), B):
+            idx = order[first : first + B]
+            if len(idx) < B and self.drop_last:
+                break
+            yield self._take(idx, len(idx))
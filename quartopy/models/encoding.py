@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Model inputs and action ordering shared by ``NN_abstract`` and the torch-free
+``runtime``. Only depends on NumPy.
+"""
+
+import numpy as np
+
+from quartopy.game.board import encode_cell_pieces
+
+_BITS = np.arange(16)
+
+
+def encode_games(games: list) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Encodes a list of ``QuartoGame`` instances as model inputs and legal-action masks.
+
+    Returns:
+        * ``x_board``: float32 array (n_games, 16, 4, 4), one-hot pieces on each board.
+        * ``x_piece``: float32 array (n_games, 16), one-hot of the selected piece (zeros if none).
+        * ``board_mask``: bool array (n_games, 16), True for empty cells.
+        * ``piece_mask``: bool array (n_games, 16), True for pieces still in storage.
+    """
+    n = len(games)
+    cells = np.array([game.game_board.cell_pieces for game in games], dtype=np.int8)
+    storage = np.array([game.storage_board.occupancy for game in games], dtype=np.int64)
+
+    x_board = encode_cell_pieces(cells, out=np.empty((n, 16, 4, 4), dtype=np.float32))
+    x_piece = np.zeros((n, 16), dtype=np.float32)
+    for i, game in enumerate(games):
+        if not game.pick and not isinstance(game.selected_piece, int):  # 0 when no piece
+            x_piece[i, game.selected_piece.index()] = 1
+    board_mask = cells < 0
+    piece_mask = (storage[:, None] >> _BITS) & 1 == 1
+    return x_board, x_piece, board_mask, piece_mask
+
+
+def order_actions(
+    qav: np.ndarray,
+    mask: np.ndarray | None = None,
+    TEMPERATURE: float = 1.0,
+    DETERMINISTIC: bool = True,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """
+    Orders the 16 actions of each row of ``qav`` (batch_size, 16) from best to worst.
+
+    If ``DETERMINISTIC`` the order is by Q-value, otherwise it is a sample without
+    replacement from ``softmax(qav / TEMPERATURE)`` (Gumbel-top-k) drawn with ``rng``.
+    Actions where ``mask`` is False are placed after all the legal ones.
+    """
+    keys = qav.astype(np.float64)
+    if not DETERMINISTIC:
+        rng = rng or np.random.default_rng()
+        keys = keys / TEMPERATURE + rng.gumbel(size=keys.shape)
+    if mask is not None:
+        keys = np.where(mask, keys, -np.inf)
+    return np.argsort(-keys, axis=1, kind="stable")
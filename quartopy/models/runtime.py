@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""Lightweight inference runtime for the exported CNN models.
+
+Runs the ``QuartoCNN`` family (``CNN_uncoupled``, ``CNN1``, ``CNNfrancis``) without
+PyTorch. The NumPy backend reads the ``.pt`` checkpoints written by
+``NN_abstract.export_model`` directly (see ``load_state_dict``) or weights exported with
+``NN_abstract.export_numpy`` (``.npz``). Graphs exported with
+``NN_abstract.export_onnx`` (``.onnx``) run with the optional ``onnxruntime`` package.
+
+With a fixed 4x4 board, each 3x3 convolution is a linear map, so the NumPy backend
+unrolls it once at load time into a dense matrix (im2col over all output positions)
+and the whole forward pass is five matrix products.
+"""
+
+import pickle
+import zipfile
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from os import path
+
+import numpy as np
+
+from .encoding import encode_games, order_actions
+
+# Storage classes that ``torch.save`` writes in the pickle, by dtype
+_TORCH_STORAGE_DTYPES = {
+    "DoubleStorage": np.float64,
+    "FloatStorage": np.float32,
+    "HalfStorage": np.float16,
+    "LongStorage": np.int64,
+    "IntStorage": np.int32,
+    "ShortStorage": np.int16,
+    "CharStorage": np.int8,
+    "ByteStorage": np.uint8,
+    "BoolStorage": np.bool_,
+}
+
+
+def _rebuild_tensor(storage, storage_offset, size, stride, *args):
+    """``torch._utils._rebuild_tensor_v2`` returning a NumPy array."""
+    itemsize = storage.dtype.itemsize
+    view = np.lib.stride_tricks.as_strided(
+        storage[storage_offset:], shape=tuple(size), strides=tuple(s * itemsize for s in stride)
+    )
+    return view.copy()
+
+
+def _rebuild_parameter(data, *args):
+    return data
+
+
+class _StateDictUnpickler(pickle.Unpickler):
+    """
+    Reads the ``data.pkl`` of a ``torch.save`` zip archive with tensors as NumPy
+    arrays. As ``torch.load(..., weights_only=True)``, any global other than the
+    containers and tensor rebuilders is refused.
+    """
+
+    def __init__(self, file, archive: zipfile.ZipFile, prefix: str):
+        super().__init__(file)
+        self.archive = archive
+        self.prefix = prefix
+        self.storages: dict[str, np.ndarray] = {}
+
+    def find_class(self, module: str, name: str):
+        if module == "collections" and name == "OrderedDict":
+            return OrderedDict
+        if module == "torch._utils" and name == "_rebuild_tensor_v2":
+            return _rebuild_tensor
+        if module == "torch._utils" and name == "_rebuild_parameter":
+            return _rebuild_parameter
+        if module == "torch" and name in _TORCH_STORAGE_DTYPES:
+            return _TORCH_STORAGE_DTYPES[name]
+        raise pickle.UnpicklingError(f"Unsupported global in checkpoint: {module}.{name}")
+
+    def persistent_load(self, pid):
+        typename, dtype, key, _location, numel = pid
+        if typename != "storage":
+            raise pickle.UnpicklingError(f"Unsupported persistent id {typename}")
+        if key not in self.storages:
+            data = self.archive.read(f"{self.prefix}data/{key}")
+            self.storages[key] = np.frombuffer(data, dtype=np.dtype(dtype).newbyteorder("<"), count=numel)
+        return self.storages[key]
+
+
+def load_state_dict(checkpoint_path: str) -> dict[str, np.ndarray]:
+    """
+    Loads a ``state_dict`` saved with ``torch.save`` (zip format, as written by
+    ``NN_abstract.export_model``) as NumPy arrays, without importing torch.
+
+    Returns:
+        Mapping of parameter names to arrays, in the order of the checkpoint.
+    """
+    with zipfile.ZipFile(checkpoint_path) as archive:
+        names = archive.namelist()
+        pkl = next((name for name in names if name.endswith("data.pkl")), None)
+        if pkl is None:
+            raise ValueError(f"{checkpoint_path} is not a torch zip checkpoint")
+        prefix = pkl[: -len("data.pkl")]
+        if f"{prefix}byteorder" in names and archive.read(f"{prefix}byteorder") != b"little":
+            raise ValueError(f"{checkpoint_path} was saved on a big-endian machine")
+        with archive.open(pkl) as f:
+            state_dict = _StateDictUnpickler(f, archive, prefix).load()
+    if not isinstance(state_dict, dict):
+        raise ValueError(f"{checkpoint_path} does not contain a state_dict")
+    return state_dict
+
+
+def conv_as_matrix(weight: np.ndarray, size: int = 4) -> np.ndarray:
+    """
+    Unrolls a zero-padded, stride 1 ``Conv2d`` weight over a ``size`` x ``size`` input.
+
+    Args:
+        ``weight``: Convolution weight (out_channels, in_channels, k, k), k odd.
+
+    Returns:
+        Matrix (in_channels * size * size, out_channels * size * size) such that
+        ``x.reshape(n, -1) @ matrix`` equals the convolution without bias, flattened
+        in channel-major order like ``torch.flatten``.
+    """
+    out_ch, in_ch, k, _ = weight.shape
+    n_pos = size * size
+    matrix = np.zeros((in_ch, n_pos, out_ch, n_pos), dtype=np.float32)
+    pad = k // 2
+    for r in range(size):
+        for c in range(size):
+            for dr in range(k):
+                for dc in range(k):
+                    rr, cc = r + dr - pad, c + dc - pad
+                    if 0 <= rr < size and 0 <= cc < size:
+                        matrix[:, rr * size + cc, :, r * size + c] = weight[:, :, dr, dc].T
+    return matrix.reshape(in_ch * n_pos, out_ch * n_pos)
+
+
+# ####################################################################
+class RuntimeModel(ABC):
+    """Common prediction interface of the runtime backends, mirroring ``NN_abstract``."""
+
+    name: str = "runtime"
+
+    @abstractmethod
+    def forward(self, x_board: np.ndarray, x_piece: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        pass
+
+    def predict(
+        self,
+        x_board: np.ndarray,
+        x_piece: np.ndarray,
+        TEMPERATURE: float = 1.0,
+        DETERMINISTIC: bool = True,
+        board_mask: np.ndarray | None = None,
+        piece_mask: np.ndarray | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts the preferred order of all board positions and pieces.
+
+        Returns:
+            ``board_indices``, ``piece_indices``: (batch_size, 16), best first and
+            illegal actions last.
+        """
+        qav_board, qav_piece = self.forward(x_board, x_piece)
+        return (
+            order_actions(qav_board, board_mask, TEMPERATURE, DETERMINISTIC, rng),
+            order_actions(qav_piece, piece_mask, TEMPERATURE, DETERMINISTIC, rng),
+        )
+
+    def predict_games(
+        self,
+        games: list,
+        TEMPERATURE: float = 1.0,
+        DETERMINISTIC: bool = True,
+        rng: np.random.Generator | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Ordered actions of many ``QuartoGame`` instances with a single forward pass."""
+        x_board, x_piece, board_mask, piece_mask = encode_games(games)
+        return self.predict(x_board, x_piece, TEMPERATURE, DETERMINISTIC, board_mask, piece_mask, rng)
+
+
+class NumpyQuartoCNN(RuntimeModel):
+    """
+    NumPy forward pass of the ``QuartoCNN`` models.
+
+    When ``fc2_piece`` takes 16 extra inputs (``CNN1``) it receives the board Q-values
+    concatenated to the hidden layer; otherwise (``CNN_uncoupled``, ``CNNfrancis``)
+    both heads read the hidden layer only. Dropout is the identity at inference.
+
+    Args:
+        ``state_dict``: Mapping of parameter names to arrays, as in ``model.state_dict()``.
+    """
+
+    _LAYERS = ("fc_in_piece", "conv1", "conv2", "fc1", "fc2_board", "fc2_piece")
+
+    def __init__(self, state_dict: dict[str, np.ndarray], name: str = "QuartoCNN_numpy"):
+        unknown = [k for k in state_dict if k.split(".")[0] not in self._LAYERS]
+        if unknown:
+            raise ValueError(f"Unsupported architecture for the NumPy runtime, unknown parameters {unknown}")
+        w = {k: np.asarray(v, dtype=np.float32) for k, v in state_dict.items()}
+        self.name = name
+
+        self.w_piece = w["fc_in_piece.weight"].T.copy()
+        self.b_piece = w["fc_in_piece.bias"]
+
+        # Convolutions unrolled to dense matrices; biases repeated per position
+        self.w_conv1 = conv_as_matrix(w["conv1.weight"])
+        self.b_conv1 = np.repeat(w["conv1.bias"], 16)
+        self.w_conv2 = conv_as_matrix(w["conv2.weight"])
+        self.b_conv2 = np.repeat(w["conv2.bias"], 16)
+
+        self.w_fc1 = w["fc1.weight"].T.copy()
+        self.b_fc1 = w["fc1.bias"]
+        self.w_board = w["fc2_board.weight"].T.copy()
+        self.b_board = w["fc2_board.bias"]
+        self.w_out_piece = w["fc2_piece.weight"].T.copy()
+        self.b_out_piece = w["fc2_piece.bias"]
+        self.coupled = self.w_out_piece.shape[0] == self.w_fc1.shape[1] + 16
+
+    @classmethod
+    def from_file(cls, weights_path: str) -> "NumpyQuartoCNN":
+        """
+        Loads a ``.pt`` checkpoint (``NN_abstract.export_model``) or weights exported
+        with ``NN_abstract.export_numpy`` (``.npz``).
+        """
+        if weights_path.endswith(".npz"):
+            with np.load(weights_path) as data:
+                state_dict = {k: data[k] for k in data.files}
+        else:
+            state_dict = load_state_dict(weights_path)
+        return cls(state_dict, name=path.basename(weights_path))
+
+    def forward(self, x_board: np.ndarray, x_piece: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            ``x_board``: (batch_size, 16, 4, 4). ``x_piece``: (batch_size, 16).
+
+        Returns:
+            ``qav_board``, ``qav_piece``: (batch_size, 16) in [-1, 1].
+        """
+        n = x_board.shape[0]
+        piece_map = np.maximum(x_piece @ self.w_piece + self.b_piece, 0)
+        x = np.concatenate([x_board.reshape(n, -1), piece_map], axis=1, dtype=np.float32)
+        x = np.maximum(x @ self.w_conv1 + self.b_conv1, 0)
+        x = np.maximum(x @ self.w_conv2 + self.b_conv2, 0)
+        x = np.maximum(x @ self.w_fc1 + self.b_fc1, 0)
+
+        qav_board = np.tanh(x @ self.w_board + self.b_board)
+        if self.coupled:
+            x = np.concatenate([x, qav_board], axis=1)
+        qav_piece = np.tanh(x @ self.w_out_piece + self.b_out_piece)
+        return qav_board, qav_piece
+
+
+class OnnxQuartoCNN(RuntimeModel):
+    """
+    Runs a graph exported with ``NN_abstract.export_onnx`` with ``onnxruntime`` on CPU.
+    """
+
+    def __init__(self, onnx_path: str):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("Running .onnx models requires the onnxruntime package") from e
+        self.session = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        self.name = path.basename(onnx_path)
+
+    def forward(self, x_board: np.ndarray, x_piece: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        qav_board, qav_piece = self.session.run(
+            None,
+            {
+                "x_board": np.ascontiguousarray(x_board, dtype=np.float32),
+                "x_piece": np.ascontiguousarray(x_piece, dtype=np.float32),
+            },
+        )
+        return qav_board, qav_piece
+
+
+def load_runtime_model(model_path: str) -> RuntimeModel:
+    """
+    Loads a model with the backend given by its extension: ``.pt`` and ``.npz`` with
+    NumPy, ``.onnx`` with onnxruntime.
+    """
+    if model_path.endswith(".onnx"):
+        return OnnxQuartoCNN(model_path)
+    if model_path.endswith((".pt", ".pth", ".npz")):
+        return NumpyQuartoCNN.from_file(model_path)
+    raise ValueError(f"Unsupported model file {model_path}, expected .pt, .npz or .onnx")